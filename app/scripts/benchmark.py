@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los generadores de EPUB y PDF.
+
+Mide el contenido real (los libros de app/scripts/books y los temarios HTML de
+public/) y contenido sintético grande: un libro con cientos de capítulos, miles
+de bloques de código y tablas largas, y temarios con muchas sesiones. Por cada
+caso reporta tiempo total, tiempo por fase y memoria pico. Los casos parse:*
+miden solo la extracción de los temarios con cada parser de
+temario_extract.py (tiempo por extracción, promedio de PARSE_ITERATIONS) y,
+si bs4 está instalado, con la extracción original de BeautifulSoup como
+referencia.
+
+Cada caso corre en un proceso nuevo: la memoria pico es la de ese caso y no
+arrastra importaciones ni cachés de los anteriores. Los EPUB se miden en frío
+(caché vacía) y en caliente (misma caché, segunda construcción). Nada se
+escribe en public/: las salidas van a un directorio temporal.
+
+Los resultados se guardan en .benchmarks/<commit>.json para comparar entre
+commits; con --compare el script falla si algún caso empeora más del umbral.
+
+Uso:
+    python3 app/scripts/benchmark.py                        # todos los casos
+    python3 app/scripts/benchmark.py --only epub            # casos que contienen "epub"
+    python3 app/scripts/benchmark.py --repeat 5 --save      # guardar resultados
+    python3 app/scripts/benchmark.py --compare .benchmarks/abc1234.json --threshold 0.15
+"""
+
+import sys
+import json
+import shutil
+import argparse
+import importlib.util
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parent.parent
+RESULTS_DIR = ROOT_DIR / ".benchmarks"
+
+# Temarios de la raíz: id -> (HTML en public/, módulo, función de parseo, función del PDF)
+PDF_DOCUMENTS = {
+    "temario": ("temario-claude-code.html", "generate_temario_pdf", "parse_html_temario", "create_temario_pdf"),
+    "workshop": ("temario-claude-workshop.html", "generate_workshop_pdf", "parse_html_workshop",
+                 "create_workshop_pdf"),
+}
+
+# Tamaño del contenido sintético
+SYNTHETIC_CHAPTERS = 300
+SYNTHETIC_CODE_BLOCKS = 10
+SYNTHETIC_TABLE_ROWS = 60
+SYNTHETIC_SESSIONS = 200
+
+PARSE_ITERATIONS = 20
+BATCH_RECIPIENTS = 200
+PARSE_BACKENDS = ("lxml", "html.parser") + (("bs4",) if importlib.util.find_spec("bs4") else ())
+
+DEFAULT_THRESHOLD = 0.20
+
+
+# ---------------------------------------------------------------------------
+# Contenido sintético
+# ---------------------------------------------------------------------------
+
+CODE_SAMPLES = {
+    "typescript": '''import {{ streamText }} from "ai";
+
+export async function handler{n}(prompt: string): Promise<string> {{
+  const result = await streamText({{ model, prompt }});
+  let text = "";
+  for await (const chunk of result.textStream) {{
+    text += chunk; // bloque {n}
+  }}
+  return text;
+}}''',
+    "python": '''def procesar_{n}(items):
+    """Bloque {n}"""
+    total = 0
+    for item in items:
+        if item.get("activo"):
+            total += item["valor"] * 1.16
+    return round(total, 2)''',
+    "bash": '''npm install ai @ai-sdk/openai zod
+export OPENAI_API_KEY="sk-{n}"
+npx tsx scripts/bloque-{n}.ts --verbose''',
+}
+
+
+def synthetic_chapter(index, code_blocks, table_rows):
+    languages = list(CODE_SAMPLES)
+    parts = [f"# Capítulo {index}: Tema sintético número {index}\n"]
+    for block in range(code_blocks):
+        parts.append(f"## Sección {index}.{block + 1}\n")
+        parts.append(f"Este párrafo explica el paso {block + 1} con **negritas**, `código en línea` y "
+                     f"[un enlace](https://fixtergeek.com). Añade contexto suficiente para que el "
+                     f"capítulo {index} tenga un tamaño parecido al de los libros reales.\n")
+        language = languages[(index + block) % len(languages)]
+        code = CODE_SAMPLES[language].format(n=index * 100 + block)
+        parts.append(f"```{language}\n{code}\n```\n")
+
+    parts.append("| Modelo | Proveedor | Contexto | Entrada | Salida | Notas |")
+    parts.append("|--------|-----------|----------|---------|--------|-------|")
+    for row in range(table_rows):
+        parts.append(f"| modelo-{row} | proveedor-{row % 7} | {8 * (row + 1)}k | "
+                     f"${row * 0.15:.2f} | ${row * 0.6:.2f} | fila {row} del capítulo {index} |")
+    parts.append("")
+    return "\n".join(parts)
+
+
+def create_synthetic_book(work_dir, chapters=SYNTHETIC_CHAPTERS, code_blocks=SYNTHETIC_CODE_BLOCKS,
+                          table_rows=SYNTHETIC_TABLE_ROWS):
+    """Escribe los capítulos en work_dir y devuelve el manifiesto del libro"""
+    content_dir = Path(work_dir) / "libro-sintetico"
+    content_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest_chapters = []
+    for index in range(1, chapters + 1):
+        slug = f"capitulo-{index:03d}"
+        (content_dir / f"{slug}.md").write_text(synthetic_chapter(index, code_blocks, table_rows),
+                                                encoding='utf-8')
+        manifest_chapters.append({"id": index, "title": f"Capítulo {index}", "slug": slug})
+
+    return {
+        "id": "sintetico",
+        "metadata": {
+            "identifier": "benchmark-sintetico-001",
+            "title": "Libro sintético de benchmark",
+            "language": "es",
+            "author": "Benchmark",
+            "publisher": "FixterGeek",
+            "source": "fixtergeek.com",
+            "description": "Libro generado para medir el rendimiento del motor."
+        },
+        "content_dir": str(content_dir),
+        "cover": None,
+        "output": str(Path(work_dir) / "sintetico.epub"),
+        "highlight": {"style": "one-dark"},
+        "chapters": manifest_chapters,
+    }
+
+
+def synthetic_temario_html(sessions):
+    """Temario con la estructura de temario-claude-code.html y muchas sesiones"""
+    parts = ['<html><body>',
+             '<h1 class="title">Temario sintético de benchmark</h1>',
+             '<section class="webinar-box"><h4>📅 Viernes 15 de Agosto 2025</h4>',
+             '<p><strong>Duración:</strong> 60 minutos</p><ul>',
+             *[f'<li>✨ Tema del webinar {n}</li>' for n in range(8)],
+             '</ul></section>']
+    for index in range(1, sessions + 1):
+        bonus = ' bonus' if index == sessions else ''
+        parts.append(f'<section class="session{bonus}"><h4>Sesión {index}: Tema {index}</h4>')
+        parts.append(f'<div class="session-meta">📅 Martes • 7:00 PM CDMX • 2 horas • sesión {index}</div><ul>')
+        parts.extend(f'<li>Punto {topic} de la sesión {index} con texto de relleno</li>' for topic in range(8))
+        parts.append('</ul>')
+        if bonus:
+            parts.append('<p>Valor adicional de la sesión bonus</p>')
+        parts.append('</section>')
+    parts.append('<section class="pricing"><div class="price-option">Sesión: $999 MXN</div>'
+                 '<div class="price-option">Paquete: $2,490 MXN</div><h4>Incluye</h4>'
+                 '<p>Grabaciones\nMateriales\nComunidad</p></section>')
+    parts.append('<section class="contact-info"><p>Website: fixtergeek.com</p>'
+                 '<p>Email: contacto@fixtergeek.com</p><p>Registro abierto</p></section>')
+    parts.append('</body></html>')
+    return "\n".join(parts)
+
+
+def synthetic_workshop_html(sessions):
+    """El temario real del workshop con su primera sesión repetida muchas veces"""
+    html = (ROOT_DIR / "public" / "temario-claude-workshop.html").read_text(encoding='utf-8')
+    start = html.index('<section class="session">')
+    end = html.index('</section>', start) + len('</section>')
+    session = html[start:end]
+    repeated = "\n".join(session.replace("Sesión 1:", f"Sesión {index}:", 1)
+                         for index in range(1, sessions + 1))
+    return html[:start] + repeated + html[end:]
+
+
+# ---------------------------------------------------------------------------
+# Casos
+# ---------------------------------------------------------------------------
+
+def list_cases(work_dir):
+    """Casos disponibles: {nombre: descripción}"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from book_builder import list_books
+
+    cases = {}
+    for book_id in list_books():
+        cases[f"epub:{book_id}:frio"] = f"EPUB {book_id} con caché vacía"
+        cases[f"epub:{book_id}:caliente"] = f"EPUB {book_id} con caché llena"
+    cases["epub:sintetico:frio"] = (f"EPUB sintético, {SYNTHETIC_CHAPTERS} capítulos × "
+                                    f"{SYNTHETIC_CODE_BLOCKS} bloques de código")
+    cases["epub:sintetico:caliente"] = "EPUB sintético con caché llena"
+    cases["epub:sintetico:frio:stream"] = "EPUB sintético escrito capítulo a capítulo, caché vacía"
+    cases["epub:sintetico:caliente:stream"] = "EPUB sintético escrito capítulo a capítulo, caché llena"
+    for profile in ("fast", "max"):
+        cases[f"epub:sintetico:caliente:{profile}"] = f"EPUB sintético con caché llena, compresión {profile}"
+    cases["epub:sintetico:caliente:formatos"] = "EPUB, HTML y PDF sintéticos de una sola conversión, caché llena"
+    for document, (html_name, *_) in PDF_DOCUMENTS.items():
+        if (ROOT_DIR / "public" / html_name).exists():
+            cases[f"pdf:{document}"] = f"PDF {document} desde public/{html_name}"
+        cases[f"pdf:{document}:sintetico"] = f"PDF {document} con {SYNTHETIC_SESSIONS} sesiones"
+    if (ROOT_DIR / "public" / PDF_DOCUMENTS["workshop"][0]).exists():
+        cases["pdf:workshop:lote"] = f"{BATCH_RECIPIENTS} PDFs personalizados del workshop"
+    for document, (html_name, *_) in PDF_DOCUMENTS.items():
+        for backend in PARSE_BACKENDS:
+            if (ROOT_DIR / "public" / html_name).exists():
+                cases[f"parse:{document}:{backend}"] = f"Extracción de public/{html_name} con {backend}"
+            cases[f"parse:{document}:sintetico:{backend}"] = (f"Extracción del temario {document} de "
+                                                              f"{SYNTHETIC_SESSIONS} sesiones con {backend}")
+    return cases
+
+
+def prepare(work_dir):
+    """Genera el contenido sintético y los directorios de trabajo de los PDF"""
+    work_dir = Path(work_dir)
+    manifest = create_synthetic_book(work_dir)
+    (work_dir / "sintetico.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+
+    for document, (html_name, *_) in PDF_DOCUMENTS.items():
+        real_html = ROOT_DIR / "public" / html_name
+        if real_html.exists():
+            public_dir = work_dir / f"pdf-{document}" / "public"
+            public_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copy(real_html, public_dir / html_name)
+
+        public_dir = work_dir / f"pdf-{document}-sintetico" / "public"
+        public_dir.mkdir(parents=True, exist_ok=True)
+        if document == "workshop":
+            html = synthetic_workshop_html(SYNTHETIC_SESSIONS)
+        else:
+            html = synthetic_temario_html(SYNTHETIC_SESSIONS)
+        (public_dir / html_name).write_text(html, encoding='utf-8')
+
+
+def run_epub_case(work_dir, book_id, warm, jobs, stream=False, compression=None, formats=("epub",)):
+    from book_builder import build_formats, load_manifest
+    from chapter_cache import ChapterCache
+
+    if book_id == "sintetico":
+        manifest = json.loads((work_dir / "sintetico.json").read_text(encoding='utf-8'))
+    else:
+        manifest = load_manifest(book_id)
+
+    cache = ChapterCache(work_dir / "cache" / book_id, max_bytes=1024 * 1024 * 1024)
+    output_path = work_dir / "salida" / f"{book_id}.epub"
+    if warm:
+        # La construcción que llena la caché no cuenta
+        build_formats(manifest, formats, cache=cache, jobs=jobs, output_path=output_path, stream=stream,
+                      compression=compression)
+    else:
+        cache.clear()
+    for path in output_path.parent.glob(f"{book_id}.*"):
+        path.unlink()
+
+    from build_events import recording
+    started = time.perf_counter()
+    with recording() as records:
+        paths = build_formats(manifest, formats, cache=cache, jobs=jobs, output_path=output_path,
+                              stream=stream, compression=compression)
+    return time.perf_counter() - started, records, sum(Path(path).stat().st_size for path in paths.values())
+
+
+def run_pdf_case(work_dir, document, synthetic):
+    from build_events import phase, recording
+
+    html_name, module_name, parse_name, create_name = PDF_DOCUMENTS[document]
+    case_dir = work_dir / (f"pdf-{document}-sintetico" if synthetic else f"pdf-{document}")
+
+    sys.path.insert(0, str(ROOT_DIR))
+    module = __import__(module_name)
+    html_path = case_dir / "public" / html_name
+    output = case_dir / "public" / html_name.replace(".html", ".pdf")
+
+    # Llena la caché de contenido: create_* la lee en lugar de volver a parsear
+    parse = getattr(module, parse_name)
+    parse(html_path)
+
+    started = time.perf_counter()
+    with recording() as records:
+        with phase("parse"):
+            parse(html_path, cache_dir=None)
+        with phase("render"):
+            getattr(module, create_name)(output, html_path)
+    wall = time.perf_counter() - started
+    return wall, records, output.stat().st_size
+
+
+def bs4_workshop(html_content):
+    """Extracción original del workshop con BeautifulSoup, como referencia"""
+    import re
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    title, subtitle = soup.find('h1', class_='title'), soup.find('div', class_='subtitle')
+    content_data = {
+        'title': title.get_text(strip=True) if title else "De Junior a Senior con Claude Code",
+        'subtitle': subtitle.get_text(strip=True) if subtitle else "",
+        'badges': [badge.get_text(strip=True) for badge in soup.find_all('span', class_='badge')],
+        'webinar': {},
+        'sessions': [],
+        'pricing': {},
+        'contact': {}
+    }
+
+    webinar_section = soup.find('section', class_='webinar-box')
+    if webinar_section:
+        h3, ul = webinar_section.find('h3'), webinar_section.find('ul')
+        content_data['webinar'] = {
+            'date': h3.get_text(strip=True) if h3 else "",
+            'details': [text for text in (p.get_text(strip=True) for p in webinar_section.find_all('p'))
+                        if text and not text.startswith('🎯')],
+            'topics': [li.get_text(strip=True) for li in ul.find_all('li')] if ul else []
+        }
+
+    for session in soup.find_all('section', class_='session'):
+        h3, meta_div, ul = session.find('h3'), session.find('div', class_='session-meta'), session.find('ul')
+        session_data = {
+            'title': h3.get_text(strip=True) if h3 else '',
+            'meta': meta_div.get_text(strip=True) if meta_div else '',
+            'topics': [li.get_text(strip=True) for li in ul.find_all('li')] if ul else [],
+            'is_bonus': 'bonus' in session.get('class', [])
+        }
+        if session_data['is_bonus']:
+            for p in session.find_all('p'):
+                if '⚡' in p.get_text():
+                    session_data['bonus_note'] = p.get_text(strip=True)
+        content_data['sessions'].append(session_data)
+
+    pricing_section = soup.find('section', class_='pricing')
+    if pricing_section:
+        content_data['pricing']['options'] = []
+        for option in pricing_section.find_all('div', class_='price-option'):
+            price_div = option.find('div', class_='price')
+            if price_div:
+                content_data['pricing']['options'].append({
+                    'price': price_div.get_text(strip=True),
+                    'description': ' '.join(p.get_text(strip=True) for p in option.find_all('p'))
+                })
+        includes_h4 = pricing_section.find('h4', string=re.compile('incluyen'))
+        next_ul = includes_h4.find_next_sibling('ul') if includes_h4 else None
+        if next_ul:
+            content_data['pricing']['includes'] = [li.get_text(strip=True) for li in next_ul.find_all('li')]
+
+    contact_section = soup.find('section', class_='contact-info')
+    if contact_section:
+        for p in contact_section.find_all('p'):
+            text = p.get_text(strip=True)
+            if 'Website:' in text:
+                content_data['contact']['website'] = text.replace('Website:', '').strip()
+            elif 'Email:' in text:
+                content_data['contact']['email'] = text.replace('Email:', '').strip()
+            elif 'WhatsApp:' in text:
+                content_data['contact']['whatsapp'] = text.replace('WhatsApp:', '').strip()
+        ol = contact_section.find('ol')
+        if ol:
+            content_data['contact']['process'] = [li.get_text(strip=True) for li in ol.find_all('li')]
+    return content_data
+
+
+def bs4_temario(html_content):
+    """Extracción original del temario con BeautifulSoup, como referencia"""
+    import re
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    title = soup.find('h1', class_='title')
+    content_data = {
+        'title': title.get_text(strip=True) if title else "Temario Completo: Claude Code Power User",
+        'webinar': {},
+        'sessions': [],
+        'pricing': {},
+        'contact': {}
+    }
+
+    webinar_section = soup.find('section', class_='webinar-box')
+    if webinar_section:
+        h4, ul = webinar_section.find('h4'), webinar_section.find('ul')
+        content_data['webinar'] = {
+            'date': h4.get_text(strip=True) if h4 else "",
+            'details': [text for text in (p.get_text(strip=True) for p in webinar_section.find_all('p')) if text],
+            'topics': [li.get_text(strip=True) for li in ul.find_all('li')] if ul else []
+        }
+
+    for session in soup.find_all('section', class_='session'):
+        h4, meta_div, ul = session.find('h4'), session.find('div', class_='session-meta'), session.find('ul')
+        session_data = {
+            'title': h4.get_text(strip=True) if h4 else '',
+            'meta': meta_div.get_text(strip=True) if meta_div else '',
+            'topics': [li.get_text(strip=True) for li in ul.find_all('li')] if ul else []
+        }
+        if 'bonus' in session.get('class', []):
+            bonus_p = session.find('p')
+            if bonus_p:
+                session_data['bonus_value'] = bonus_p.get_text(strip=True)
+        content_data['sessions'].append(session_data)
+
+    pricing_section = soup.find('section', class_='pricing')
+    if pricing_section:
+        content_data['pricing']['options'] = [option.get_text(strip=True)
+                                              for option in pricing_section.find_all('div', class_='price-option')]
+        includes_h4 = pricing_section.find('h4', string=re.compile('Incluye'))
+        next_p = includes_h4.find_next_sibling('p') if includes_h4 else None
+        if next_p:
+            content_data['pricing']['includes'] = [line.strip() for line in next_p.get_text().split('\n')
+                                                   if line.strip()]
+
+    contact_section = soup.find('section', class_='contact-info')
+    if contact_section:
+        for p in contact_section.find_all('p'):
+            text = p.get_text(strip=True)
+            if 'Website:' in text:
+                content_data['contact']['website'] = text.replace('Website:', '').strip()
+            elif 'Email:' in text:
+                content_data['contact']['email'] = text.replace('Email:', '').strip()
+            elif 'Registro' in text:
+                content_data['contact']['registro'] = text
+    return content_data
+
+
+# Extracción con BeautifulSoup que temario_extract.py reemplazó (backend "bs4")
+BS4_BASELINES = {"workshop": bs4_workshop, "temario": bs4_temario}
+
+
+def run_parse_case(work_dir, document, synthetic, backend):
+    sys.path.insert(0, str(ROOT_DIR))
+    from build_events import phase, recording
+    from temario_extract import extract_document
+
+    html_name = PDF_DOCUMENTS[document][0]
+    case_dir = work_dir / (f"pdf-{document}-sintetico" if synthetic else f"pdf-{document}")
+    html_content = (case_dir / "public" / html_name).read_text(encoding='utf-8')
+
+    if backend == "bs4":
+        def extract(document, html_content, backend):
+            return BS4_BASELINES[document](html_content)
+    else:
+        extract = extract_document
+
+    # Primera extracción fuera de la medición: importa el parser
+    content_data = extract(document, html_content, backend)
+    started = time.perf_counter()
+    with recording() as records:
+        with phase("parse"):
+            for _ in range(PARSE_ITERATIONS):
+                extract(document, html_content, backend)
+    wall = (time.perf_counter() - started) / PARSE_ITERATIONS
+    records = [{"type": "phase_end", "phase": "parse", "seconds": wall}]
+    return wall, records, len(json.dumps(content_data, ensure_ascii=False).encode('utf-8'))
+
+
+def run_batch_case(work_dir, jobs):
+    sys.path.insert(0, str(ROOT_DIR))
+    from build_events import phase, recording
+    import generate_workshop_batch as batch
+
+    html_path = work_dir / "pdf-workshop" / "public" / PDF_DOCUMENTS["workshop"][0]
+    content_data = batch.workshop.parse_html_workshop(html_path, cache_dir=None)
+    recipients = (batch.normalize_recipient({"name": f"Persona {index}", "sessions": [1 + index % 4],
+                                             "amount": 999 + index, "currency": "MXN"}, index)
+                  for index in range(1, BATCH_RECIPIENTS + 1))
+    output_dir = work_dir / "salida-lote"
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    started = time.perf_counter()
+    with recording() as records:
+        with phase("render"):
+            batch.render_batch(recipients, output_dir, content_data, jobs)
+    wall = time.perf_counter() - started
+    return wall, records, sum(path.stat().st_size for path in output_dir.glob("*.pdf"))
+
+
+def peak_rss_kb():
+    """Memoria residente pico del proceso y sus hijos, en KB"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # macOS reporta bytes, Linux KB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(name, work_dir, jobs):
+    """Ejecuta un caso en este proceso y devuelve su medición"""
+    from build_events import totals
+
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    # La edición PDF usa pdf_fonts.py, que vive en la raíz
+    sys.path.insert(0, str(ROOT_DIR))
+    work_dir = Path(work_dir)
+    kind, target, *variant = name.split(":")
+
+    # El progreso de los generadores no se mezcla con el JSON del resultado
+    with redirect_stdout(sys.stderr):
+        if kind == "epub":
+            compression = next((v for v in variant if v in ("fast", "max")), None)
+            formats = ("epub", "html", "pdf") if "formatos" in variant else ("epub",)
+            wall, records, size = run_epub_case(work_dir, target, "caliente" in variant, jobs,
+                                                stream="stream" in variant, compression=compression,
+                                                formats=formats)
+        elif kind == "pdf" and variant == ["lote"]:
+            wall, records, size = run_batch_case(work_dir, jobs)
+        elif kind == "parse":
+            wall, records, size = run_parse_case(work_dir, target, "sintetico" in variant, variant[-1])
+        else:
+            wall, records, size = run_pdf_case(work_dir, target, variant == ["sintetico"])
+
+    phases = totals(records)
+    phases["otros"] = max(0.0, wall - sum(phases.values()))
+    return {"wall": wall, "phases": phases, "peak_rss_kb": peak_rss_kb(), "output_bytes": size}
+
+
+def run_case_subprocess(name, work_dir, jobs, verbose=False):
+    command = [sys.executable, str(Path(__file__).resolve()), "--case", name,
+               "--work-dir", str(work_dir), "--jobs", str(jobs)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if verbose or completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+    if completed.returncode != 0:
+        raise RuntimeError(f"el caso {name} falló (código {completed.returncode})")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# ---------------------------------------------------------------------------
+# Resultados
+# ---------------------------------------------------------------------------
+
+def summarize(runs):
+    """Mediana de varias corridas del mismo caso"""
+    median_run = sorted(runs, key=lambda run: run["wall"])[len(runs) // 2]
+    return {
+        "wall": statistics.median(run["wall"] for run in runs),
+        "wall_min": min(run["wall"] for run in runs),
+        "phases": median_run["phases"],
+        "peak_rss_kb": max(run["peak_rss_kb"] for run in runs),
+        "output_bytes": median_run["output_bytes"],
+        "runs": len(runs),
+    }
+
+
+def git_commit():
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                   capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return completed.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results):
+    print(f"\n⏱️  Benchmark ({results['commit'] or 'sin commit'}, Python {results['python']})")
+    print(f"   {'caso':<38} {'total':>8} {'pico':>9} {'salida':>10}  fases")
+    for name, case in results["cases"].items():
+        phases = "  ".join(f"{phase}={seconds:.3f}" for phase, seconds in case["phases"].items())
+        print(f"   {name:<38} {case['wall']:>7.3f}s {case['peak_rss_kb'] / 1024:>7.1f}MB "
+              f"{case['output_bytes'] / 1024:>8.1f}KB  {phases}")
+
+
+def compare(results, baseline, threshold):
+    """Imprime las diferencias contra otra corrida; devuelve los casos que empeoraron"""
+    regressions = []
+    print(f"\n📊 Comparación contra {baseline.get('commit') or 'línea base'} (umbral {threshold:.0%})")
+    for name, case in results["cases"].items():
+        previous = baseline["cases"].get(name)
+        if not previous:
+            print(f"   {name:<38} (nuevo)")
+            continue
+        wall_delta = case["wall"] / previous["wall"] - 1 if previous["wall"] else 0.0
+        memory_delta = case["peak_rss_kb"] / previous["peak_rss_kb"] - 1 if previous["peak_rss_kb"] else 0.0
+        regressed = wall_delta > threshold or memory_delta > threshold
+        marker = "✗" if regressed else "✓"
+        print(f"   {marker} {name:<36} tiempo {wall_delta:+7.1%}  memoria {memory_delta:+7.1%}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def save_results(results, path=None):
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = Path(path) if path else RESULTS_DIR / f"{results['commit'] or 'resultados'}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return path
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark de los generadores de EPUB y PDF")
+    parser.add_argument("--only", action="append", default=[],
+                        help="solo casos cuyo nombre contenga este texto (repetible)")
+    parser.add_argument("--list", action="store_true", help="mostrar los casos disponibles")
+    parser.add_argument("--repeat", type=int, default=3, help="corridas por caso (se reporta la mediana)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="procesos para convertir capítulos")
+    parser.add_argument("--save", nargs="?", const="", default=None,
+                        help="guardar resultados (por defecto en .benchmarks/<commit>.json)")
+    parser.add_argument("--compare", help="archivo de resultados contra el cual comparar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="empeoramiento relativo tolerado con --compare (0.2 = 20%%)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="mostrar la salida de los generadores")
+    # Uso interno: ejecutar un solo caso en este proceso
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.work_dir, args.jobs)))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as work_dir:
+        cases = list_cases(work_dir)
+        if args.only:
+            cases = {name: description for name, description in cases.items()
+                     if any(pattern in name for pattern in args.only)}
+
+        if args.list:
+            for name, description in cases.items():
+                print(f"{name:<38} {description}")
+            return 0
+
+        print("🧪 Preparando contenido sintético...")
+        prepare(work_dir)
+
+        results = {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "jobs": args.jobs,
+            "cases": {},
+        }
+        for name in cases:
+            print(f"   ▶ {name}")
+            runs = [run_case_subprocess(name, work_dir, args.jobs, args.verbose)
+                    for _ in range(max(1, args.repeat))]
+            results["cases"][name] = summarize(runs)
+
+    print_report(results)
+
+    if args.save is not None:
+        print(f"\n💾 Resultados guardados en {save_results(results, args.save or None)}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n✗ Casos más lentos o pesados que la línea base: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
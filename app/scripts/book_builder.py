@@ -0,0 +1,1263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor único de construcción de libros EPUB (y sus ediciones HTML y PDF).
+Los libros con "search" en su manifiesto actualizan además su índice de
+búsqueda de texto completo (ver search_index.py).
+
+Cada libro se describe con un manifiesto JSON en app/scripts/books/<id>.json
+(metadatos, capítulos, tema, resaltado de código, portada y ruta de salida).
+Este script construye todos los libros, o los que se indiquen, dentro del mismo
+proceso para pagar una sola vez el arranque del intérprete y la importación de
+ebooklib/markdown.
+
+Cada capítulo se convierte una sola vez por corrida (markdown → XHTML
+resaltado, con caché); el EPUB, la edición HTML de una página y el PDF se
+generan de ese mismo resultado (ver load_book).
+
+ebooklib y markdown se importan dentro de las funciones que los usan: con
+--if-changed la comprobación de huellas termina sin cargarlos si no hay nada
+que reconstruir.
+
+Uso:
+    python3 app/scripts/book_builder.py                 # todos los libros
+    python3 app/scripts/book_builder.py libro ai-sdk    # solo algunos
+    python3 app/scripts/book_builder.py --list          # libros disponibles
+    python3 app/scripts/book_builder.py --no-cache      # sin caché de capítulos
+    python3 app/scripts/book_builder.py --cache-dir DIR # caché en otro directorio (CI)
+    python3 app/scripts/book_builder.py --jobs 4        # convertir capítulos en paralelo
+    python3 app/scripts/book_builder.py libro --stdout  # EPUB a stdout, sin tocar disco
+    python3 app/scripts/book_builder.py --if-changed    # solo libros con entradas nuevas
+    python3 app/scripts/book_builder.py libro --edition muestra --edition each  # muestra y capítulos sueltos
+    python3 app/scripts/book_builder.py libro --format epub --format pdf  # EPUB y PDF de una sola conversión
+    python3 app/scripts/book_builder.py --stream        # escribir capítulo a capítulo
+    python3 app/scripts/book_builder.py --compression max  # EPUB más pequeño para publicar
+    python3 app/scripts/book_builder.py libro --watch   # reconstruir al guardar un capítulo
+    python3 app/scripts/book_builder.py --events -      # eventos JSON lines en stdout
+"""
+
+import io
+import os
+import sys
+import json
+import atexit
+import argparse
+import tempfile
+import time
+from collections import deque
+from contextlib import nullcontext, redirect_stdout
+from pathlib import Path
+from string import Template
+
+import build_events
+import build_fingerprint
+import code_highlight
+import editions
+import file_watcher
+from build_events import phase
+from chapter_cache import ChapterCache, default_cache, make_key
+from image_assets import IMAGE_MAX_WIDTH, BookImages, find_image_refs, optimize_cover, resolve_image
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parent.parent
+BOOKS_DIR = SCRIPTS_DIR / "books"
+PUBLIC_DIR = ROOT_DIR / "public"
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'nl2br']
+
+# Incrementar cuando cambie la forma de convertir capítulos para invalidar la caché
+CONVERTER_VERSION = "1"
+
+# Código y paquetes que afectan el resultado, para la huella de --if-changed
+ENGINE_MODULES = ["book_builder.py", "epub_packager.py", "image_assets.py", "code_highlight.py",
+                  "editions.py", "html_edition.py", "pdf_edition.py"]
+ENGINE_TOOLS = ["ebooklib", "markdown", "lxml", "PIL", "pygments", "reportlab"]
+
+# Salidas que se generan de la misma conversión de capítulos (ver load_book)
+FORMATS = ("epub", "html", "pdf")
+
+# Por debajo de este tamaño total de markdown el arranque del pool cuesta más
+# de lo que ahorra y se convierte en serie aunque se pidan varios jobs
+PARALLEL_MIN_BYTES = 256 * 1024
+
+# CSS base compartido; cada manifiesto define sus colores en "theme"
+BASE_CSS = Template('''
+@namespace epub "http://www.idpf.org/2007/ops";
+body {
+    font-family: Georgia, serif;
+    line-height: 1.6;
+    margin: 1em;
+}
+h1, h2, h3, h4, h5, h6 {
+    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+    margin-top: 1.5em;
+    margin-bottom: 0.5em;
+    color: #333;
+}
+h1 {
+    font-size: 2em;
+    border-bottom: 2px solid $accent;
+    padding-bottom: 0.3em;
+}
+h2 {
+    font-size: 1.5em;
+    color: $accent;
+}
+h3 {
+    font-size: 1.3em;
+}
+code {
+    background-color: #f4f4f4;
+    padding: 2px 6px;
+    border-radius: 3px;
+    font-family: "Courier New", monospace;
+    font-size: 0.9em;
+}
+pre {
+    background-color: $pre_background;
+    color: $pre_color;
+    padding: 15px;
+    border-radius: 5px;
+    overflow-x: auto;
+    line-height: 1.4;
+    border: 1px solid $pre_border;
+}
+pre code {
+    background-color: transparent;
+    padding: 0;
+    display: block;
+    color: inherit;
+}
+blockquote {
+    border-left: 4px solid $accent;
+    margin-left: 0;
+    padding-left: 20px;
+    font-style: italic;
+    color: #666;
+}
+a {
+    color: $accent;
+    text-decoration: none;
+}
+a:hover {
+    text-decoration: underline;
+}
+ul, ol {
+    padding-left: 30px;
+}
+li {
+    margin-bottom: 0.5em;
+}
+strong {
+    font-weight: bold;
+}
+em {
+    font-style: italic;
+}
+$extra_css''')
+
+DEFAULT_THEME = {
+    "accent": "#667eea",
+    "pre_background": "#f4f4f4",
+    "pre_color": "inherit",
+    "pre_border": "#ddd",
+    "extra_css": "",
+}
+
+CHAPTER_TEMPLATE = '''
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+    <title>{title}</title>
+    <link rel="stylesheet" type="text/css" href="style/nav.css"/>
+</head>
+<body>
+    {body}
+</body>
+</html>
+'''
+
+
+def list_books():
+    """Devuelve los ids de todos los libros con manifiesto"""
+    return sorted(path.stem for path in BOOKS_DIR.glob("*.json"))
+
+
+def load_manifest(book_id):
+    """Lee el manifiesto de un libro por su id"""
+    manifest_path = BOOKS_DIR / f"{book_id}.json"
+    if not manifest_path.exists():
+        raise ValueError(f"Libro desconocido: {book_id} (disponibles: {', '.join(list_books())})")
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def resolve_path(relative_path):
+    """Las rutas del manifiesto son relativas a la raíz del repositorio"""
+    return ROOT_DIR / relative_path
+
+
+def build_css(theme):
+    """Genera la hoja de estilos del libro a partir de su tema"""
+    return BASE_CSS.substitute({**DEFAULT_THEME, **(theme or {})})
+
+
+def safe_filename(title):
+    """Convierte el título del capítulo en un nombre de archivo sin caracteres especiales"""
+    safe_title = title
+    for char in ['?', '¿', ':', ',']:
+        safe_title = safe_title.replace(char, '')
+    for char in [' ', '-', '—']:
+        safe_title = safe_title.replace(char, '_')
+    return f"{safe_title}.xhtml"
+
+
+def chapter_cache_key(md_content):
+    """Llave de caché: fuente + extensiones + versiones del conversor"""
+    import markdown
+
+    return make_key(md_content,
+                    ",".join(MARKDOWN_EXTENSIONS),
+                    markdown.__version__,
+                    CONVERTER_VERSION)
+
+
+def render_chapter(md_content, cache=None):
+    """Convierte el markdown de un capítulo a HTML, usando la caché si se indica"""
+    import markdown
+
+    if not cache:
+        return markdown.markdown(md_content, extensions=MARKDOWN_EXTENSIONS)
+
+    key = chapter_cache_key(md_content)
+    html_content = cache.get(key)
+    if html_content is None:
+        html_content = markdown.markdown(md_content, extensions=MARKDOWN_EXTENSIONS)
+        cache.put(key, html_content)
+    return html_content
+
+
+def read_chapters(md_files):
+    """Lee el markdown de cada capítulo; None para los que no existen"""
+    contents = []
+    for md_file in md_files:
+        try:
+            with open(md_file, 'r', encoding='utf-8') as f:
+                contents.append(f.read())
+        except FileNotFoundError:
+            contents.append(None)
+    return contents
+
+
+def convert_chapter(md_content, cache=None, highlight=None):
+    """
+    Convierte un capítulo ya leído. También se ejecuta dentro del pool de
+    procesos, por eso devuelve un dict serializable en lugar de lanzar excepciones.
+
+    highlight: tema de Pygments para resaltar los bloques de código, o None.
+    """
+    code_stats = {"blocks": 0, "cached": 0}
+    if md_content is None:
+        return {"html": None, "error": "missing", "cached": False, "code": code_stats, "seconds": 0.0}
+
+    started = time.perf_counter()
+    stats_before = cache.stats() if cache else None
+    try:
+        html_content = render_chapter(md_content, cache)
+        if highlight:
+            highlight_cache = cache.sibling("highlight", ".html") if cache else None
+            html_content, code_stats = code_highlight.highlight_html(html_content, highlight, highlight_cache)
+    except Exception as e:
+        return {"html": None, "error": str(e), "cached": False, "code": code_stats,
+                "seconds": time.perf_counter() - started}
+
+    cached = bool(cache) and cache.stats()['hits'] > stats_before['hits']
+    return {"html": html_content, "error": None, "cached": cached, "code": code_stats,
+            "seconds": time.perf_counter() - started}
+
+
+_pool = None
+_pool_workers = 0
+
+
+def get_pool(jobs):
+    """Pool de procesos compartido por todos los libros del proceso"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != jobs:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=jobs)
+        _pool_workers = jobs
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
+
+
+atexit.register(shutdown_pool)
+
+
+def resolve_jobs(jobs):
+    """jobs <= 0 significa usar todos los núcleos"""
+    if jobs is None:
+        return 1
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def load_chapters(md_files, cache=None, jobs=1, highlight=None):
+    """
+    Lee y convierte los capítulos, en paralelo si jobs > 1 y el libro es
+    suficientemente grande. Los resultados conservan el orden del manifiesto.
+    """
+    with phase("read") as info:
+        contents = read_chapters(md_files)
+        info["bytes"] = sum(len(content.encode('utf-8')) for content in contents if content)
+
+    jobs = min(resolve_jobs(jobs), len(md_files))
+    if info["bytes"] < PARALLEL_MIN_BYTES:
+        jobs = 1
+
+    with phase("convert", chapters=len(md_files), jobs=jobs) as info:
+        if jobs <= 1:
+            results = [convert_chapter(content, cache, highlight) for content in contents]
+        else:
+            print(f"⚙️  Convirtiendo {len(md_files)} capítulos con {jobs} procesos")
+            results = list(get_pool(jobs).map(convert_chapter, contents, [cache] * len(contents),
+                                              [highlight] * len(contents)))
+
+            # Los workers usan copias de la caché; sumar sus estadísticas aquí
+            if cache:
+                for result in results:
+                    if result['error'] is None:
+                        cache.record(result['cached'])
+        info["cached"] = sum(1 for result in results if result['cached'])
+    return results
+
+
+def iter_chapters(md_files, cache=None, jobs=1, highlight=None):
+    """
+    Como load_chapters, pero entrega los capítulos uno a uno y en orden: cada
+    capítulo se lee y se convierte cuando hace falta, con a lo sumo 2 × jobs
+    en vuelo, y no se retiene después de entregarlo.
+    """
+    jobs = min(resolve_jobs(jobs), len(md_files))
+    if sum(md_file.stat().st_size for md_file in md_files if md_file.exists()) < PARALLEL_MIN_BYTES:
+        jobs = 1
+
+    if jobs <= 1:
+        for md_file in md_files:
+            yield convert_chapter(read_chapters([md_file])[0], cache, highlight)
+        return
+
+    print(f"⚙️  Convirtiendo {len(md_files)} capítulos con {jobs} procesos")
+    pool = get_pool(jobs)
+    pending = deque()
+
+    def next_result():
+        result = pending.popleft().result()
+        # Los workers usan copias de la caché; sumar sus estadísticas aquí
+        if cache and result['error'] is None:
+            cache.record(result['cached'])
+        return result
+
+    for md_file in md_files:
+        pending.append(pool.submit(convert_chapter, read_chapters([md_file])[0], cache, highlight))
+        if len(pending) >= 2 * jobs:
+            yield next_result()
+    while pending:
+        yield next_result()
+
+
+def highlight_style(manifest):
+    """Tema de Pygments del manifiesto ("highlight": {"style": ...}), o None"""
+    highlight = (manifest.get('highlight') or {}).get('style')
+    if highlight and code_highlight.pygments_version() is None:
+        build_events.warning("Pygments no está instalado: los bloques de código irán sin resaltar")
+        return None
+    return highlight
+
+
+def start_book(manifest, image_cache=None, highlight=None):
+    """
+    EpubBook con metadatos, portada y hojas de estilo, todavía sin capítulos.
+    Devuelve (book, estilos para enlazar en cada capítulo, spine inicial).
+    """
+    from ebooklib import epub
+
+    metadata = manifest['metadata']
+
+    # Crear el libro
+    book = epub.EpubBook()
+
+    # Metadatos
+    book.set_identifier(metadata['identifier'])
+    book.set_title(metadata['title'])
+    book.set_language(metadata.get('language', 'es'))
+    book.add_author(metadata['author'])
+    book.add_metadata('DC', 'publisher', metadata['publisher'])
+    book.add_metadata('DC', 'creator', metadata['author'])
+    book.add_metadata('DC', 'source', metadata['source'])
+    book.add_metadata('DC', 'description', metadata['description'])
+
+    # Portada opcional (set_cover crea cover.xhtml automáticamente)
+    cover_page = None
+    cover = book_cover(manifest, image_cache)
+    if cover:
+        cover_data, cover_extension = cover
+        book.set_cover(f"cover{cover_extension}", cover_data)
+        cover_page = book.get_item_with_id('cover')
+
+    # Añadir CSS
+    nav_css = epub.EpubItem(uid="style_nav",
+                            file_name="style/nav.css",
+                            media_type="text/css",
+                            content=build_css(manifest.get('theme')))
+    book.add_item(nav_css)
+    styles = [nav_css]
+
+    # Si hay portada va primero en el spine
+    spine = [cover_page, 'nav'] if cover_page else ['nav']
+
+    if highlight:
+        highlight_css = epub.EpubItem(uid="style_highlight",
+                                      file_name="style/highlight.css",
+                                      media_type="text/css",
+                                      content=code_highlight.stylesheet(highlight))
+        book.add_item(highlight_css)
+        styles.append(highlight_css)
+
+    return book, styles, spine
+
+
+def book_cover(manifest, image_cache=None):
+    """(bytes, extensión) de la portada optimizada, o None si el libro no tiene"""
+    if not manifest.get('cover'):
+        return None
+    cover_path = resolve_path(manifest['cover'])
+    if not cover_path.exists():
+        build_events.warning(f"Portada no encontrada en: {cover_path}")
+        return None
+    print(f"📖 Agregando portada: {cover_path}")
+    with phase("cover"):
+        return optimize_cover(cover_path, image_cache)
+
+
+def converted_chapters(manifest, md_files, results, code_stats):
+    """
+    (capítulo del manifiesto, ruta del markdown, resultado) de cada capítulo
+    convertido, en el orden del manifiesto. Los faltantes o con error se
+    reportan y se omiten; code_stats acumula los bloques resaltados.
+    """
+    for chapter_info, md_file, result in zip(manifest['chapters'], md_files, results):
+        if result['error'] == "missing":
+            build_events.warning(f"Archivo no encontrado: {md_file}", chapter=chapter_info['slug'])
+            continue
+        if result['error']:
+            build_events.error(f"Error procesando {chapter_info['slug']}: {result['error']}",
+                               chapter=chapter_info['slug'])
+            continue
+
+        build_events.chapter(chapter_info['slug'], chapter_info['title'],
+                             bytes=len(result['html'].encode('utf-8')),
+                             seconds=round(result['seconds'], 6),
+                             cached=result['cached'],
+                             code_blocks=result['code']['blocks'])
+        code_stats['blocks'] += result['code']['blocks']
+        code_stats['cached'] += result['code']['cached']
+        yield chapter_info, md_file, result
+
+
+def chapter_items(manifest, chapters, images, styles):
+    """Genera un EpubHtml por cada capítulo de converted_chapters"""
+    from ebooklib import epub
+
+    language = manifest['metadata'].get('language', 'es')
+    for chapter_info, md_file, result in chapters:
+        try:
+            html_content = images.rewrite(result['html'], md_file.parent)
+
+            # Crear capítulo EPUB con ID único para navegación
+            chapter = epub.EpubHtml(title=chapter_info['title'],
+                                    file_name=safe_filename(chapter_info['title']),
+                                    lang=language,
+                                    uid=f"chapter_{chapter_info['id']}")
+
+            # NOTA: No añadimos <h1> aquí porque el markdown ya lo contiene
+            chapter.content = CHAPTER_TEMPLATE.format(title=chapter_info['title'],
+                                                      body=html_content)
+            for style in styles:
+                chapter.add_item(style)
+
+        except Exception as e:
+            build_events.error(f"Error procesando {chapter_info['slug']}: {e}", chapter=chapter_info['slug'])
+            continue
+
+        yield chapter
+
+
+def image_items(images):
+    """EpubImage por cada imagen aún no entregada, nombrada por hash de contenido"""
+    from ebooklib import epub
+
+    for file_name, data in images.drain():
+        yield epub.EpubImage(uid=f"img_{Path(file_name).stem}", file_name=file_name, content=data)
+
+
+def report_images(images):
+    if images.references:
+        print(f"🖼️  Imágenes: {len(images.items)} embebidas para {images.references} referencias")
+    for src in images.missing:
+        build_events.warning(f"Imagen no encontrada: {src}")
+
+
+def finish_book(book, toc_entries, spine, highlight, code_stats, images):
+    """Reporta resaltado e imágenes y agrega la tabla de contenidos y la navegación"""
+    from ebooklib import epub
+
+    if highlight:
+        print(f"🎨 Resaltado ({highlight}): {code_stats['blocks']} bloques, "
+              f"{code_stats['cached']} desde caché")
+    report_images(images)
+
+    # Tabla de contenidos explícita con títulos correctos
+    book.toc = toc_entries
+
+    # Añadir navegación
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+
+    # Definir spine (orden de lectura)
+    book.spine = spine
+
+
+def chapter_files(manifest):
+    content_dir = resolve_path(manifest['content_dir'])
+    return [content_dir / f"{chapter_info['slug']}.md" for chapter_info in manifest['chapters']]
+
+
+def book_date(manifest):
+    """
+    dcterms:modified del libro o la edición: la del último commit de sus
+    capítulos, su portada o su manifiesto (ver epub_packager.build_date)
+    """
+    from epub_packager import build_date
+
+    sources = [path for path in chapter_files(manifest) if path.exists()]
+    if manifest.get('cover') and resolve_path(manifest['cover']).exists():
+        sources.append(resolve_path(manifest['cover']))
+    if (BOOKS_DIR / f"{manifest['id']}.json").exists():
+        sources.append(BOOKS_DIR / f"{manifest['id']}.json")
+    return build_date(manifest['metadata'], sources)
+
+
+def book_images(manifest, image_cache):
+    """Imágenes de los capítulos, resueltas junto al markdown o desde public/"""
+    return BookImages(PUBLIC_DIR, cache=image_cache,
+                      max_width=manifest.get('images', {}).get('max_width', IMAGE_MAX_WIDTH))
+
+
+def use_cache(cache):
+    """
+    None usa la caché por defecto y False la desactiva. Devuelve la caché o
+    False, nunca None: resolverla otra vez más abajo no reactiva la caché
+    por defecto.
+    """
+    if cache is None:
+        return default_cache()
+    return cache or False
+
+
+def image_cache_for(cache):
+    # Imágenes procesadas: se comparten entre construcciones y entre libros
+    return cache.sibling("images", ".bin", binary=True) if cache else None
+
+
+def report_cache(cache, stats_before):
+    if cache:
+        stats = cache.stats()
+        print(f"   Caché de capítulos: {stats['hits'] - stats_before['hits']} aciertos, "
+              f"{stats['misses'] - stats_before['misses']} conversiones")
+
+
+def load_book(manifest, cache=None, jobs=1):
+    """
+    Convierte todos los capítulos una sola vez. El resultado es lo que
+    comparten el EPUB, la edición HTML y el PDF:
+    {"highlight": tema, "code": estadísticas, "chapters": [(capítulo, markdown, resultado)]}
+    """
+    cache = use_cache(cache)
+    stats_before = cache.stats() if cache else None
+
+    highlight = highlight_style(manifest)
+    md_files = chapter_files(manifest)
+    results = load_chapters(md_files, cache, jobs, highlight)
+    code_stats = {"blocks": 0, "cached": 0}
+    chapters = list(converted_chapters(manifest, md_files, results, code_stats))
+
+    report_cache(cache, stats_before)
+    return {"highlight": highlight, "code": code_stats, "chapters": chapters}
+
+
+def assemble_book(manifest, cache=None, jobs=1, loaded=None):
+    """
+    Arma el EpubBook descrito por un manifiesto, sin escribir nada a disco.
+
+    cache: ChapterCache a usar; None usa la caché por defecto y False la desactiva.
+    jobs: procesos para convertir capítulos (1 = en serie, 0 = todos los núcleos).
+    loaded: capítulos ya convertidos con load_book, para no volver a convertirlos.
+    """
+    from ebooklib import epub
+
+    cache = use_cache(cache)
+    if loaded is None:
+        loaded = load_book(manifest, cache, jobs)
+
+    image_cache = image_cache_for(cache)
+    book, styles, spine = start_book(manifest, image_cache, loaded['highlight'])
+
+    images = book_images(manifest, image_cache)
+    toc_entries = []
+    for chapter in chapter_items(manifest, loaded['chapters'], images, styles):
+        book.add_item(chapter)
+        spine.append(chapter)
+        toc_entries.append(epub.Link(chapter.file_name, chapter.title, chapter.id))
+
+    # Cada imagen distinta una sola vez
+    for image in image_items(images):
+        book.add_item(image)
+    finish_book(book, toc_entries, spine, loaded['highlight'], loaded['code'], images)
+    return book
+
+
+def stream_book(manifest, output, cache=None, jobs=1, compression=None, loaded=None):
+    """
+    Genera el EPUB escribiéndolo en output (ruta o archivo binario) conforme
+    avanza: cada capítulo se convierte, se escribe en el ZIP y se libera; del
+    libro solo quedan los metadatos para el OPF y la navegación. La memoria
+    pico no depende del número de capítulos. Devuelve los bytes escritos de
+    capítulos e imágenes.
+
+    Con loaded (ver load_book) los capítulos ya están convertidos y solo se
+    escriben; la memoria deja de estar acotada, pero no se convierte de nuevo.
+    """
+    from ebooklib import epub
+    from epub_packager import StreamingEpubWriter, writer_options
+
+    cache = use_cache(cache)
+    stats_before = cache.stats() if cache else None
+
+    image_cache = image_cache_for(cache)
+    highlight = loaded['highlight'] if loaded else highlight_style(manifest)
+    book, styles, spine = start_book(manifest, image_cache, highlight)
+
+    writer = StreamingEpubWriter(output, book,
+                                 writer_options(book_date(manifest), compression))
+    writer.open()
+
+    md_files = chapter_files(manifest)
+    images = book_images(manifest, image_cache)
+    if loaded:
+        code_stats, chapters = loaded['code'], loaded['chapters']
+    else:
+        code_stats = {"blocks": 0, "cached": 0}
+        chapters = converted_chapters(manifest, md_files, iter_chapters(md_files, cache, jobs, highlight),
+                                      code_stats)
+    toc_entries = []
+    with phase("stream", chapters=len(md_files)) as info:
+        written = 0
+        for chapter in chapter_items(manifest, chapters, images, styles):
+            toc_entries.append(epub.Link(chapter.file_name, chapter.title, chapter.id))
+            spine.append(chapter)
+            written += writer.add(chapter)
+            # Las imágenes nuevas de este capítulo también salen de inmediato
+            for image in image_items(images):
+                written += writer.add(image)
+        info["bytes"] = written
+
+    with phase("package"):
+        finish_book(book, toc_entries, spine, highlight, code_stats, images)
+        writer.close()
+
+    if not loaded:
+        report_cache(cache, stats_before)
+    return written
+
+
+def package_book(book, modified=None, compression=None):
+    """
+    Empaqueta un EpubBook en memoria y devuelve los bytes del EPUB. El empaquetado
+    es reproducible: el mismo contenido produce exactamente los mismos bytes.
+    """
+    from epub_packager import package
+
+    return package(book, modified=modified, compression=compression)
+
+
+def render_book(manifest, cache=None, jobs=1, stream=False, compression=None, loaded=None):
+    """Genera el EPUB de un manifiesto y lo devuelve como bytes, sin tocar disco"""
+    if stream:
+        buffer = io.BytesIO()
+        stream_book(manifest, buffer, cache=cache, jobs=jobs, compression=compression, loaded=loaded)
+        return buffer.getvalue()
+
+    book = assemble_book(manifest, cache=cache, jobs=jobs, loaded=loaded)
+    with phase("package") as info:
+        data = package_book(book, modified=book_date(manifest), compression=compression)
+        info["bytes"] = len(data)
+    return data
+
+
+def render_edition(manifest, output_format, cache=None, jobs=1, loaded=None):
+    """
+    Genera la edición HTML de una página o el PDF de un manifiesto y la
+    devuelve como bytes. Ambas salen del mismo XHTML ya resaltado que el
+    EPUB: con loaded (ver load_book) no se vuelve a convertir ningún capítulo.
+    """
+    cache = use_cache(cache)
+    if loaded is None:
+        loaded = load_book(manifest, cache, jobs)
+
+    image_cache = image_cache_for(cache)
+    images = book_images(manifest, image_cache)
+    highlight = loaded['highlight']
+
+    with phase(f"render_{output_format}", chapters=len(loaded['chapters'])) as info:
+        if output_format == "html":
+            import html_edition
+
+            chapters = [{"title": chapter_info['title'], "slug": chapter_info['slug'],
+                         "html": images.rewrite(result['html'], md_file.parent, inline=True)}
+                        for chapter_info, md_file, result in loaded['chapters']]
+            css = build_css(manifest.get('theme'))
+            if highlight:
+                css += code_highlight.stylesheet(highlight)
+            data = html_edition.render_html(manifest['metadata'], css, chapters).encode('utf-8')
+        elif output_format == "pdf":
+            import pdf_edition
+
+            chapters = [{"title": chapter_info['title'], "slug": chapter_info['slug'],
+                         "html": result['html'], "base_dir": md_file.parent}
+                        for chapter_info, md_file, result in loaded['chapters']]
+
+            def image_data(src, base_dir):
+                href = images.href(src, base_dir)
+                return images.items[href] if href else None
+
+            cover = book_cover(manifest, image_cache)
+            data = pdf_edition.render_pdf(manifest['metadata'], {**DEFAULT_THEME, **manifest.get('theme', {})},
+                                          chapters, image_data, highlight=highlight,
+                                          cover=cover[0] if cover else None)
+        else:
+            raise ValueError(f"Formato desconocido: {output_format} (disponibles: {', '.join(FORMATS)})")
+        info["bytes"] = len(data)
+
+    report_images(images)
+    return data
+
+
+def temp_output(output_path):
+    """Temporal vacío en el mismo directorio que output_path"""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, suffix=".tmp")
+    os.close(fd)
+    return Path(tmp_path)
+
+
+def replace_output(tmp_path, output_path):
+    # mkstemp crea el archivo con 0600; los EPUB en public/ deben ser legibles
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, output_path)
+
+
+def write_output(data, output_path):
+    """
+    Escribe a un temporal en el mismo directorio y lo renombra: quien lea la
+    ruta compartida nunca ve un EPUB a medio escribir.
+    """
+    output_path = Path(output_path)
+    tmp_path = temp_output(output_path)
+    try:
+        tmp_path.write_bytes(data)
+        replace_output(tmp_path, output_path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    return output_path
+
+
+def format_output(manifest, output_format, output_path=None):
+    """Ruta de un formato: la del EPUB (manifiesto u output_path) con su extensión"""
+    output_path = Path(output_path or resolve_path(manifest['output']))
+    if output_format == "epub":
+        return output_path
+    return output_path.with_suffix(f".{output_format}")
+
+
+def book_fingerprint(manifest, stream=False, compression=None, output_format="epub"):
+    """
+    Huella de todo lo que determina la salida: manifiesto, capítulos, sus
+    imágenes, portada, código del motor (CSS y plantillas viven aquí),
+    versiones de herramientas, el formato y, en el PDF, las fuentes.
+    """
+    content_dir = resolve_path(manifest['content_dir'])
+    inputs = {f"chapter:{chapter['slug']}": content_dir / f"{chapter['slug']}.md"
+              for chapter in manifest['chapters']}
+    for md_file in list(inputs.values()):
+        try:
+            md_content = md_file.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            continue
+        for src in find_image_refs(md_content):
+            image_path = resolve_image(src, md_file.parent, PUBLIC_DIR)
+            if image_path:
+                inputs[f"image:{os.path.relpath(image_path, ROOT_DIR)}"] = image_path
+    if manifest.get('cover'):
+        inputs["cover"] = resolve_path(manifest['cover'])
+    for module in ENGINE_MODULES:
+        inputs[f"engine:{module}"] = SCRIPTS_DIR / module
+    if output_format == "pdf":
+        import pdf_fonts
+        inputs["engine:pdf_fonts.py"] = Path(pdf_fonts.__file__)
+        for name, path in pdf_fonts.font_files().items():
+            inputs[f"font:{name}"] = path
+
+    return build_fingerprint.compute(inputs, extra={"manifest": manifest, "converter": CONVERTER_VERSION,
+                                                               "stream": stream, "compression": compression or "default",
+                                                               "format": output_format},
+                                     tools=ENGINE_TOOLS)
+
+
+def is_up_to_date(manifest, stream=False, compression=None, fingerprint=None):
+    """
+    True si el EPUB del manifiesto ya se generó con las entradas actuales.
+    fingerprint evita recalcular la huella si ya se tiene (ver build_book).
+    """
+    if fingerprint is None:
+        fingerprint = book_fingerprint(manifest, stream=stream, compression=compression)
+    return build_fingerprint.is_up_to_date(resolve_path(manifest['output']), fingerprint)
+
+
+def skip_unchanged(output_path, fingerprint, label):
+    """True (y lo reporta) si output_path ya se generó con esta huella"""
+    if not build_fingerprint.is_up_to_date(output_path, fingerprint):
+        return False
+    print(f"✅ {label} sin cambios en sus entradas: {output_path}")
+    recorded = build_fingerprint.read(output_path)
+    build_events.artifact(output_path, output_path.stat().st_size, recorded.get("artifact_sha256"),
+                          skipped=True)
+    return True
+
+
+def save_artifact(data, output_path, fingerprint, label):
+    """
+    Escribe data en output_path y guarda su huella. Si el archivo existente es
+    idéntico no se reescribe: su mtime no cambia.
+    """
+    size, digest = len(data), build_fingerprint.artifact_hash(data)
+    unchanged = output_path.exists() and build_fingerprint.artifact_hash(output_path.read_bytes()) == digest
+    if not unchanged:
+        with phase("write", bytes=size):
+            write_output(data, output_path)
+    report_artifact(output_path, fingerprint, label, size, digest, unchanged)
+
+
+def report_artifact(output_path, fingerprint, label, size, digest, unchanged):
+    if unchanged:
+        print(f"\n✅ {label} sin cambios: {output_path}")
+    else:
+        print(f"\n✅ {label} generado exitosamente: {output_path}")
+    print(f"   Tamaño: {size / 1024:.2f} KB")
+    print(f"   SHA-256: {digest}")
+    build_events.artifact(output_path, size, digest)
+
+    build_fingerprint.record(output_path, fingerprint, artifact_sha256=digest)
+
+
+def build_book(manifest, cache=None, jobs=1, output_path=None, if_changed=False, stream=False,
+               compression=None, loaded=None, fingerprint=None):
+    """
+    Genera el EPUB descrito por un manifiesto, lo escribe en output_path (por
+    defecto la salida del manifiesto) y devuelve la ruta. Junto al EPUB se
+    guarda la huella de entradas; con if_changed, si coincide, no se construye.
+    Con stream el EPUB se escribe capítulo a capítulo (ver stream_book);
+    compression es un perfil de epub_packager.COMPRESSION_PROFILES;
+    fingerprint, la huella de book_fingerprint si quien llama ya la calculó.
+    """
+    output_path = format_output(manifest, "epub", output_path)
+    if fingerprint is None:
+        with phase("fingerprint"):
+            fingerprint = book_fingerprint(manifest, stream=stream, compression=compression)
+
+    if if_changed and skip_unchanged(output_path, fingerprint, "EPUB"):
+        return str(output_path)
+
+    if not stream:
+        data = render_book(manifest, cache=cache, jobs=jobs, compression=compression, loaded=loaded)
+        save_artifact(data, output_path, fingerprint, "EPUB")
+        return str(output_path)
+
+    tmp_path = temp_output(output_path)
+    try:
+        stream_book(manifest, tmp_path, cache=cache, jobs=jobs, compression=compression, loaded=loaded)
+        size, digest = tmp_path.stat().st_size, build_fingerprint.file_hash(tmp_path)
+        unchanged = output_path.exists() and build_fingerprint.file_hash(output_path) == digest
+        if not unchanged:
+            replace_output(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    report_artifact(output_path, fingerprint, "EPUB", size, digest, unchanged)
+    return str(output_path)
+
+
+def build_formats(manifest, formats=("epub",), cache=None, jobs=1, output_path=None, if_changed=False,
+                  stream=False, compression=None):
+    """
+    Genera las salidas pedidas de un manifiesto ("epub", "html", "pdf") y
+    devuelve {formato: ruta}. Los capítulos se parsean una sola vez y todas
+    las salidas se generan del mismo documento intermedio; con if_changed solo
+    se reconstruyen los formatos cuya huella cambió.
+    """
+    if list(formats) == ["epub"]:
+        return {"epub": build_book(manifest, cache=cache, jobs=jobs, output_path=output_path,
+                                   if_changed=if_changed, stream=stream, compression=compression)}
+
+    paths = {}
+    pending = {}
+    with phase("fingerprint", formats=len(formats)):
+        for output_format in formats:
+            path = format_output(manifest, output_format, output_path)
+            if output_format == "epub":
+                fingerprint = book_fingerprint(manifest, stream=stream, compression=compression)
+            else:
+                fingerprint = book_fingerprint(manifest, output_format=output_format)
+            if if_changed and skip_unchanged(path, fingerprint, output_format.upper()):
+                paths[output_format] = str(path)
+            else:
+                pending[output_format] = (path, fingerprint)
+    if not pending:
+        return paths
+
+    cache = use_cache(cache)
+    loaded = load_book(manifest, cache, jobs)
+    for output_format, (path, fingerprint) in pending.items():
+        if output_format == "epub":
+            paths["epub"] = build_book(manifest, cache=cache, output_path=path, stream=stream,
+                                       compression=compression, loaded=loaded)
+            continue
+        data = render_edition(manifest, output_format, cache=cache, loaded=loaded)
+        save_artifact(data, path, fingerprint, output_format.upper())
+        paths[output_format] = str(path)
+    return paths
+
+
+def search_fingerprint(manifest, md_files):
+    """Huella del índice de búsqueda: capítulos, su conversión y el código del índice"""
+    inputs = {f"chapter:{slug}": md_file for slug, md_file in md_files.items()}
+    for module in ("book_builder.py", "search_index.py"):
+        inputs[f"engine:{module}"] = SCRIPTS_DIR / module
+    chapters = [[chapter_info['slug'], chapter_info['title']] for chapter_info in manifest['chapters']]
+    return build_fingerprint.compute(inputs, extra={"book": manifest['id'], "search": manifest['search'],
+                                                    "chapters": chapters, "converter": CONVERTER_VERSION},
+                                     tools=["markdown"])
+
+
+def update_search_index(manifest, cache=None, jobs=1, if_changed=False):
+    """
+    Actualiza el índice de búsqueda del libro ("search" en el manifiesto, ver
+    search_index.py). Solo se convierten, desde la caché, los capítulos cuyo
+    markdown cambió; si ninguno cambió los archivos no se reescriben. Con
+    if_changed, si la huella coincide, ni siquiera se lee el índice.
+    """
+    index_path = resolve_path(manifest['search']['output'])
+    text_path = index_path.with_suffix(".text.json")
+    md_files = {chapter_info['slug']: md_file
+                for chapter_info, md_file in zip(manifest['chapters'], chapter_files(manifest))}
+
+    with phase("fingerprint"):
+        fingerprint = search_fingerprint(manifest, md_files)
+    if if_changed and text_path.exists() and skip_unchanged(index_path, fingerprint, "Índice de búsqueda"):
+        return str(index_path)
+
+    import search_index
+
+    with phase("search") as info:
+        index, texts = search_index.load_index(index_path, text_path, manifest['id'],
+                                               manifest['search'].get('url'))
+        chapters = [(chapter_info['slug'], chapter_info['title'], content)
+                    for chapter_info, content in zip(manifest['chapters'], read_chapters(md_files.values()))
+                    if content is not None]
+
+        def chapter_html(positions):
+            # El texto no depende del resaltado: se usa el HTML base de la caché
+            results = load_chapters([md_files[chapters[position][0]] for position in positions],
+                                    use_cache(cache), jobs)
+            return {position: result['html'] for position, result in zip(positions, results)}
+
+        stats = search_index.update(index, texts, chapters, chapter_html)
+        info.update(stats, terms=len(index['terms']))
+
+        for path, data in ((text_path, search_index.dumps(texts).encode('utf-8')),
+                           (index_path, search_index.dumps(index).encode('utf-8'))):
+            digest = build_fingerprint.artifact_hash(data)
+            if not (path.exists() and build_fingerprint.artifact_hash(path.read_bytes()) == digest):
+                write_output(data, path)
+            build_events.artifact(path, len(data), digest)
+        build_fingerprint.record(index_path, fingerprint, artifact_sha256=digest)
+
+    print(f"🔎 Índice de búsqueda: {stats['changed']} capítulos indexados, {stats['unchanged']} sin cambios, "
+          f"{len(index['terms'])} términos → {index_path}")
+    return str(index_path)
+
+
+def event_fields(book_id, manifest):
+    """Contexto de los eventos de un libro o de una de sus ediciones"""
+    if manifest.get('edition'):
+        return {"book": book_id, "edition": manifest['edition']}
+    return {"book": book_id}
+
+
+def book_manifests(book_id, edition_specs=None):
+    """Manifiesto completo del libro o, si se piden ediciones, el de cada edición"""
+    manifest = load_manifest(book_id)
+    if not edition_specs:
+        return [manifest]
+    return [edition for spec in edition_specs for edition in editions.resolve(manifest, spec)]
+
+
+def build_books(book_ids=None, cache=None, jobs=1, if_changed=False, stream=False, compression=None,
+                edition_specs=None, formats=("epub",)):
+    """
+    Construye varios libros en el mismo proceso; devuelve {id: ruta} de los
+    exitosos. Con if_changed se omiten los libros cuya huella no cambió.
+    Con edition_specs se construyen esas ediciones (ver editions.py) en lugar
+    del libro completo; su id es "<libro>:<edición>".
+    Con formats se generan además la edición HTML y el PDF; su id lleva el
+    formato ("<libro>.pdf") y el del EPUB queda igual. Los libros con
+    "search" actualizan también su índice de búsqueda ("<libro>.search").
+    """
+    results = {}
+    errors = {}
+    if cache is None:
+        cache = default_cache()
+
+    for book_id in book_ids or list_books():
+        print(f"\n📚 Construyendo libro: {book_id}")
+        with build_events.context(book=book_id):
+            try:
+                manifests = book_manifests(book_id, edition_specs)
+            except Exception as e:
+                build_events.error(f"Error generando {book_id}: {e}")
+                errors[book_id] = str(e)
+                continue
+
+        for manifest in manifests:
+            result_id = book_id
+            if manifest.get('edition'):
+                result_id = f"{book_id}:{manifest['edition']}"
+                print(f"\n📗 Edición: {manifest['metadata']['title']}")
+            with build_events.context(**event_fields(book_id, manifest)):
+                try:
+                    paths = build_formats(manifest, formats, cache=cache, jobs=jobs, if_changed=if_changed,
+                                          stream=stream, compression=compression)
+                    for output_format, path in paths.items():
+                        results[result_id if output_format == "epub" else f"{result_id}.{output_format}"] = path
+                    if manifest.get('search') and not manifest.get('edition'):
+                        results[f"{result_id}.search"] = update_search_index(
+                            manifest, cache=cache, jobs=jobs, if_changed=if_changed)
+                except Exception as e:
+                    build_events.error(f"Error generando {result_id}: {e}")
+                    errors[result_id] = str(e)
+
+    return results, errors
+
+
+def books_for_changes(changed, book_ids):
+    """Libros afectados por los archivos que cambiaron: su manifiesto o su contenido"""
+    affected = []
+    for book_id in book_ids:
+        paths = [BOOKS_DIR / f"{book_id}.json"]
+        try:
+            paths.append(resolve_path(load_manifest(book_id)['content_dir']))
+        except ValueError:
+            # Manifiesto a medio editar: la reconstrucción reporta el error
+            affected.append(book_id)
+            continue
+        if any(path == watched or watched in path.parents for path in changed for watched in paths):
+            affected.append(book_id)
+    return affected
+
+
+def watch_books(book_ids=None, cache=None, jobs=1, polling=False, **options):
+    """
+    Construye los libros y se queda observando sus manifiestos y directorios
+    de contenido. Cada cambio reconstruye solo los libros afectados dentro
+    del mismo proceso: las bibliotecas ya están importadas y los capítulos
+    que no cambiaron salen de la caché, así que solo se convierte lo editado.
+    options son los de build_books (formats, compression...).
+    """
+    book_ids = book_ids or list_books()
+    build_books(book_ids, cache=cache, jobs=jobs, **options)
+
+    directories = {BOOKS_DIR} | {resolve_path(load_manifest(book_id)['content_dir']) for book_id in book_ids}
+    watcher = file_watcher.open_watcher(sorted(directories), polling=polling)
+    method = "inotify" if isinstance(watcher, file_watcher.InotifyWatcher) else "sondeo"
+    print(f"\n👀 Observando {len(directories)} directorios ({method}); Ctrl+C para terminar")
+
+    try:
+        while True:
+            changed = watcher.wait()
+            affected = books_for_changes(changed, book_ids)
+            if not affected:
+                continue
+            print(f"\n✏️  Cambios: {', '.join(sorted(path.name for path in changed))}")
+            started = time.perf_counter()
+            with phase("rebuild", books=len(affected)):
+                build_books(affected, cache=cache, jobs=jobs, **options)
+            print(f"⚡ Reconstruido en {(time.perf_counter() - started) * 1000:.0f} ms: {', '.join(affected)}")
+    except KeyboardInterrupt:
+        print("\n👋 Observación terminada")
+    finally:
+        watcher.close()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Construye los libros EPUB a partir de sus manifiestos")
+    parser.add_argument("books", nargs="*", help="ids de libros a construir (por defecto todos)")
+    parser.add_argument("--list", action="store_true", help="mostrar los libros disponibles")
+    parser.add_argument("--no-cache", action="store_true", help="convertir todos los capítulos sin caché")
+    parser.add_argument("--cache-dir", help="directorio de la caché de capítulos")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="procesos para convertir capítulos (0 = todos los núcleos)")
+    parser.add_argument("--stdout", action="store_true",
+                        help="escribir el EPUB (o el único --format) de un solo libro a stdout")
+    parser.add_argument("--output", "-o", help="ruta de salida para un solo libro")
+    parser.add_argument("--if-changed", action="store_true",
+                        help="omitir libros cuya huella de entradas no cambió")
+    parser.add_argument("--edition", action="append", metavar="SPEC",
+                        help="construir una edición derivada en lugar del libro completo: "
+                             "N, A-B, slug, each o una edición del manifiesto (repetible)")
+    parser.add_argument("--format", action="append", choices=FORMATS, dest="formats",
+                        help="salida a generar: epub (por defecto), html de una página o pdf (repetible)")
+    parser.add_argument("--stream", action="store_true",
+                        help="escribir cada capítulo al EPUB en cuanto se convierte (memoria acotada)")
+    parser.add_argument("--compression", choices=["fast", "default", "max"],
+                        help="perfil de compresión del EPUB: fast para previsualizar, max para publicar")
+    parser.add_argument("--watch", action="store_true",
+                        help="quedarse observando los capítulos y reconstruir al guardar (compresión fast por defecto)")
+    parser.add_argument("--poll", action="store_true",
+                        help="con --watch, revisar por sondeo en lugar de inotify (discos de red, volúmenes de Docker)")
+    parser.add_argument("--events", metavar="RUTA",
+                        help="eventos JSON lines por fase y resumen final ('-' = stdout, el progreso va a stderr)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    # pdf_fonts.py (edición PDF) vive en la raíz junto a los generadores de temarios
+    sys.path.insert(0, str(ROOT_DIR))
+
+    if args.events and args.stdout:
+        print("Error: --events no se puede combinar con --stdout", file=sys.stderr)
+        return 2
+    if args.events:
+        events_stream = build_events.open_stream(args.events)
+        # Con eventos en stdout el progreso legible va a stderr
+        progress = redirect_stdout(sys.stderr) if events_stream is sys.stdout else nullcontext()
+        try:
+            with progress, build_events.run(events_stream, command="book_builder") as outcome:
+                status = run_command(args)
+                outcome["ok"] = status == 0
+        finally:
+            if events_stream is not sys.stdout:
+                events_stream.close()
+        return status
+    return run_command(args)
+
+
+def run_command(args):
+    if args.list:
+        for book_id in list_books():
+            print(book_id)
+        return 0
+
+    if args.no_cache:
+        cache = False
+    elif args.cache_dir:
+        cache = ChapterCache(args.cache_dir, max_bytes=default_cache().max_bytes)
+    else:
+        cache = default_cache()
+
+    formats = list(dict.fromkeys(args.formats or ["epub"]))
+
+    if args.watch and (args.stdout or args.output):
+        print("Error: --watch no se puede combinar con --stdout ni --output", file=sys.stderr)
+        return 2
+
+    if args.watch:
+        watch_books(args.books, cache=cache, jobs=args.jobs, polling=args.poll, stream=args.stream,
+                    compression=args.compression or "fast", edition_specs=args.edition, formats=formats)
+        return 0
+
+    if args.stdout or args.output:
+        if len(args.books) != 1:
+            print("Error: --stdout y --output requieren exactamente un libro", file=sys.stderr)
+            return 2
+        try:
+            manifest = load_manifest(args.books[0])
+            if args.edition:
+                if len(args.edition) != 1:
+                    raise ValueError("--stdout y --output admiten una sola edición")
+                manifest = editions.resolve_one(manifest, args.edition[0])
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+
+        if args.output:
+            with build_events.context(**event_fields(args.books[0], manifest)):
+                build_formats(manifest, formats, cache=cache, jobs=args.jobs,
+                              output_path=Path(args.output).resolve(), stream=args.stream,
+                              compression=args.compression)
+            return 0
+
+        if formats != ["epub"]:
+            if len(formats) != 1:
+                print("Error: --stdout admite un solo --format", file=sys.stderr)
+                return 2
+            with redirect_stdout(sys.stderr):
+                data = render_edition(manifest, formats[0], cache=cache, jobs=args.jobs)
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+            return 0
+
+        # stdout queda reservado para los bytes del EPUB; el progreso va a stderr
+        if args.stream:
+            # zipfile admite destinos sin seek: el EPUB sale mientras se genera
+            output = sys.stdout.buffer
+            with redirect_stdout(sys.stderr):
+                stream_book(manifest, output, cache=cache, jobs=args.jobs, compression=args.compression)
+            output.flush()
+            return 0
+        with redirect_stdout(sys.stderr):
+            data = render_book(manifest, cache=cache, jobs=args.jobs, compression=args.compression)
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+        return 0
+
+    results, errors = build_books(args.books, cache=cache, jobs=args.jobs, if_changed=args.if_changed,
+                                  stream=args.stream, compression=args.compression,
+                                  edition_specs=args.edition, formats=formats)
+
+    print(f"\n📦 Libros generados: {len(results)} / {len(results) + len(errors)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Eventos de construcción legibles por máquina (JSON lines).
+
+Los generadores marcan sus fases con `with phase("convert"):` y reportan
+capítulos, artefactos y avisos con chapter(), artifact() y warning(). Cada
+llamada se entrega a los receptores registrados; sin receptores solo se
+imprime el texto de siempre para quien mira la terminal.
+
+Receptores:
+    listen(callback) llama a callback con cada evento (render worker)
+    recording()      junta los eventos en una lista (benchmark, resumen)
+    jsonl(stream)    escribe un evento por línea en stream
+    run(stream)      jsonl + evento "summary" al terminar
+
+Tipos de evento (todos llevan "type" y "ts", más el contexto activo, p. ej. "book"):
+    {"type": "phase_start", "phase": "convert"}
+    {"type": "phase_end", "phase": "convert", "seconds": 0.64, "chapters": 14}
+    {"type": "chapter", "chapter": "capitulo-01", "title": "...", "bytes": 18231,
+     "seconds": 0.041, "cached": false}
+    {"type": "artifact", "path": "...", "bytes": 94480, "sha256": "..."}
+    {"type": "warning", "message": "..."}
+    {"type": "error", "message": "..."}
+    {"type": "summary", "ok": true, "seconds": 1.2, "phases": {...}, ...}
+"""
+
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Capítulos más lentos que se listan en el resumen
+SLOWEST_CHAPTERS = 5
+
+_sinks = []
+_context = {}
+_lock = threading.Lock()
+
+
+def emit(event_type, **fields):
+    """Entrega un evento a todos los receptores registrados"""
+    if not _sinks:
+        return
+    event = {"type": event_type, "ts": round(time.time(), 3), **_context, **fields}
+    with _lock:
+        for sink in list(_sinks):
+            sink(event)
+
+
+@contextmanager
+def context(**fields):
+    """Campos que se agregan a todos los eventos emitidos dentro del bloque"""
+    global _context
+    previous = _context
+    _context = {**previous, **fields}
+    try:
+        yield
+    finally:
+        _context = previous
+
+
+@contextmanager
+def phase(name, **fields):
+    """
+    Marca una fase. El bloque recibe un dict donde puede agregar datos
+    (bytes, capítulos...) que salen en el evento phase_end.
+    """
+    info = dict(fields)
+    emit("phase_start", phase=name, **fields)
+    started = time.perf_counter()
+    try:
+        yield info
+    finally:
+        emit("phase_end", phase=name, seconds=round(time.perf_counter() - started, 6), **info)
+
+
+def chapter(chapter_id, title, **fields):
+    print(f"✓ Procesado: {title}")
+    emit("chapter", chapter=chapter_id, title=title, **fields)
+
+
+def artifact(path, size, sha256, **fields):
+    emit("artifact", path=str(path), bytes=size, sha256=sha256, **fields)
+
+
+def warning(message, **fields):
+    print(f"⚠️  {message}")
+    emit("warning", message=message, **fields)
+
+
+def error(message, **fields):
+    print(f"✗ {message}")
+    emit("error", message=message, **fields)
+
+
+@contextmanager
+def listen(callback):
+    """Llama a callback(evento) por cada evento emitido dentro del bloque"""
+    with _lock:
+        _sinks.append(callback)
+    try:
+        yield
+    finally:
+        with _lock:
+            _sinks.remove(callback)
+
+
+@contextmanager
+def recording():
+    """Junta los eventos emitidos dentro del bloque"""
+    events = []
+    with listen(events.append):
+        yield events
+
+
+@contextmanager
+def jsonl(stream):
+    """Escribe cada evento como una línea JSON en stream"""
+    def write(event):
+        stream.write(json.dumps(event, ensure_ascii=False) + "\n")
+        stream.flush()
+
+    with listen(write):
+        yield
+
+
+def totals(events):
+    """Segundos acumulados por fase, en orden de primera aparición"""
+    result = {}
+    for event in events:
+        if event["type"] == "phase_end":
+            result[event["phase"]] = round(result.get(event["phase"], 0.0) + event["seconds"], 6)
+    return result
+
+
+def summarize(events, seconds=None):
+    """Registro final de una ejecución a partir de sus eventos"""
+    chapters = [event for event in events if event["type"] == "chapter"]
+    errors = [event["message"] for event in events if event["type"] == "error"]
+    slowest = sorted(chapters, key=lambda event: event.get("seconds", 0.0), reverse=True)[:SLOWEST_CHAPTERS]
+    return {
+        "ok": not errors,
+        "seconds": seconds,
+        "phases": totals(events),
+        "chapters": len(chapters),
+        "cached_chapters": sum(1 for event in chapters if event.get("cached")),
+        "slowest_chapters": [{key: event.get(key) for key in ("book", "chapter", "seconds")}
+                             for event in slowest],
+        "artifacts": [{key: event.get(key) for key in ("book", "path", "bytes", "sha256")}
+                      for event in events if event["type"] == "artifact"],
+        "warnings": [event["message"] for event in events if event["type"] == "warning"],
+        "errors": errors,
+    }
+
+
+@contextmanager
+def run(stream=None, **fields):
+    """
+    Ejecución completa: si hay stream, los eventos salen por ahí como JSON
+    lines y al final se emite "summary". El bloque recibe un dict donde se
+    puede marcar "ok": False; una excepción también cierra con ok = false.
+    """
+    outcome = {}
+    started = time.perf_counter()
+    with recording() as events, (jsonl(stream) if stream else nullcontext()), context(**fields):
+        emit("run_start")
+        try:
+            yield outcome
+        except BaseException as e:
+            error(str(e) or type(e).__name__)
+            raise
+        finally:
+            summary = summarize(events, round(time.perf_counter() - started, 6))
+            summary["ok"] = summary["ok"] and outcome.get("ok", True)
+            emit("summary", **summary)
+
+
+def open_stream(target):
+    """Destino de --events: "-" es stdout, cualquier otra cosa una ruta"""
+    if target == "-":
+        return sys.stdout
+    return open(target, 'w', encoding='utf-8')
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Huella de entradas de una construcción, guardada junto al artefacto.
+
+La huella reúne el hash de cada archivo de entrada (capítulos, portada, HTML
+del temario, código del generador), datos extra como el manifiesto y las
+versiones de las herramientas. Se guarda en <artefacto>.build.json. Si la huella
+actual coincide con la guardada y el artefacto sigue ahí, no hay nada que
+reconstruir.
+
+Este módulo solo usa la biblioteca estándar: la comprobación debe terminar
+antes de importar ebooklib, markdown, reportlab o bs4.
+"""
+
+import sys
+import json
+import hashlib
+from pathlib import Path
+
+FINGERPRINT_SUFFIX = ".build.json"
+
+
+def file_digest(path):
+    """sha256 de un archivo, o None si no existe"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def artifact_hash(data):
+    """sha256 de los bytes de un artefacto, usable como ETag"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """sha256 de un artefacto en disco, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tool_versions(modules):
+    """
+    Identidad de cada paquete instalado sin importarlo: tamaño y mtime del
+    archivo que lo define. importlib.metadata costaría más que toda la
+    comprobación; cualquier actualización del paquete reescribe ese archivo.
+    """
+    import importlib.util
+
+    versions = {"python": ".".join(map(str, sys.version_info[:3]))}
+    for module in modules:
+        spec = importlib.util.find_spec(module)
+        if spec is None or not spec.origin:
+            versions[module] = None
+            continue
+        stat = Path(spec.origin).stat()
+        versions[module] = f"{stat.st_size}:{stat.st_mtime_ns}"
+    return versions
+
+
+def compute(inputs, extra=None, tools=()):
+    """
+    inputs: {nombre: ruta} de archivos que determinan el artefacto.
+    extra: datos serializables a JSON (p. ej. el manifiesto).
+    tools: módulos de terceros cuya versión afecta el resultado.
+    """
+    fingerprint = {
+        "inputs": {name: file_digest(path) for name, path in inputs.items()},
+        "extra": extra,
+        "tools": tool_versions(tools),
+    }
+    canonical = json.dumps(fingerprint, sort_keys=True, ensure_ascii=False)
+    fingerprint["hash"] = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    return fingerprint
+
+
+def sidecar_path(output_path):
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + FINGERPRINT_SUFFIX)
+
+
+def read(output_path):
+    try:
+        with open(sidecar_path(output_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def is_up_to_date(output_path, fingerprint):
+    """El artefacto existe, conserva su tamaño y se generó con las mismas entradas"""
+    output_path = Path(output_path)
+    recorded = read(output_path)
+    if not recorded or not output_path.exists():
+        return False
+    return (recorded.get("hash") == fingerprint["hash"]
+            and recorded.get("artifact_size") == output_path.stat().st_size)
+
+
+def record(output_path, fingerprint, artifact_sha256=None):
+    """Guarda la huella junto al artefacto recién generado"""
+    output_path = Path(output_path)
+    data = {**fingerprint,
+            "artifact_size": output_path.stat().st_size,
+            "artifact_sha256": artifact_sha256}
+    with open(sidecar_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
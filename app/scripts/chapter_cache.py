@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché persistente en disco para el HTML convertido de cada capítulo.
+
+La llave es un hash del markdown fuente junto con todo lo que afecta la
+conversión (extensiones, versión del conversor). Cada entrada es un archivo
+<hash>.xhtml; su mtime marca el último uso y, cuando el directorio supera
+el tamaño máximo, se eliminan primero las entradas menos usadas (LRU).
+
+El directorio se puede guardar entre ejecuciones de CI para arrancar en
+caliente. Otras etapas (imágenes) usan la misma clase con otro namespace
+dentro del mismo directorio base y binary=True.
+"""
+
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+
+DEFAULT_CACHE_DIR = ROOT_DIR / ".cache" / "book-build"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def make_key(*parts):
+    """Hash estable de todas las partes que determinan el resultado"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class ChapterCache:
+    """Caché LRU en disco limitada por tamaño"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, namespace="chapters", suffix=".xhtml",
+                 binary=False):
+        self.base_dir = Path(cache_dir)
+        self.cache_dir = self.base_dir / namespace
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.binary = binary
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def get(self, key):
+        """Devuelve el contenido guardado o None; un acierto renueva su uso"""
+        path = self._path(key)
+        try:
+            if self.binary:
+                with open(path, 'rb') as f:
+                    content = f.read()
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return content
+
+    def put(self, key, content):
+        """Guarda una entrada de forma atómica y aplica la política de expulsión"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = content if self.binary else content.encode('utf-8')
+
+        # Escribir a un temporal y renombrar: nunca se lee una entrada a medias
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        if self._size is not None:
+            self._size += len(data)
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta quedar bajo el límite"""
+        if self._size is not None and self._size <= self.max_bytes:
+            return
+
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+
+        self._size = total
+
+    def clear(self):
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+    def sibling(self, namespace, suffix, binary=False):
+        """Otra caché en el mismo directorio base y con el mismo límite"""
+        return ChapterCache(self.base_dir, max_bytes=self.max_bytes, namespace=namespace,
+                            suffix=suffix, binary=binary)
+
+    def record(self, hit):
+        """Suma a las estadísticas un acceso hecho por otro proceso"""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def default_cache(namespace="chapters", suffix=".xhtml", binary=False):
+    """Caché configurada por entorno: BOOK_CACHE_DIR y BOOK_CACHE_MAX_MB"""
+    cache_dir = os.getenv("BOOK_CACHE_DIR") or DEFAULT_CACHE_DIR
+    max_mb = os.getenv("BOOK_CACHE_MAX_MB")
+    max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+    return ChapterCache(cache_dir, max_bytes=max_bytes, namespace=namespace, suffix=suffix, binary=binary)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resaltado de sintaxis en tiempo de construcción para los bloques de código.
+
+Markdown deja cada bloque con lenguaje como <pre><code class="language-x">.
+Aquí se reemplaza su contenido por spans con clases de Pygments y se genera
+una hoja de estilos compartida para el tema elegido. Todo es offline: no hay
+JavaScript en el EPUB.
+
+Cada bloque se memoriza por (lenguaje, hash del código, tema, versión de
+Pygments): al reconstruir solo se resalta el código que cambió. Los bloques
+sin lenguaje o con un lenguaje que Pygments no conoce se dejan como están.
+
+Pygments es opcional: si no está instalado los bloques salen sin resaltar.
+"""
+
+import re
+import html
+
+from chapter_cache import make_key
+
+# Incrementar si cambia el HTML que se genera por bloque
+HIGHLIGHT_VERSION = "1"
+
+CODE_BLOCK_RE = re.compile(r'<pre><code class="language-([\w+#.-]+)">(.*?)</code></pre>', re.DOTALL)
+
+# Nombres usados en los capítulos que Pygments no reconoce tal cual
+LANGUAGE_ALIASES = {
+    "env": "bash",
+    "jsonc": "json",
+}
+
+
+def pygments_version():
+    try:
+        import pygments
+        return pygments.__version__
+    except ImportError:
+        return None
+
+
+def _formatter(style):
+    from pygments.formatters import HtmlFormatter
+
+    # El fondo lo pone el tema del libro (pre_background), no Pygments
+    return HtmlFormatter(style=style, nowrap=True, nobackground=True)
+
+
+def stylesheet(style):
+    """CSS de los tokens para el tema de Pygments indicado"""
+    from pygments.formatters import HtmlFormatter
+
+    rules = HtmlFormatter(style=style, nobackground=True).get_token_style_defs('.highlight')
+    return "\n".join(rules) + "\n"
+
+
+def highlight_block(language, code, style):
+    """HTML con spans para un bloque, o None si el lenguaje no se conoce"""
+    from pygments import highlight
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+
+    try:
+        lexer = get_lexer_by_name(LANGUAGE_ALIASES.get(language, language), stripnl=False)
+    except ClassNotFound:
+        return None
+    return highlight(code, lexer, _formatter(style))
+
+
+def highlight_html(html_content, style, cache=None):
+    """
+    Resalta los bloques de código de un capítulo ya convertido. Devuelve el
+    HTML y un dict con "blocks" (bloques resaltados) y "cached" (de la caché).
+    """
+    stats = {"blocks": 0, "cached": 0}
+    version = pygments_version()
+    if version is None:
+        return html_content, stats
+
+    def replace(match):
+        language = match.group(1).lower()
+        code = html.unescape(match.group(2))
+        key = make_key(language, code, style, version, HIGHLIGHT_VERSION)
+
+        spans = cache.get(key) if cache else None
+        if spans is not None:
+            stats["cached"] += 1
+        else:
+            spans = highlight_block(language, code, style)
+            if spans is None:
+                return match.group(0)
+            if cache:
+                cache.put(key, spans)
+
+        stats["blocks"] += 1
+        return f'<pre class="highlight"><code class="language-{language}">{spans}</code></pre>'
+
+    return CODE_BLOCK_RE.sub(replace, html_content), stats
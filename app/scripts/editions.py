@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ediciones derivadas de un libro: un capítulo suelto, un rango o una muestra.
+
+Una edición es un manifiesto derivado con un subconjunto de capítulos y su
+propio identificador, título y ruta de salida. Se construye con el mismo
+motor, así que el HTML de los capítulos, el resaltado y las imágenes salen de
+las cachés que llenó la construcción completa: no se convierte nada de nuevo
+y producir muchas variantes en una corrida cuesta poco más que empaquetarlas.
+
+Especificaciones (book_builder.py --edition, campo "edition" del worker):
+    3             el capítulo 3 (numerados desde 1 en el orden del manifiesto)
+    2-5           los capítulos 2 a 5
+    introduccion  el capítulo con ese slug o id
+    each          un EPUB por capítulo
+    muestra       una edición declarada en "editions" del manifiesto
+
+En el manifiesto:
+    "editions": {"muestra": {"chapters": "1-3", "label": "Muestra gratuita"}}
+
+"chapters" acepta la misma sintaxis (o una lista de especificaciones).
+"""
+
+import re
+from pathlib import PurePosixPath
+
+RANGE_RE = re.compile(r'^(\d+)-(\d+)$')
+
+# Claves del manifiesto completo que no pasan a las ediciones
+FULL_EDITION_KEYS = ("editions", "publish", "search")
+
+
+def _chapter_index(chapters, key):
+    for index, chapter in enumerate(chapters):
+        if key in (chapter['slug'], str(chapter['id'])):
+            return index
+    return None
+
+
+def select_chapters(chapters, spec):
+    """Índices (desde 0) de los capítulos que indica una especificación"""
+    if isinstance(spec, list):
+        indices = []
+        for item in spec:
+            indices += [index for index in select_chapters(chapters, item) if index not in indices]
+        return indices
+
+    spec = str(spec).strip()
+    match = RANGE_RE.match(spec)
+    if match:
+        first, last = int(match.group(1)), int(match.group(2))
+    elif spec.isdigit():
+        first = last = int(spec)
+    else:
+        index = _chapter_index(chapters, spec)
+        if index is None:
+            raise ValueError(f"Capítulo desconocido: {spec}")
+        return [index]
+
+    if not 1 <= first <= last <= len(chapters):
+        raise ValueError(f"Rango de capítulos fuera del libro: {spec} (el libro tiene {len(chapters)})")
+    return list(range(first - 1, last))
+
+
+def derive(manifest, name, indices, label, overrides=None):
+    """Manifiesto de una edición con los capítulos indicados"""
+    metadata = manifest['metadata']
+    output = PurePosixPath(manifest['output'])
+
+    edition = {key: value for key, value in manifest.items() if key not in FULL_EDITION_KEYS}
+    edition['edition'] = name
+    edition['metadata'] = {**metadata,
+                           'identifier': f"{metadata['identifier']}-{name}",
+                           'title': f"{metadata['title']} — {label}"}
+    edition['output'] = str(output.with_name(f"{output.stem}-{name}{output.suffix}"))
+    edition['chapters'] = [manifest['chapters'][index] for index in indices]
+    edition.update(overrides or {})
+    return edition
+
+
+def resolve(manifest, spec):
+    """Manifiestos de las ediciones que produce una especificación"""
+    chapters = manifest['chapters']
+    declared = manifest.get('editions', {})
+
+    if spec == "each":
+        return [derive(manifest, chapter['slug'], [index], chapter['title'])
+                for index, chapter in enumerate(chapters)]
+
+    if spec in declared:
+        options = dict(declared[spec])
+        indices = select_chapters(chapters, options.pop('chapters'))
+        label = options.pop('label', spec.capitalize())
+        return [derive(manifest, spec, indices, label, overrides=options)]
+
+    indices = select_chapters(chapters, spec)
+    if len(indices) == 1:
+        chapter = chapters[indices[0]]
+        return [derive(manifest, chapter['slug'], indices, chapter['title'])]
+    first, last = indices[0] + 1, indices[-1] + 1
+    return [derive(manifest, f"capitulos-{first:02d}-{last:02d}", indices, f"Capítulos {first}–{last}")]
+
+
+def resolve_one(manifest, spec):
+    """La única edición que produce una especificación (peticiones del worker)"""
+    editions = resolve(manifest, spec)
+    if len(editions) != 1:
+        raise ValueError(f"La edición '{spec}' produce {len(editions)} libros; se esperaba uno")
+    return editions[0]
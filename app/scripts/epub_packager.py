@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Empaquetado reproducible de EPUB.
+
+ebooklib escribe cada entrada del ZIP con la hora actual y pone la fecha de
+ahora en dcterms:modified, así que dos construcciones del mismo markdown dan
+bytes distintos. Aquí las entradas llevan una fecha fija, permisos fijos y el
+orden de siempre (mimetype, container, OPF y luego los items en el orden en que
+se agregaron). Con eso el hash del artefacto sirve como ETag y llave de caché.
+
+Las entradas se comprimen en varios hilos (zlib suelta el GIL) y se escriben
+en el orden pedido; el resultado es byte a byte el de comprimir en serie. El
+nivel de compresión se elige por perfil: "fast" para previsualizar mientras
+se escribe, "default" y "max" para publicar.
+
+StreamingEpubWriter escribe cada documento en cuanto está listo y suelta su
+contenido; el OPF, el nav y el NCX se escriben al final a partir de los
+metadatos. La memoria no crece con el número de capítulos.
+"""
+
+import os
+import io
+import zlib
+import zipfile
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from ebooklib import epub
+
+# Último recurso si no hay SOURCE_DATE_EPOCH, "modified" en el manifiesto ni
+# historial de git para las fuentes
+DEFAULT_BUILD_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# ZIP no admite fechas anteriores a 1980
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Nivel de DEFLATE por perfil de compresión
+COMPRESSION_PROFILES = {
+    "fast": 1,      # vista previa mientras se escribe
+    "default": 6,   # el nivel por defecto de ebooklib
+    "max": 9,       # publicación
+}
+DEFAULT_COMPRESSION = "default"
+
+
+def content_date(sources):
+    """
+    Fecha del último commit que tocó alguna de las fuentes (git log), o None
+    si no hay git o no están versionadas. Depende solo del contenido y su
+    historial: la misma revisión da la misma fecha en cualquier clon.
+    """
+    sources = [os.path.abspath(source) for source in sources]
+    if not sources:
+        return None
+    try:
+        result = subprocess.run(["git", "log", "-1", "--format=%ct", "--", *sources],
+                                cwd=os.path.dirname(sources[0]), capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    timestamp = result.stdout.strip()
+    if result.returncode != 0 or not timestamp.isdigit():
+        return None
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc)
+
+
+def build_date(metadata=None, sources=()):
+    """
+    Fecha estable para dcterms:modified y las entradas del ZIP: SOURCE_DATE_EPOCH
+    (convención de reproducible-builds), luego "modified" del manifiesto, la
+    del último commit de las fuentes (sources: capítulos, portada, manifiesto)
+    y por último DEFAULT_BUILD_DATE. Nunca la hora actual.
+    """
+    source_date_epoch = os.getenv("SOURCE_DATE_EPOCH")
+    if source_date_epoch:
+        return datetime.fromtimestamp(int(source_date_epoch), tz=timezone.utc)
+    if metadata and metadata.get("modified"):
+        return datetime.fromisoformat(metadata["modified"].replace("Z", "+00:00"))
+    return content_date(sources) or DEFAULT_BUILD_DATE
+
+
+def compression_level(profile=None):
+    """Nivel de zlib para un perfil de COMPRESSION_PROFILES"""
+    profile = profile or DEFAULT_COMPRESSION
+    if profile not in COMPRESSION_PROFILES:
+        raise ValueError(f"Perfil de compresión desconocido: {profile} "
+                         f"(opciones: {', '.join(COMPRESSION_PROFILES)})")
+    return COMPRESSION_PROFILES[profile]
+
+
+def zip_date_time(date):
+    return max(ZIP_EPOCH, date.timetuple()[:6])
+
+
+def compress_entry(data, compress_type, level):
+    """(crc, tamaño original, bytes comprimidos) de una entrada, igual que zipfile"""
+    if compress_type == zipfile.ZIP_STORED:
+        return zlib.crc32(data), len(data), data
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level,
+                                  zlib.DEFLATED, -15)
+    return zlib.crc32(data), len(data), compressor.compress(data) + compressor.flush()
+
+
+class DeterministicZipFile(zipfile.ZipFile):
+    """
+    ZipFile cuyas entradas escritas por nombre llevan fecha y permisos fijos.
+
+    Las entradas DEFLATE o sin comprimir se comprimen en un pool de hilos:
+    writestr() encola y vuelve de inmediato, y las entradas se escriben en el
+    orden en que llegaron. Con a lo sumo 2 × workers entradas en vuelo, la
+    memoria no crece con el tamaño del EPUB.
+    """
+
+    def __init__(self, *args, date_time=ZIP_EPOCH, workers=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.date_time = date_time
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        self._pending = deque()
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if not isinstance(zinfo_or_arcname, zipfile.ZipInfo):
+            zinfo = zipfile.ZipInfo(zinfo_or_arcname, date_time=self.date_time)
+            zinfo.compress_type = self.compression if compress_type is None else compress_type
+            zinfo.external_attr = 0o644 << 16
+            zinfo_or_arcname = zinfo
+        if compresslevel is None:
+            compresslevel = self.compresslevel
+
+        zinfo = zinfo_or_arcname
+        if compress_type is not None:
+            zinfo.compress_type = compress_type
+        if zinfo.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) or self.fp is None:
+            self._drain()
+            super().writestr(zinfo, data, compress_type, compresslevel)
+            return
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if self._executor is None:
+            self._write_entry(zinfo, *compress_entry(data, zinfo.compress_type, compresslevel))
+            return
+        self._pending.append((zinfo, self._executor.submit(compress_entry, data,
+                                                           zinfo.compress_type, compresslevel)))
+        while len(self._pending) > 2 * self.workers:
+            self._write_next()
+
+    def _write_next(self):
+        zinfo, future = self._pending.popleft()
+        self._write_entry(zinfo, *future.result())
+
+    def _drain(self):
+        while self._pending:
+            self._write_next()
+
+    def _write_entry(self, zinfo, crc, file_size, payload):
+        """Escribe una entrada ya comprimida: cabecera con CRC y tamaños, luego los datos"""
+        zip64 = max(file_size, len(payload)) > zipfile.ZIP64_LIMIT
+        if zip64 and not self._allowZip64:
+            raise zipfile.LargeZipFile("Filesize would require ZIP64 extensions")
+        with self._lock:
+            zinfo.CRC = crc
+            zinfo.file_size = file_size
+            zinfo.compress_size = len(payload)
+            zinfo.flag_bits = 0x00
+            if self._seekable:
+                self.fp.seek(self.start_dir)
+            zinfo.header_offset = self.fp.tell()
+            self._writecheck(zinfo)
+            self._didModify = True
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.write(payload)
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+            self.start_dir = self.fp.tell()
+
+    def close(self):
+        try:
+            if self.fp is not None:
+                self._drain()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+            super().close()
+
+
+class DeterministicEpubWriter(epub.EpubWriter):
+    """
+    EpubWriter que escribe con DeterministicZipFile. Opciones extra:
+    "mtime" (fecha de las entradas) y "workers" (hilos de compresión).
+    """
+
+    def _open_zip(self):
+        # mimetype va primero y sin comprimir (OCF)
+        self.out = DeterministicZipFile(self.file_name, "w", zipfile.ZIP_DEFLATED,
+                                        compresslevel=self.options["compresslevel"],
+                                        date_time=zip_date_time(self.options["mtime"]),
+                                        workers=self.options.get("workers"))
+        self.out.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+
+    def write(self):
+        self._open_zip()
+
+        self._write_container()
+        self._write_opf()
+        self._write_items()
+
+        self.out.close()
+
+
+class StreamingEpubWriter(DeterministicEpubWriter):
+    """
+    EpubWriter incremental: open() escribe mimetype y container, add() escribe
+    un item en el ZIP y deja en el libro solo sus metadatos (id, ruta, tipo),
+    y close() escribe el OPF y los items restantes (CSS, nav, NCX).
+
+    El orden de las entradas cambia respecto a write() (los capítulos van antes
+    que el OPF), pero es igual de estable: mimetype sigue siendo la primera.
+    """
+
+    def __init__(self, name, book, options=None):
+        super().__init__(name, book, options)
+        self._written = set()
+
+    def open(self):
+        self._open_zip()
+        self._write_container()
+
+    def add(self, item):
+        """Agrega el item al libro, lo escribe de inmediato y libera su contenido"""
+        self.book.add_item(item)
+        data = item.get_content()
+        self.out.writestr(f"{self.book.FOLDER_NAME}/{item.file_name}", data)
+        self._written.add(item.id)
+        item.content = b""
+        return len(data)
+
+    def close(self):
+        self._write_opf()
+
+        items = self.book.items
+        self.book.items = [item for item in items if item.id not in self._written]
+        try:
+            self._write_items()
+        finally:
+            self.book.items = items
+        self.out.close()
+
+
+def writer_options(modified=None, compression=None, workers=None):
+    """Opciones para DeterministicEpubWriter y StreamingEpubWriter"""
+    return {"mtime": modified or build_date(),
+            "compresslevel": compression_level(compression),
+            "workers": workers}
+
+
+def package(book, modified=None, deterministic=True, compression=None, workers=None):
+    """
+    Empaqueta un EpubBook en memoria y devuelve sus bytes. compression es un
+    perfil de COMPRESSION_PROFILES; workers, los hilos de compresión (None =
+    todos los núcleos).
+    """
+    buffer = io.BytesIO()
+
+    if not deterministic:
+        epub.write_epub(buffer, book, {"raise_exceptions": True})
+        return buffer.getvalue()
+
+    writer = DeterministicEpubWriter(buffer, book, writer_options(modified, compression, workers))
+    writer.process()
+    writer.write()
+    return buffer.getvalue()
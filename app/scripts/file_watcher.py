@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Observa directorios y avisa qué archivos cambiaron (book_builder.py --watch).
+
+En Linux usa inotify a través de ctypes, sin dependencias: el proceso duerme
+hasta que el kernel reporta un cambio. En otros sistemas, o si inotify no
+está disponible, revisa los mtime cada POLL_INTERVAL segundos.
+
+Los editores suelen guardar en varios pasos (temporal, renombrar, atributos):
+wait() agrupa los eventos hasta que pasan DEBOUNCE segundos sin cambios y
+devuelve el conjunto de rutas afectadas.
+"""
+
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+
+DEBOUNCE = 0.05
+POLL_INTERVAL = 0.25
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def ignored(name):
+    """Temporales de editores y de la propia construcción"""
+    return name.startswith(".") or name.endswith(("~", ".swp", ".tmp")) or name == "__pycache__"
+
+
+class InotifyWatcher:
+    """Directorios observados con inotify (solo Linux)"""
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        self.directories = {}
+        for directory in directories:
+            self.add_tree(Path(directory))
+
+    def add_tree(self, directory):
+        """Observa el directorio y sus subdirectorios (inotify no es recursivo)"""
+        for root, dirs, _ in os.walk(directory):
+            dirs[:] = [name for name in dirs if not ignored(name)]
+            wd = self._add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"No se pudo observar {root}")
+            self.directories[wd] = Path(root)
+
+    def read_events(self):
+        changed = set()
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+            if wd not in self.directories or not name or ignored(name):
+                continue
+            path = self.directories[wd] / name
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path)
+            changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        """Bloquea hasta que haya cambios; devuelve las rutas (vacío si venció timeout)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = self.read_events()
+        while select.select([self.fd], [], [], DEBOUNCE)[0]:
+            changed |= self.read_events()
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Alternativa portátil: compara mtime y tamaño de los archivos"""
+
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.directories = [Path(directory) for directory in directories]
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        state = {}
+        for directory in self.directories:
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = [name for name in dirs if not ignored(name)]
+                for name in files:
+                    if ignored(name):
+                        continue
+                    path = Path(root) / name
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def changes(self):
+        current = self.scan()
+        changed = {path for path in current.keys() | self.snapshot.keys()
+                   if current.get(path) != self.snapshot.get(path)}
+        self.snapshot = current
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.changes()
+            if changed:
+                # Esperar a que el editor termine de escribir
+                time.sleep(DEBOUNCE)
+                return changed | self.changes()
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+def open_watcher(directories, polling=False):
+    """InotifyWatcher si el sistema lo permite; si no, PollingWatcher"""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Edición HTML de una sola página con el mismo XHTML de los capítulos del EPUB.
+
+Un solo archivo autocontenido: el CSS del tema y del resaltado van en
+<style>, las imágenes optimizadas como data URI y el índice enlaza a cada
+capítulo por su slug. Sirve para leer el libro en el navegador sin otra
+canalización de markdown.
+"""
+
+import html
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="{language}">
+<head>
+<meta charset="utf-8" />
+<meta name="viewport" content="width=device-width, initial-scale=1" />
+<title>{title}</title>
+<style>
+{css}
+body {{ max-width: 46em; margin: 0 auto; padding: 1em 1.5em; }}
+img {{ max-width: 100%; height: auto; }}
+.book-header {{ text-align: center; margin: 3em 0; }}
+.book-toc li {{ margin-bottom: 0.3em; }}
+.chapter {{ margin-top: 4em; }}
+</style>
+</head>
+<body>
+<header class="book-header">
+<h1>{title}</h1>
+<p>{author}</p>
+<p>{description}</p>
+</header>
+<nav class="book-toc">
+<h2>Contenido</h2>
+<ol>
+{toc}
+</ol>
+</nav>
+{chapters}
+</body>
+</html>
+'''
+
+
+def render_html(metadata, css, chapters):
+    """
+    Texto de la página completa.
+
+    chapters: lista de dicts con "title", "slug" y "html" (el cuerpo del
+              capítulo con las imágenes ya embebidas).
+    """
+    toc = []
+    sections = []
+    for chapter in chapters:
+        slug = html.escape(chapter["slug"])
+        toc.append(f'<li><a href="#{slug}">{html.escape(chapter["title"])}</a></li>')
+        sections.append(f'<section class="chapter" id="{slug}">\n{chapter["html"]}\n</section>')
+
+    return PAGE_TEMPLATE.format(language=html.escape(metadata.get("language", "es")),
+                                title=html.escape(metadata["title"]),
+                                author=html.escape(metadata.get("author", "")),
+                                description=html.escape(metadata.get("description", "")),
+                                css=css,
+                                toc="\n".join(toc),
+                                chapters="\n".join(sections))
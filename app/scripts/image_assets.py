@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optimización de imágenes para los EPUB.
+
+Las portadas y las imágenes de los capítulos se reducen a un tamaño máximo y
+se recodifican: JPEG si la imagen es opaca, PNG optimizado si tiene
+transparencia o pocos colores (diagramas). Las animadas (GIF, APNG, WebP)
+se dejan tal cual: recodificarlas guardaría solo el primer cuadro. El resultado se guarda en la caché
+de construcción con una llave que incluye el hash de la imagen fuente, las
+opciones y la versión de Pillow, así una reconstrucción sin cambios no vuelve
+a codificar nada.
+
+Las imágenes de los capítulos se resuelven junto al markdown o desde public/
+y se guardan una sola vez por EPUB en images/<hash>.<ext>, aunque varios
+capítulos (o rutas distintas) apunten al mismo contenido.
+
+Pillow es opcional: si no está instalado se usa la imagen original.
+"""
+
+import io
+import re
+import base64
+import mimetypes
+import hashlib
+from pathlib import Path
+from urllib.parse import unquote
+
+from chapter_cache import make_key
+
+# Medidas recomendadas para portadas de e-reader (Kindle/Kobo: 1600x2560)
+COVER_MAX_SIZE = (1600, 2560)
+JPEG_QUALITY = 85
+
+# Ancho máximo de las imágenes dentro de los capítulos
+IMAGE_MAX_WIDTH = 1200
+IMAGE_MAX_HEIGHT = 2560
+
+# Carpeta dentro del EPUB, relativa a los capítulos
+IMAGES_DIR = "images"
+
+# Incrementar si cambia la forma de procesar imágenes
+IMAGE_PIPELINE_VERSION = "3"
+
+# Referencias en el markdown fuente (para la huella) y en el HTML ya convertido
+MD_IMAGE_RE = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)'
+                         r'|<img\b[^>]*?\bsrc=["\']([^"\']+)["\']', re.IGNORECASE)
+HTML_IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\bsrc=")([^"]+)(")', re.IGNORECASE)
+
+def _pillow_version():
+    try:
+        import PIL
+        return PIL.__version__
+    except ImportError:
+        return None
+
+
+def encode_image(source_bytes, max_size):
+    """
+    Reduce la imagen para que quepa en max_size y la recodifica. Devuelve
+    (bytes, extensión). Si el resultado no es más pequeño, o la imagen es
+    animada, se conserva el original.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(source_bytes)) as image:
+        source_format = (image.format or "").lower()
+        if getattr(image, "is_animated", False):
+            return source_bytes, f".{source_format or 'gif'}"
+        image.thumbnail(max_size, Image.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        # Imágenes con paleta (capturas, diagramas) se ven mal en JPEG
+        keep_png = has_alpha or image.mode in ("P", "1")
+        output = io.BytesIO()
+        if keep_png:
+            image.save(output, format="PNG", optimize=True)
+            extension = ".png"
+        else:
+            image.convert("RGB").save(output, format="JPEG", quality=JPEG_QUALITY,
+                                      optimize=True, progressive=True)
+            extension = ".jpg"
+
+    data = output.getvalue()
+    if len(data) >= len(source_bytes):
+        return source_bytes, ".jpg" if source_format == "jpeg" else f".{source_format or 'png'}"
+    return data, extension
+
+
+def optimize_image(source_path, cache=None, max_size=COVER_MAX_SIZE):
+    """
+    Devuelve (bytes, extensión) de la imagen optimizada, usando la caché si se
+    indica. Sin Pillow devuelve la imagen original.
+    """
+    source_path = Path(source_path)
+    source_bytes = source_path.read_bytes()
+    pillow_version = _pillow_version()
+
+    if pillow_version is None or source_path.suffix.lower() == ".svg":
+        return source_bytes, source_path.suffix.lower()
+
+    key = make_key(hashlib.sha256(source_bytes).hexdigest(),
+                   f"{max_size[0]}x{max_size[1]}",
+                   str(JPEG_QUALITY),
+                   pillow_version,
+                   IMAGE_PIPELINE_VERSION)
+
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            # La extensión va en el primer byte-línea de la entrada
+            extension, _, data = cached.partition(b"\n")
+            return data, extension.decode('ascii')
+
+    data, extension = encode_image(source_bytes, max_size)
+    if cache:
+        cache.put(key, extension.encode('ascii') + b"\n" + data)
+    return data, extension
+
+
+def optimize_cover(cover_path, cache=None):
+    """Portada lista para set_cover: (bytes, extensión)"""
+    data, extension = optimize_image(cover_path, cache=cache, max_size=COVER_MAX_SIZE)
+    original_size = Path(cover_path).stat().st_size
+    if len(data) < original_size:
+        print(f"🖼️  Portada optimizada: {original_size / 1024:.0f} KB → {len(data) / 1024:.0f} KB")
+    return data, extension
+
+
+def is_external(src):
+    return src.startswith(("http://", "https://", "data:", "//"))
+
+
+def resolve_image(src, base_dir, public_dir):
+    """
+    Ruta local de una imagen referenciada en un capítulo: las rutas absolutas
+    ("/images/x.png") son relativas a public/; las relativas se buscan junto
+    al markdown y luego en public/. None si no existe o es externa.
+    """
+    if is_external(src):
+        return None
+    src = unquote(src.split('#')[0].split('?')[0])
+    if src.startswith('/'):
+        candidates = [Path(public_dir) / src.lstrip('/')]
+    else:
+        candidates = [Path(base_dir) / src, Path(public_dir) / src]
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate.resolve()
+    return None
+
+
+def find_image_refs(md_content):
+    """Rutas de imagen referenciadas en el markdown (sintaxis ![]() o <img>)"""
+    return [markdown_src or html_src for markdown_src, html_src in MD_IMAGE_RE.findall(md_content)]
+
+
+class BookImages:
+    """
+    Imágenes de un EPUB. Cada imagen se procesa una vez por construcción y
+    cada contenido distinto se incluye una sola vez, con nombre por hash.
+    """
+
+    def __init__(self, public_dir, cache=None, max_width=IMAGE_MAX_WIDTH):
+        self.public_dir = Path(public_dir)
+        self.cache = cache
+        self.max_size = (max_width, IMAGE_MAX_HEIGHT)
+        self.hrefs = {}   # ruta fuente -> href dentro del EPUB
+        self.items = {}   # href -> bytes (None si ya se entregó), en orden de aparición
+        self.references = 0
+        self.missing = []
+
+    def add(self, path):
+        """Procesa una imagen local y devuelve su href dentro del EPUB"""
+        if path not in self.hrefs:
+            data, extension = optimize_image(path, cache=self.cache, max_size=self.max_size)
+            href = f"{IMAGES_DIR}/{hashlib.sha256(data).hexdigest()[:16]}{extension}"
+            self.items.setdefault(href, data)
+            self.hrefs[path] = href
+        return self.hrefs[path]
+
+    def drain(self):
+        """
+        (href, bytes) de las imágenes agregadas desde la última llamada. Los
+        bytes se sueltan al entregarlos: el EPUB en streaming no los retiene.
+        """
+        for href, data in self.items.items():
+            if data is not None:
+                self.items[href] = None
+                yield href, data
+
+    def href(self, src, base_dir):
+        """href embebido de una imagen local, o None si es externa o no existe"""
+        if is_external(src):
+            return None
+        path = resolve_image(src, base_dir, self.public_dir)
+        if path is None:
+            self.missing.append(src)
+            return None
+        self.references += 1
+        return self.add(path)
+
+    def data_uri(self, href):
+        """La imagen embebida como data URI"""
+        media_type = mimetypes.guess_type(href)[0] or "application/octet-stream"
+        return f"data:{media_type};base64,{base64.b64encode(self.items[href]).decode('ascii')}"
+
+    def rewrite(self, html_content, base_dir, inline=False):
+        """
+        Reemplaza los src de <img> locales por la copia embebida en el EPUB,
+        o con inline por un data URI (edición HTML de una sola página).
+        """
+        def replace(match):
+            href = self.href(match.group(2), base_dir)
+            if href is None:
+                return match.group(0)
+            return f"{match.group(1)}{self.data_uri(href) if inline else href}{match.group(3)}"
+
+        return HTML_IMG_SRC_RE.sub(replace, html_content)
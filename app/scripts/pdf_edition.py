@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Edición PDF de un libro con reportlab, a partir del XHTML de sus capítulos.
+
+Recibe el mismo XHTML ya resaltado que va al EPUB, lo parsea con lxml a un
+árbol de listas (convención JsonML: "texto" o [tag, {atributos}, *hijos]) y
+lo convierte en flowables: encabezados, párrafos con su formato en línea,
+listas, tablas, citas, imágenes y bloques de código con los colores del tema
+de resaltado. No vuelve a leer ni a convertir el markdown.
+
+Los colores salen del tema del manifiesto, igual que el CSS del EPUB. El PDF
+es reproducible (invariant): mismas entradas, mismos bytes.
+"""
+
+import io
+from xml.sax.saxutils import escape
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (Flowable, HRFlowable, Image, ListFlowable, ListItem, PageBreak, SimpleDocTemplate,
+                                Spacer, Table, TableStyle)
+
+import pdf_fonts
+from pdf_fonts import UnicodeParagraph as Paragraph
+
+PAGE_SIZE = letter
+MARGIN = 72
+FRAME_PADDING = 6
+
+# Columnas de código por línea antes de partirla (monoespaciada 8 pt en el ancho útil)
+CODE_COLUMNS = 92
+
+TABLE_PADDING = 4
+
+TEXT_COLOR = "#333333"
+MUTED_COLOR = "#666666"
+
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = HEADINGS | {"p", "pre", "ul", "ol", "table", "blockquote", "hr", "div", "img"}
+INLINE_TAGS = {"strong": "b", "b": "b", "em": "i", "i": "i", "u": "u",
+               "del": "strike", "s": "strike", "sup": "super", "sub": "sub"}
+
+
+def parse_html(html_content):
+    """Árbol de un fragmento HTML (el cuerpo de un capítulo)"""
+    from lxml import html as lxml_html
+
+    nodes = []
+    for fragment in lxml_html.fragments_fromstring(html_content):
+        if isinstance(fragment, str):
+            nodes.append(fragment)
+        else:
+            element_nodes(fragment, nodes)
+    return nodes
+
+
+def element_nodes(element, nodes):
+    """Agrega a nodes el elemento de lxml convertido y el texto que lo sigue"""
+    if isinstance(element.tag, str):
+        node = [element.tag, dict(element.attrib)]
+        if element.text:
+            node.append(element.text)
+        for child in element:
+            element_nodes(child, node)
+        nodes.append(node)
+    # Los comentarios se descartan, pero no el texto que les sigue
+    if element.tail:
+        nodes.append(element.tail)
+
+
+class BookDocTemplate(SimpleDocTemplate):
+    """Agrega al índice del visor (outline) los flowables marcados con outline"""
+
+    def afterFlowable(self, flowable):
+        outline = getattr(flowable, "outline", None)
+        if outline:
+            title, key = outline
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(title, key, level=0)
+
+
+def build_styles(theme):
+    """Estilos de párrafo para un tema del manifiesto"""
+    base = getSampleStyleSheet()
+    accent = HexColor(theme["accent"])
+    pre_color = theme["pre_color"] if theme["pre_color"].startswith("#") else TEXT_COLOR
+
+    styles = {
+        "title": ParagraphStyle("BookTitle", parent=base["Title"], fontSize=26, leading=32,
+                                textColor=accent, spaceAfter=18),
+        "subtitle": ParagraphStyle("BookSubtitle", parent=base["Normal"], fontSize=13, leading=18,
+                                   alignment=TA_CENTER, textColor=HexColor(MUTED_COLOR), spaceAfter=8),
+        "toc": ParagraphStyle("Toc", parent=base["Normal"], fontSize=11, leading=18, leftIndent=12),
+        "body": ParagraphStyle("Body", parent=base["Normal"], fontSize=10.5, leading=15,
+                               textColor=HexColor(TEXT_COLOR), spaceAfter=8),
+        "quote": ParagraphStyle("Quote", parent=base["Italic"], fontSize=10.5, leading=15,
+                                textColor=HexColor(MUTED_COLOR), leftIndent=18, spaceAfter=8),
+        "cell": ParagraphStyle("Cell", parent=base["Normal"], fontSize=9, leading=12),
+        "cell_header": ParagraphStyle("CellHeader", parent=base["Normal"], fontSize=9, leading=12,
+                                      fontName="Helvetica-Bold"),
+        "code": ParagraphStyle("Code", parent=base["Code"], fontName="Courier", fontSize=8, leading=10.5,
+                               textColor=HexColor(pre_color), backColor=HexColor(theme["pre_background"]),
+                               borderColor=HexColor(theme["pre_border"]), borderWidth=0.5, borderPadding=6,
+                               spaceBefore=6, spaceAfter=12, leftIndent=6, rightIndent=6),
+    }
+    sizes = {"h1": 22, "h2": 17, "h3": 14, "h4": 12, "h5": 11, "h6": 10.5}
+    for tag, size in sizes.items():
+        styles[tag] = ParagraphStyle(f"Heading-{tag}", parent=base["Heading1"], fontSize=size,
+                                     leading=size * 1.3, spaceBefore=size * 0.8, spaceAfter=size * 0.45,
+                                     textColor=accent if tag == "h2" else HexColor(TEXT_COLOR))
+    pdf_fonts.apply_fonts(styles.values())
+    return styles
+
+
+def token_colors(style):
+    """Color por clase CSS de Pygments ("k", "s2"...) para un tema de resaltado"""
+    from pygments.styles import get_style_by_name
+    from pygments.token import STANDARD_TYPES
+
+    style_class = get_style_by_name(style)
+    colors = {}
+    for token_type, css_class in STANDARD_TYPES.items():
+        color = style_class.style_for_token(token_type)["color"]
+        if css_class and color:
+            colors[css_class] = HexColor(f"#{color}")
+    return colors
+
+
+def inline_markup(nodes, context):
+    """Markup de párrafo de reportlab para una lista de nodos en línea"""
+    parts = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(escape(node))
+            continue
+        tag, attributes, *children = node
+        inner = inline_markup(children, context)
+        if tag in INLINE_TAGS:
+            parts.append(f"<{INLINE_TAGS[tag]}>{inner}</{INLINE_TAGS[tag]}>")
+        elif tag == "code":
+            parts.append(f'<font face="{context["styles"]["code"].fontName}" color="{context["theme"]["accent"]}">'
+                         f'{inner}</font>')
+        elif tag == "a" and attributes.get("href", "").startswith(("http://", "https://", "mailto:")):
+            parts.append(f'<a href="{escape(attributes["href"])}" color="{context["theme"]["accent"]}">'
+                         f'{inner}</a>')
+        elif tag == "br":
+            parts.append("<br/>")
+        elif tag == "img":
+            parts.append(escape(attributes.get("alt", "")))
+        else:
+            parts.append(inner)
+    return "".join(parts)
+
+
+def code_segments(nodes, colors, color=None):
+    """(texto, color) de un bloque de código resaltado, en orden"""
+    for node in nodes:
+        if isinstance(node, str):
+            yield node, color
+            continue
+        _, attributes, *children = node
+        yield from code_segments(children, colors, colors.get(attributes.get("class"), color))
+
+
+def code_lines(node, colors):
+    """Líneas de un bloque <pre> partidas a CODE_COLUMNS; cada una es [(texto, color)]"""
+    lines = [[]]
+    column = 0
+    for text, color in code_segments(node[2:], colors):
+        for index, piece in enumerate(text.split("\n")):
+            if index:
+                lines.append([])
+                column = 0
+            while piece:
+                if column >= CODE_COLUMNS:
+                    lines.append([])
+                    column = 0
+                chunk, piece = piece[:CODE_COLUMNS - column], piece[CODE_COLUMNS - column:]
+                lines[-1].append((chunk, color))
+                column += len(chunk)
+
+    while lines and not "".join(text for text, _ in lines[-1]).strip():
+        lines.pop()
+    return lines
+
+
+class CodeBlock(Flowable):
+    """
+    Bloque de código dibujado línea a línea directamente en el canvas. Con
+    miles de tokens coloreados, pasar por el parser de markup de Paragraph
+    o XPreformatted domina el tiempo del PDF. Se parte entre páginas por líneas.
+    """
+
+    def __init__(self, lines, style):
+        super().__init__()
+        self.lines = lines
+        self.style = style
+
+    def wrap(self, available_width, available_height):
+        style = self.style
+        self.width = available_width - style.leftIndent - style.rightIndent
+        self.height = len(self.lines) * style.leading + 2 * style.borderPadding
+        return available_width, self.height
+
+    def split(self, available_width, available_height):
+        fit = int((available_height - 2 * self.style.borderPadding) // self.style.leading)
+        if fit < 2 or fit >= len(self.lines):
+            return []
+        return [CodeBlock(self.lines[:fit], self.style), CodeBlock(self.lines[fit:], self.style)]
+
+    def draw(self):
+        style, canvas = self.style, self.canv
+        canvas.setFillColor(style.backColor)
+        canvas.setStrokeColor(style.borderColor)
+        canvas.setLineWidth(style.borderWidth)
+        canvas.rect(style.leftIndent, 0, self.width, self.height, fill=1, stroke=1)
+
+        text = canvas.beginText(style.leftIndent + style.borderPadding,
+                                self.height - style.borderPadding - style.fontSize)
+        text.setFont(style.fontName, style.fontSize, style.leading)
+        current = style.fontName
+        for line in self.lines:
+            for piece, color in line:
+                text.setFillColor(color or style.textColor)
+                # Emojis y símbolos que la monoespaciada no tiene salen de la fuente de respaldo
+                for run, font in pdf_fonts.font_runs(piece, style.fontName):
+                    if font != current:
+                        text.setFont(font, style.fontSize, style.leading)
+                        current = font
+                    text.textOut(run)
+            text.textLine()
+        canvas.drawText(text)
+
+
+def image_flowable(attributes, context):
+    """Imagen del capítulo escalada al ancho útil, o su texto alternativo"""
+    data = context["image_data"](attributes.get("src", ""))
+    if data is None:
+        alt = attributes.get("alt")
+        return Paragraph(f"<i>[{escape(alt)}]</i>", context["styles"]["body"]) if alt else None
+    try:
+        width, height = ImageReader(io.BytesIO(data)).getSize()
+    except Exception:
+        # SVG u otro formato que reportlab no dibuja
+        return None
+    scale = min(1.0, context["width"] / width, context["height"] * 0.6 / height)
+    return Image(io.BytesIO(data), width=width * scale, height=height * scale)
+
+
+def list_flowable(node, context):
+    tag, attributes, *children = node
+    items = []
+    for child in children:
+        if isinstance(child, str) or child[0] != "li":
+            continue
+        flowables = mixed_flowables(child[2:], context)
+        if flowables:
+            items.append(ListItem(flowables))
+    if not items:
+        return None
+    if tag == "ol":
+        return ListFlowable(items, bulletType="1", start=attributes.get("start", "1"), leftIndent=18,
+                            bulletFontName=context["body"].fontName)
+    return ListFlowable(items, bulletType="bullet", start="•", leftIndent=18, bulletFontName=context["body"].fontName)
+
+
+def table_cell(cell, style, column_width, context):
+    """
+    Texto plano si la celda no tiene formato, su fuente tiene todos los
+    caracteres y cabe en su columna; si no, un Paragraph que la parte en
+    líneas. En tablas grandes casi todas las celdas son del primer tipo y se
+    ahorran el parser de markup.
+    """
+    children = cell[2:]
+    if all(isinstance(child, str) for child in children):
+        text = " ".join("".join(children).split())
+        if (pdf_fonts.covered(text, style.fontName)
+                and stringWidth(text, style.fontName, style.fontSize) <= column_width - 2 * TABLE_PADDING):
+            return text
+    return Paragraph(inline_markup(children, context), style)
+
+
+def table_flowable(node, context):
+    styles = context["styles"]
+    rows = []
+    header_rows = 0
+    for row in [element for section in node[2:] if not isinstance(section, str)
+                for element in ([section] if section[0] == "tr" else section[2:])
+                if not isinstance(element, str) and element[0] == "tr"]:
+        cells = [cell for cell in row[2:] if not isinstance(cell, str) and cell[0] in ("th", "td")]
+        if cells and all(cell[0] == "th" for cell in cells) and len(rows) == header_rows:
+            header_rows += 1
+        rows.append(cells)
+    if not rows:
+        return None
+
+    columns = max(len(row) for row in rows)
+    column_width = context["width"] / columns
+    rows = [[table_cell(cell, styles["cell_header"] if cell[0] == "th" else styles["cell"], column_width, context)
+             for cell in row] + [""] * (columns - len(row))
+            for row in rows]
+    table = Table(rows, colWidths=[column_width] * columns, repeatRows=header_rows)
+    cell, header = styles["cell"], styles["cell_header"]
+    commands = [("GRID", (0, 0), (-1, -1), 0.5, HexColor("#cccccc")),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("FONT", (0, 0), (-1, -1), cell.fontName, cell.fontSize, cell.leading),
+                ("PADDING", (0, 0), (-1, -1), TABLE_PADDING)]
+    if header_rows:
+        commands.append(("BACKGROUND", (0, 0), (-1, header_rows - 1), HexColor("#f0f0f0")))
+        commands.append(("FONT", (0, 0), (-1, header_rows - 1), header.fontName, header.fontSize, header.leading))
+    table.setStyle(TableStyle(commands))
+    return table
+
+
+def mixed_flowables(nodes, context):
+    """Contenido que mezcla texto en línea y bloques (elementos <li>)"""
+    flowables, inline = [], []
+
+    def flush():
+        markup = inline_markup(inline, context).strip()
+        if markup:
+            flowables.append(Paragraph(markup, context["body"]))
+        inline.clear()
+
+    for node in nodes:
+        if not isinstance(node, str) and node[0] in BLOCK_TAGS:
+            flush()
+            flowables.extend(block_flowables([node], context))
+        else:
+            inline.append(node)
+    flush()
+    return flowables
+
+
+def block_flowables(nodes, context):
+    """Flowables para una lista de nodos de bloque"""
+    styles = context["styles"]
+    flowables = []
+    for node in nodes:
+        if isinstance(node, str):
+            if node.strip():
+                flowables.append(Paragraph(escape(node.strip()), context["body"]))
+            continue
+
+        tag, attributes, *children = node
+        flowable = None
+        if tag in HEADINGS:
+            flowable = Paragraph(inline_markup(children, context), styles[tag])
+        elif tag == "p":
+            elements = [child for child in children if not isinstance(child, str) or child.strip()]
+            if elements and all(not isinstance(child, str) and child[0] == "img" for child in elements):
+                flowables.extend(filter(None, (image_flowable(child[1], context) for child in elements)))
+                continue
+            flowable = Paragraph(inline_markup(children, context), context["body"])
+        elif tag == "pre":
+            code = [child for child in children if not isinstance(child, str)]
+            flowable = CodeBlock(code_lines(code[0] if len(code) == 1 and code[0][0] == "code" else node,
+                                             context["colors"]), styles["code"])
+        elif tag in ("ul", "ol"):
+            flowable = list_flowable(node, context)
+        elif tag == "table":
+            flowable = table_flowable(node, context)
+        elif tag == "blockquote":
+            flowables.extend(mixed_flowables(children, {**context, "body": styles["quote"]}))
+            continue
+        elif tag == "hr":
+            flowable = HRFlowable(width="100%", thickness=0.5, color=HexColor(context["theme"]["accent"]),
+                                  spaceBefore=6, spaceAfter=10)
+        elif tag == "img":
+            flowable = image_flowable(attributes, context)
+        else:
+            flowables.extend(mixed_flowables(children, context))
+            continue
+        if flowable is not None:
+            flowables.append(flowable)
+    return flowables
+
+
+def render_pdf(metadata, theme, chapters, image_data, highlight=None, cover=None):
+    """
+    Bytes del PDF de un libro.
+
+    metadata: metadatos del manifiesto (título, autor, descripción).
+    theme: tema completo (acento, colores de código).
+    chapters: lista de dicts con "title", "slug", "html" (el cuerpo del capítulo)
+              y "base_dir" (para resolver sus imágenes).
+    image_data: función (src, base_dir) -> bytes de la imagen optimizada, o None.
+    highlight: tema de Pygments con el que se resaltó el código, o None.
+    cover: bytes de la portada optimizada, o None.
+    """
+    buffer = io.BytesIO()
+    doc = BookDocTemplate(buffer, pagesize=PAGE_SIZE, rightMargin=MARGIN, leftMargin=MARGIN,
+                          topMargin=MARGIN, bottomMargin=MARGIN, title=metadata["title"],
+                          author=metadata.get("author", ""), subject=metadata.get("description", ""),
+                          invariant=True)
+    styles = build_styles(theme)
+    # El frame de platypus deja FRAME_PADDING por lado dentro de los márgenes
+    context = {"theme": theme, "styles": styles, "body": styles["body"],
+               "colors": token_colors(highlight) if highlight else {},
+               "width": doc.width - 2 * FRAME_PADDING, "height": doc.height - 2 * FRAME_PADDING}
+
+    story = []
+    if cover:
+        width, height = ImageReader(io.BytesIO(cover)).getSize()
+        scale = min(context["width"] / width, context["height"] / height)
+        story += [Image(io.BytesIO(cover), width=width * scale, height=height * scale), PageBreak()]
+
+    story.append(Spacer(1, doc.height * 0.25))
+    story.append(Paragraph(escape(metadata["title"]), styles["title"]))
+    story.append(Paragraph(escape(metadata.get("author", "")), styles["subtitle"]))
+    if metadata.get("description"):
+        story.append(Spacer(1, 18))
+        story.append(Paragraph(escape(metadata["description"]), styles["subtitle"]))
+    story.append(PageBreak())
+
+    story.append(Paragraph("Contenido", styles["h1"]))
+    for chapter in chapters:
+        story.append(Paragraph(f'<a href="#{chapter["slug"]}">{escape(chapter["title"])}</a>', styles["toc"]))
+
+    for chapter in chapters:
+        story.append(PageBreak())
+        chapter_context = {**context,
+                           "image_data": lambda src, base_dir=chapter["base_dir"]: image_data(src, base_dir)}
+        flowables = block_flowables(parse_html(chapter["html"]), chapter_context) or [Spacer(1, 1)]
+        anchor = Paragraph(f'<a name="{chapter["slug"]}"/>', styles["body"])
+        anchor.outline = (chapter["title"], chapter["slug"])
+        story.append(anchor)
+        story.extend(flowables)
+
+    def footer(canvas, document):
+        canvas.saveState()
+        canvas.setFont(pdf_fonts.font_name("Helvetica"), 8)
+        canvas.setFillColor(HexColor(MUTED_COLOR))
+        canvas.drawCentredString(PAGE_SIZE[0] / 2, MARGIN / 2, f"{metadata['title']} · {document.page}")
+        canvas.restoreState()
+
+    doc.build(story, onFirstPage=lambda canvas, document: None, onLaterPages=footer)
+    return buffer.getvalue()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Publica en S3 todo el catálogo generado: los EPUB con sección "publish" en su
+manifiesto y los PDF de temarios.
+
+Las subidas van en paralelo (con un límite) sobre un único cliente de S3 con
+pool de conexiones, y cada objeto se reintenta ante fallos transitorios. Los
+objetos que no cambiaron no se suben (ver s3_upload.py). Publicar el catálogo
+completo tarda más o menos lo que la subida más lenta, no la suma de todas.
+
+Uso:
+    python3 app/scripts/publish.py                    # todo el catálogo
+    python3 app/scripts/publish.py ai-sdk temario     # solo algunos artefactos
+    python3 app/scripts/publish.py --build            # construir EPUBs y publicar
+    python3 app/scripts/publish.py --workers 8 --force
+    python3 app/scripts/publish.py --events -          # eventos JSON lines en stdout
+"""
+
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext, redirect_stdout
+
+import build_events
+from book_builder import ROOT_DIR, build_books, list_books, load_manifest, resolve_path
+from s3_upload import DEFAULT_CONCURRENCY, DEFAULT_PART_SIZE, create_s3_client, s3_settings, upload_file_if_changed
+
+# PDFs de temarios generados por los scripts de la raíz del repositorio
+PDF_ARTIFACTS = [
+    {"id": "temario", "path": "public/temario-claude-code.pdf",
+     "s3_key": "fixtergeek/temarios/temario-claude-code.pdf", "filename": "temario-claude-code.pdf"},
+    {"id": "workshop", "path": "public/temario-claude-workshop.pdf",
+     "s3_key": "fixtergeek/temarios/temario-claude-workshop.pdf", "filename": "temario-claude-workshop.pdf"},
+]
+
+CONTENT_TYPES = {
+    ".epub": "application/epub+zip",
+    ".pdf": "application/pdf",
+}
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+
+
+def catalog():
+    """Todos los artefactos publicables: EPUBs con "publish" y PDFs de temarios"""
+    artifacts = []
+    for book_id in list_books():
+        manifest = load_manifest(book_id)
+        if manifest.get('publish'):
+            artifacts.append({"id": book_id, "path": manifest['output'], **manifest['publish']})
+    artifacts.extend(PDF_ARTIFACTS)
+    return artifacts
+
+
+def upload_with_retries(s3_client, artifact, bucket, retries, force, part_size, concurrency):
+    """Sube un artefacto reintentando con espera exponencial; nunca lanza"""
+    local_path = resolve_path(artifact['path'])
+    result = {"id": artifact['id'], "key": artifact['s3_key'], "uploaded": False,
+              "bytes": 0, "seconds": 0.0, "attempts": 0, "error": None}
+
+    if not local_path.exists():
+        result["error"] = f"no existe {artifact['path']}"
+        build_events.emit("error", artifact=artifact['id'], message=result["error"])
+        return result
+
+    started = time.perf_counter()
+    with build_events.phase("upload", artifact=artifact['id'], key=artifact['s3_key']) as info:
+        for attempt in range(1, retries + 1):
+            result["attempts"] = attempt
+            try:
+                upload = upload_file_if_changed(
+                    s3_client,
+                    str(local_path),
+                    bucket,
+                    artifact['s3_key'],
+                    content_type=CONTENT_TYPES.get(local_path.suffix),
+                    content_disposition=f'attachment; filename="{artifact["filename"]}"',
+                    part_size=part_size,
+                    concurrency=concurrency,
+                    force=force
+                )
+                result.update(uploaded=upload["uploaded"], bytes=upload["bytes"], error=None)
+                break
+            except Exception as e:
+                result["error"] = str(e)
+                if attempt < retries:
+                    build_events.emit("retry", artifact=artifact['id'], attempt=attempt, error=str(e))
+                    time.sleep(0.5 * 2 ** (attempt - 1))
+        info.update(uploaded=result["uploaded"], bytes=result["bytes"], attempts=result["attempts"])
+
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def publish(artifacts, s3_client=None, bucket=None, workers=DEFAULT_WORKERS, retries=DEFAULT_RETRIES,
+            force=False, part_size=DEFAULT_PART_SIZE, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Sube los artefactos en paralelo con un solo cliente compartido y devuelve
+    un resultado por artefacto (id, key, uploaded, bytes, seconds, error).
+    """
+    settings = s3_settings()
+    bucket = bucket or settings["bucket"]
+
+    if s3_client is None:
+        if not settings["access_key"] or not settings["secret_key"]:
+            raise ValueError("AWS credentials not configured")
+        # Conexiones suficientes para todos los workers y sus partes simultáneas
+        s3_client = create_s3_client(settings["endpoint_url"], settings["access_key"],
+                                     settings["secret_key"], settings["region"],
+                                     max_pool_connections=workers * concurrency)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(upload_with_retries, s3_client, artifact, bucket,
+                                   retries, force, part_size, concurrency)
+                   for artifact in artifacts]
+        return [future.result() for future in futures]
+
+
+def print_report(results, elapsed):
+    print("\n📤 Publicación en S3")
+    for result in results:
+        if result["error"]:
+            status = f"✗ {result['error']}"
+        elif result["uploaded"]:
+            status = f"✅ {result['bytes'] / 1024:.2f} KB"
+        else:
+            status = "⏭️  sin cambios"
+        print(f"   {result['id']:<12} {result['seconds']:>7.2f}s  {status}")
+
+    uploaded_bytes = sum(result["bytes"] for result in results)
+    print(f"\n   Total: {uploaded_bytes / 1024:.2f} KB en {elapsed:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publica EPUBs y PDFs en S3")
+    parser.add_argument("artifacts", nargs="*", help="ids a publicar (por defecto todo el catálogo)")
+    parser.add_argument("--build", action="store_true", help="construir los EPUBs antes de publicar")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="procesos para convertir capítulos con --build")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="subidas simultáneas")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="intentos por objeto")
+    parser.add_argument("--force", action="store_true", help="subir aunque no haya cambios")
+    parser.add_argument("--events", metavar="RUTA",
+                        help="eventos JSON lines por fase y resumen final ('-' = stdout, el progreso va a stderr)")
+    args = parser.parse_args(argv)
+
+    if not args.events:
+        return run_publish(args)
+
+    events_stream = build_events.open_stream(args.events)
+    progress = redirect_stdout(sys.stderr) if events_stream is sys.stdout else nullcontext()
+    try:
+        with progress, build_events.run(events_stream, command="publish") as outcome:
+            status = run_publish(args)
+            outcome["ok"] = status == 0
+    finally:
+        if events_stream is not sys.stdout:
+            events_stream.close()
+    return status
+
+
+def run_publish(args):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(ROOT_DIR / ".env")
+    except ImportError:
+        pass
+
+    artifacts = catalog()
+    if args.artifacts:
+        unknown = set(args.artifacts) - {artifact['id'] for artifact in artifacts}
+        if unknown:
+            print(f"Error: artefactos desconocidos: {', '.join(sorted(unknown))}")
+            return 2
+        artifacts = [artifact for artifact in artifacts if artifact['id'] in args.artifacts]
+
+    book_ids = [artifact['id'] for artifact in artifacts if artifact['id'] in list_books()]
+    if args.build and book_ids:
+        _, errors = build_books(book_ids, jobs=args.jobs)
+        if errors:
+            return 1
+
+    started = time.perf_counter()
+    results = publish(artifacts, workers=args.workers, retries=args.retries, force=args.force)
+    print_report(results, time.perf_counter() - started)
+
+    for result in results:
+        if result["error"] and result["attempts"]:
+            build_events.emit("error", artifact=result["id"], message=result["error"])
+    return 1 if any(result["error"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Worker residente para generar EPUB y PDF sin arrancar python3 por petición.
+
+Mantiene importados ebooklib/markdown/pygments/reportlab/lxml y la caché de
+capítulos caliente: book_builder los importa recién al usarlos, así que
+warm_up() los carga al arrancar para que la primera petición no lo pague. Se comunica por stdin/stdout con JSON lines: una petición por línea
+y una respuesta por línea con el mismo "id". Lo que imprimen los generadores
+se captura y se devuelve en el campo "log" para no ensuciar el protocolo.
+
+Mientras se atiende una petición, cada evento de construcción (fases,
+capítulos, avisos; ver build_events.py) se reenvía de inmediato como
+{"type": "event", "id": "1", "event": {...}}, así el servidor puede mostrar
+el progreso sin esperar la respuesta. La respuesta lleva en "summary" el
+resumen de la petición (fases, capítulos, avisos y errores).
+
+Peticiones:
+    {"id": "1", "format": "epub", "book": "libro"}
+    {"id": "2", "format": "epub", "book": "libro", "inline": true}
+    {"id": "5", "format": "epub", "book": "libro", "compression": "fast"}
+    {"id": "6", "format": "epub", "book": "libro", "edition": "3", "inline": true}
+    {"id": "3", "format": "pdf", "book": "temario"}
+    {"id": "7", "format": "pdf", "book": "workshop", "inline": true}
+    {"id": "8", "format": "pdf", "book": "workshop", "inline": true, "html": "<html>..."}
+    {"id": "4", "format": "ping"}
+
+Con "inline" el EPUB se empaqueta en memoria y se devuelve en "data" (base64)
+sin escribirse a disco, así peticiones simultáneas no compiten por la misma
+ruta en public/. "compression" elige el perfil de compresión del EPUB
+("fast", "default" o "max"; ver epub_packager.py). "edition" genera una
+edición derivada (un capítulo, un rango o una edición del manifiesto; ver
+editions.py) a partir de los capítulos ya convertidos en la caché.
+
+Los PDF de los temarios también se generan en memoria con "inline"; con
+"html" se extrae el contenido de ese HTML en lugar del de public/.
+
+Respuestas:
+    {"id": "1", "ok": true, "format": "epub", "book": "libro",
+     "path": "...", "size": 94480, "sha256": "...", "duration_ms": 312.5,
+     "summary": {...}, "log": "..."}
+    {"id": "2", "ok": false, "error": "..."}
+
+Al arrancar escribe {"type": "ready", "pid": ...}. Termina al cerrarse stdin.
+"""
+
+import io
+import os
+import sys
+import json
+import base64
+import time
+import argparse
+import importlib
+import traceback
+from contextlib import nullcontext, redirect_stdout
+
+import build_events
+import editions
+from book_builder import ROOT_DIR, build_book, list_books, load_manifest, render_book, render_chapter
+from build_fingerprint import artifact_hash
+from chapter_cache import default_cache
+
+# Generadores de PDF en la raíz del repositorio: id -> (módulo, render en memoria, escritura)
+PDF_DOCUMENTS = {
+    "temario": ("generate_temario_pdf", "render_temario_pdf", "create_temario_pdf"),
+    "workshop": ("generate_workshop_pdf", "render_workshop_pdf", "create_workshop_pdf"),
+}
+
+# Lo que book_builder importa de forma perezosa al construir un libro
+BOOK_MODULES = ("ebooklib.epub", "markdown", "epub_packager", "search_index", "lxml.html",
+                "pygments.lexers", "pygments.formatters", "PIL.Image")
+
+# Markdown desechable para cargar las extensiones (fenced_code, tables, nl2br)
+WARM_UP_MARKDOWN = "# Título\n\n| a | b |\n|---|---|\n| 1 | 2 |\n\n```python\nx = 1\n```\n"
+
+
+class RenderWorker:
+    def __init__(self, jobs=1):
+        self.jobs = jobs
+        self.cache = default_cache()
+        self.pdf_modules = {}
+
+    def warm_up(self):
+        """Importa de antemano las dependencias de los EPUB y los generadores de PDF"""
+        for module_name in BOOK_MODULES:
+            try:
+                importlib.import_module(module_name)
+            except ImportError as e:
+                print(f"⚠ {module_name} no disponible: {e}", file=sys.stderr)
+        try:
+            render_chapter(WARM_UP_MARKDOWN)
+        except ImportError:
+            pass
+        for document in PDF_DOCUMENTS:
+            try:
+                self._pdf_renderer(document)
+            except ImportError as e:
+                print(f"⚠ PDF '{document}' no disponible: {e}", file=sys.stderr)
+
+    def _pdf_renderer(self, document, inline=False):
+        if document not in PDF_DOCUMENTS:
+            raise ValueError(f"Documento PDF desconocido: {document} (disponibles: {', '.join(PDF_DOCUMENTS)})")
+        module_name, render_name, create_name = PDF_DOCUMENTS[document]
+        if module_name not in self.pdf_modules:
+            self.pdf_modules[module_name] = importlib.import_module(module_name)
+        return getattr(self.pdf_modules[module_name], render_name if inline else create_name)
+
+    def render_pdf(self, document, html=None):
+        """Bytes del PDF de un temario; con html, extraído de ese HTML"""
+        from temario_extract import extract_document
+
+        renderer = self._pdf_renderer(document, inline=True)
+        content_data = extract_document(document, html) if html else None
+        with build_events.phase("render"):
+            return renderer(content_data)
+
+    def render(self, request):
+        """Ejecuta una petición y devuelve el dict de respuesta"""
+        output_format = request.get("format")
+        book = request.get("book")
+
+        if output_format == "ping":
+            return {"ok": True, "format": "ping", "books": list_books(), "pdfs": list(PDF_DOCUMENTS)}
+
+        if output_format == "epub":
+            manifest = load_manifest(book)
+            if request.get("edition"):
+                manifest = editions.resolve_one(manifest, request["edition"])
+
+        if output_format == "pdf" and (request.get("inline") or request.get("html")):
+            data = self.render_pdf(book, request.get("html"))
+            return {"ok": True, "format": output_format, "book": book,
+                    "size": len(data), "sha256": artifact_hash(data),
+                    "data": base64.b64encode(data).decode('ascii')}
+
+        if output_format == "epub" and request.get("inline"):
+            data = render_book(manifest, cache=self.cache, jobs=self.jobs,
+                               compression=request.get("compression"))
+            return {"ok": True, "format": output_format, "book": book,
+                    "size": len(data), "sha256": artifact_hash(data),
+                    "data": base64.b64encode(data).decode('ascii')}
+
+        if output_format == "epub":
+            path = build_book(manifest, cache=self.cache, jobs=self.jobs,
+                              compression=request.get("compression"))
+        elif output_format == "pdf":
+            renderer = self._pdf_renderer(book)
+            with build_events.phase("render"):
+                path = str(renderer())
+        else:
+            raise ValueError(f"Formato desconocido: {output_format}")
+
+        with open(path, 'rb') as f:
+            digest = artifact_hash(f.read())
+        size = os.path.getsize(path)
+        if output_format == "pdf":
+            # build_book ya reporta el artefacto de los EPUB
+            build_events.artifact(path, size, digest)
+        return {"ok": True, "format": output_format, "book": book,
+                "path": path, "size": size, "sha256": digest}
+
+    def handle_line(self, line, stdout=None):
+        """Atiende una línea; con stdout, los eventos se reenvían mientras se construye"""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {"id": None, "ok": False, "error": f"JSON inválido: {e}"}
+
+        request_id = request.get("id")
+
+        def forward(event):
+            self._write(stdout, {"type": "event", "id": request_id, "event": event})
+
+        started = time.perf_counter()
+        log = io.StringIO()
+        with build_events.listen(forward) if stdout else nullcontext(), \
+                build_events.recording() as events, \
+                build_events.context(format=request.get("format"), book=request.get("book")):
+            try:
+                with redirect_stdout(log):
+                    response = self.render(request)
+            except Exception as e:
+                traceback.print_exc(file=sys.stderr)
+                build_events.emit("error", message=str(e))
+                response = {"ok": False, "format": request.get("format"),
+                            "book": request.get("book"), "error": str(e)}
+
+        seconds = time.perf_counter() - started
+        response["id"] = request_id
+        response["duration_ms"] = round(seconds * 1000, 1)
+        response["summary"] = build_events.summarize(events, round(seconds, 6))
+        response["log"] = log.getvalue()
+        return response
+
+    def serve(self, stdin=sys.stdin, stdout=sys.stdout):
+        self._write(stdout, {"type": "ready", "pid": os.getpid()})
+        for line in stdin:
+            if not line.strip():
+                continue
+            self._write(stdout, self.handle_line(line, stdout))
+
+    @staticmethod
+    def _write(stdout, message):
+        stdout.write(json.dumps(message, ensure_ascii=False) + "\n")
+        stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker residente de generación de EPUB/PDF")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="procesos para convertir capítulos (0 = todos los núcleos)")
+    args = parser.parse_args(argv)
+
+    # Los generadores de PDF y pdf_fonts.py viven en la raíz del repositorio
+    sys.path.insert(0, str(ROOT_DIR))
+
+    worker = RenderWorker(jobs=args.jobs)
+    worker.warm_up()
+    worker.serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Subidas condicionales a S3 (Tigris/R2/MinIO o AWS).
+
+Antes de subir se compara el hash local con el objeto remoto (HEAD): primero
+el sha256 guardado en los metadatos del objeto y, para objetos subidos antes
+de guardar ese metadato, el ETag (md5 simple o md5 multipart). Si no cambió,
+no se sube nada. Si cambió, el archivo se sube en streaming por partes con
+tamaño de parte y concurrencia configurables, sin leerlo entero a memoria.
+
+Todas las funciones reciben el cliente de S3, así se pueden probar contra un
+S3 local (moto, MinIO) sin red.
+"""
+
+import os
+import hashlib
+
+SHA256_METADATA_KEY = "sha256"
+
+DEFAULT_PART_SIZE = int(float(os.getenv("S3_UPLOAD_PART_SIZE_MB", "8")) * 1024 * 1024)
+DEFAULT_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+
+# Bloque de lectura para calcular hashes sin cargar el archivo completo
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+def s3_settings():
+    """Configuración de S3 desde el entorno (mismas variables que usa la app)"""
+    return {
+        "bucket": os.getenv("AWS_S3_BUCKET", "wild-bird-2039"),
+        "region": os.getenv("AWS_REGION", "auto"),
+        "endpoint_url": os.getenv("AWS_ENDPOINT_URL_S3"),
+        "access_key": os.getenv("AWS_ACCESS_KEY_ID"),
+        "secret_key": os.getenv("AWS_SECRET_ACCESS_KEY"),
+    }
+
+
+def create_s3_client(endpoint_url=None, access_key=None, secret_key=None, region=None, max_pool_connections=10):
+    """Cliente de S3 con firma v4 y direccionamiento por ruta (compatible con Tigris)"""
+    import boto3
+    from botocore.config import Config
+
+    client_config = Config(
+        signature_version='s3v4',
+        s3={'addressing_style': 'path'},
+        max_pool_connections=max_pool_connections,
+        retries={'max_attempts': 5, 'mode': 'standard'}
+    )
+
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name=region,
+        config=client_config
+    )
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_etag(path, part_size):
+    """ETag que S3 calcularía: md5 si cabe en una parte, md5 de md5s si es multipart"""
+    part_digests = []
+    with open(path, 'rb') as f:
+        for part in iter(lambda: f.read(part_size), b''):
+            part_digests.append(hashlib.md5(part).digest())
+
+    if len(part_digests) <= 1:
+        return (part_digests[0] if part_digests else hashlib.md5(b'').digest()).hex()
+    combined = hashlib.md5(b''.join(part_digests)).hexdigest()
+    return f"{combined}-{len(part_digests)}"
+
+
+def remote_object(s3_client, bucket, key):
+    """HEAD del objeto remoto; None si no existe"""
+    from botocore.exceptions import ClientError
+
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+
+
+def is_unchanged(head, local_path, local_sha256, part_size):
+    """Compara el archivo local con la respuesta HEAD del objeto remoto"""
+    if head is None:
+        return False
+    if head.get('ContentLength') != os.path.getsize(local_path):
+        return False
+
+    remote_sha256 = head.get('Metadata', {}).get(SHA256_METADATA_KEY)
+    if remote_sha256:
+        return remote_sha256 == local_sha256
+
+    # Objetos antiguos sin metadato: comparar contra el ETag
+    remote_etag = head.get('ETag', '').strip('"')
+    if '-' in remote_etag:
+        # El ETag multipart depende del tamaño de parte con que se subió:
+        # probar el configurado y el default de boto3 (8 MB)
+        return any(file_etag(local_path, candidate) == remote_etag
+                   for candidate in {part_size, 8 * 1024 * 1024})
+    return file_etag(local_path, os.path.getsize(local_path) or 1) == remote_etag
+
+
+def upload_file_if_changed(s3_client, local_path, bucket, key, content_type=None,
+                           content_disposition=None, part_size=DEFAULT_PART_SIZE,
+                           concurrency=DEFAULT_CONCURRENCY, force=False):
+    """
+    Sube local_path a s3://bucket/key solo si cambió. Devuelve un dict con
+    "uploaded" (bool), "bytes" y "sha256".
+    """
+    from boto3.s3.transfer import TransferConfig
+
+    local_sha256 = file_sha256(local_path)
+    size = os.path.getsize(local_path)
+
+    if not force and is_unchanged(remote_object(s3_client, bucket, key), local_path, local_sha256, part_size):
+        return {"uploaded": False, "bytes": 0, "sha256": local_sha256}
+
+    extra_args = {"Metadata": {SHA256_METADATA_KEY: local_sha256}}
+    if content_type:
+        extra_args["ContentType"] = content_type
+    if content_disposition:
+        extra_args["ContentDisposition"] = content_disposition
+
+    transfer_config = TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=concurrency,
+        use_threads=concurrency > 1
+    )
+
+    s3_client.upload_file(local_path, bucket, key, ExtraArgs=extra_args, Config=transfer_config)
+    return {"uploaded": True, "bytes": size, "sha256": local_sha256}
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de búsqueda de texto completo de los libros, generado al construirlos.
+
+Cada libro con "search" en su manifiesto produce dos archivos estáticos que el
+sitio carga bajo demanda:
+
+    public/search/<id>.json       índice invertido (términos → posiciones)
+    public/search/<id>.text.json  texto plano de cada sección, para fragmentos
+
+Las secciones son los encabezados h1–h3 de cada capítulo; su ancla es el mismo
+id que BookMarkdown.tsx genera en el sitio, así un resultado enlaza a
+?chapter=<slug>#<ancla>.
+
+Normalización (la misma que app/utils/bookSearch.ts aplica a las consultas):
+minúsculas, sin acentos salvo la ñ, sin palabras vacías del español y con los
+plurales regulares reducidos ("funciones" → "funcion", "modelos" → "modelo").
+
+Formato del índice:
+    "chapters": [{"slug", "title", "hash", "sections": [[ancla, título], ...]} | null]
+    "terms": {término: {posición del capítulo en "chapters": [sección, n, p1, p2-p1, ...]}}
+
+Las posiciones son offsets dentro del texto de la sección en unidades
+UTF-16, como los cuenta JavaScript (un emoji ocupa dos), codificados como
+diferencias. Las postings van agrupadas por capítulo: al
+actualizar solo se reemplazan las de los capítulos cuyo hash cambió, y un
+capítulo eliminado deja su lugar en null para no renumerar a los demás.
+"""
+
+import re
+import json
+import bisect
+import hashlib
+import unicodedata
+
+# Incrementar si cambia la tokenización o el formato: fuerza un índice nuevo
+INDEX_VERSION = "2"
+
+HEADING_TAGS = {"h1", "h2", "h3"}
+
+WORD_RE = re.compile(r"[^\W_]+")
+# Caracteres fuera del plano básico: en UTF-16 son dos unidades (un par sustituto)
+ASTRAL_RE = re.compile("[\U00010000-\U0010ffff]")
+MARK_RE = re.compile(r"(?<!n)\u0303|[\u0300-\u0302\u0304-\u036f]")
+ANCHOR_DROP_RE = re.compile(r"[^A-Za-z0-9_\sáéíóúñü-]")
+
+STOP_WORDS = frozenset("""
+a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante
+e el ella ellos en entre era es esa ese eso esta estan estar estas este esto estos fue ha han
+hasta hay la las le les lo los me mas mi mucho muchos muy nada ni no nos nosotros o otra otras
+otro otros para pero poco por porque puede que quien quienes se ser si sin sobre son su sus
+tambien tanto te ti todo todos tu tus un una uno unos y ya yo
+an and are as at be by for from in is it of on or that the this to with
+""".split())
+
+
+def fold(word):
+    """Minúsculas y sin acentos, conservando la ñ"""
+    decomposed = unicodedata.normalize("NFD", word.lower())
+    return unicodedata.normalize("NFC", MARK_RE.sub("", decomposed))
+
+
+def stem(token):
+    """Reduce los plurales regulares: -ones → -on, vocal + s → vocal"""
+    if len(token) > 4:
+        if token.endswith("ones"):
+            return token[:-2]
+        if token[-1] == "s" and token[-2] in "aeiou":
+            return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """(término, offset UTF-16) de cada palabra indexable del texto"""
+    # Cada carácter astral antes de la palabra la corre una unidad en JavaScript
+    astral = [match.start() for match in ASTRAL_RE.finditer(text)]
+    for match in WORD_RE.finditer(text):
+        token = fold(match.group())
+        if len(token) < 2 or token in STOP_WORDS:
+            continue
+        offset = match.start()
+        if astral:
+            offset += bisect.bisect_left(astral, offset)
+        yield stem(token), offset
+
+
+def heading_anchor(text):
+    """El id que BookMarkdown.tsx (generateId) asigna a un encabezado"""
+    anchor = ANCHOR_DROP_RE.sub("", text.lower().strip())
+    anchor = re.sub(r"-+", "-", re.sub(r"\s+", "-", anchor)).strip("-")
+    return anchor or "heading"
+
+
+def chapter_sections(html_content):
+    """
+    Secciones de un capítulo a partir de su XHTML: [(ancla, título, texto)].
+    El texto previo al primer encabezado queda en una sección sin ancla.
+    """
+    from lxml import html as lxml_html
+
+    sections = [["", "", []]]
+    for element in lxml_html.fragments_fromstring(html_content):
+        if isinstance(element, str):
+            sections[-1][2].append(element)
+            continue
+        text = element.text_content()
+        if element.tag in HEADING_TAGS:
+            title = " ".join(text.split())
+            sections.append([heading_anchor(title), title, []])
+        sections[-1][2].append(text)
+        if element.tail:
+            sections[-1][2].append(element.tail)
+
+    result = []
+    for anchor, title, parts in sections:
+        text = " ".join(" ".join(parts).split())
+        if text:
+            result.append((anchor, title, text))
+    return result
+
+
+def chapter_hash(title, md_content):
+    return hashlib.sha256(f"{INDEX_VERSION}\n{title}\n{md_content}".encode('utf-8')).hexdigest()[:16]
+
+
+def section_postings(sections):
+    """{término: [sección, n, p1, p2-p1, ...]} de las secciones de un capítulo"""
+    positions = {}
+    for section, (_, _, text) in enumerate(sections):
+        for token, offset in tokenize(text):
+            positions.setdefault(token, {}).setdefault(section, []).append(offset)
+
+    postings = {}
+    for token, by_section in positions.items():
+        encoded = []
+        for section, offsets in by_section.items():
+            encoded += [section, len(offsets), offsets[0]]
+            encoded += [offset - previous for previous, offset in zip(offsets, offsets[1:])]
+        postings[token] = encoded
+    return postings
+
+
+def empty_index(book_id, url):
+    return {"version": INDEX_VERSION, "book": book_id, "url": url, "chapters": [], "terms": {}}
+
+
+def load_index(index_path, text_path, book_id, url):
+    """El índice existente y sus textos, o unos vacíos si no sirve para actualizar"""
+    try:
+        index = json.loads(index_path.read_text(encoding='utf-8'))
+        texts = json.loads(text_path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return empty_index(book_id, url), {}
+    if index.get("version") != INDEX_VERSION or index.get("book") != book_id:
+        return empty_index(book_id, url), {}
+    index["url"] = url
+    return index, texts
+
+
+def remove_chapter(index, slot):
+    """Quita las postings de un capítulo; solo se tocan los términos que lo contienen"""
+    key = str(slot)
+    for token in [token for token, chapters in index["terms"].items() if key in chapters]:
+        del index["terms"][token][key]
+        if not index["terms"][token]:
+            del index["terms"][token]
+
+
+def add_chapter(index, slot, sections):
+    key = str(slot)
+    for token, encoded in section_postings(sections).items():
+        index["terms"].setdefault(token, {})[key] = encoded
+
+
+def update(index, texts, chapters, chapter_html):
+    """
+    Actualiza el índice con los capítulos actuales del libro.
+
+    chapters: [(slug, título, markdown)] en el orden del manifiesto.
+    chapter_html: función (posiciones en chapters) -> {posición: XHTML}, que
+                  solo se llama con los capítulos que cambiaron.
+    Devuelve las estadísticas {"changed", "removed", "unchanged"}.
+    """
+    slots = {chapter["slug"]: slot for slot, chapter in enumerate(index["chapters"]) if chapter}
+    current = {slug for slug, _, _ in chapters}
+
+    removed = [slug for slug in slots if slug not in current]
+    for slug in removed:
+        slot = slots.pop(slug)
+        remove_chapter(index, slot)
+        index["chapters"][slot] = None
+        texts.pop(slug, None)
+
+    changed = [position for position, (slug, title, md_content) in enumerate(chapters)
+               if slug not in slots or index["chapters"][slots[slug]]["hash"] != chapter_hash(title, md_content)]
+    html_by_position = chapter_html(changed) if changed else {}
+
+    for position in changed:
+        slug, title, md_content = chapters[position]
+        if slug in slots:
+            slot = slots[slug]
+            remove_chapter(index, slot)
+        else:
+            # Los lugares de capítulos eliminados se reutilizan antes de crecer
+            slot = index["chapters"].index(None) if None in index["chapters"] else len(index["chapters"])
+            if slot == len(index["chapters"]):
+                index["chapters"].append(None)
+            slots[slug] = slot
+
+        sections = chapter_sections(html_by_position[position]) if html_by_position.get(position) else []
+        add_chapter(index, slot, sections)
+        index["chapters"][slot] = {"slug": slug, "title": title, "hash": chapter_hash(title, md_content),
+                                   "sections": [[anchor, heading] for anchor, heading, _ in sections]}
+        texts[slug] = [text for _, _, text in sections]
+
+    return {"changed": len(changed), "removed": len(removed), "unchanged": len(chapters) - len(changed)}
+
+
+def dumps(data):
+    """JSON compacto y estable: mismas entradas, mismos bytes"""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
@@ -8,20 +8,18 @@
  * Puede ser usado con el Task tool para automatizar la generación de documentos.
  * 
  * Funciones:
- * - Regenerar archivo EPUB usando el script Python existente
+ * - Regenerar archivo EPUB usando el render worker residente de Python
+ * - Mostrar el progreso por capítulo y fase con los eventos estructurados del worker
  * - Generar PDF del temario del taller con información actualizada
  * - Verificar si los archivos fuente han sido modificados
  * - Validar que los archivos se generaron exitosamente
  * - Devolver información de los archivos generados (ruta y tamaño)
  */
 
-import { exec } from "child_process";
-import { promisify } from "util";
 import fs from "fs/promises";
 import path from "path";
 import { fileURLToPath } from "url";
-
-const execAsync = promisify(exec);
+import { getRenderWorker, type BuildEvent } from "../utils/renderWorker.server";
 
 // Obtener directorio actual del archivo
 const __filename = fileURLToPath(import.meta.url);
@@ -37,10 +35,25 @@ interface DocumentGeneratorResult {
   pdfFileSize?: number;
   generatedAt?: string;
   chaptersProcessed?: number;
+  warnings?: string[];
+  phases?: Record<string, number>;
   documentsGenerated?: string[];
   error?: string;
 }
 
+/** Muestra el progreso que el worker reporta mientras construye */
+function logBuildEvent(event: BuildEvent) {
+  if (event.type === "chapter") {
+    console.log(`   ✓ ${event.title} (${((event.seconds ?? 0) * 1000).toFixed(0)} ms${event.cached ? ", caché" : ""})`);
+  } else if (event.type === "phase_end") {
+    console.log(`   ⏱️  ${event.phase}: ${((event.seconds ?? 0) * 1000).toFixed(0)} ms`);
+  } else if (event.type === "warning") {
+    console.warn(`   ⚠️  ${event.message}`);
+  } else if (event.type === "error") {
+    console.error(`   ✗ ${event.message}`);
+  }
+}
+
 interface ChapterInfo {
   id: string;
   title: string;
@@ -132,35 +145,34 @@ class DocumentGenerator {
     try {
       console.log("🚀 Iniciando generación de EPUB...");
       
-      // Verificar que el script Python existe
-      const pythonScript = path.join(this.scriptsPath, "generate_epub.py");
+      // Verificar que el worker de Python existe
+      const workerScript = path.join(this.scriptsPath, "render_worker.py");
       
       try {
-        await fs.access(pythonScript);
+        await fs.access(workerScript);
       } catch {
         return {
           success: false,
           message: "Error: Script Python no encontrado",
-          error: `Script no existe en: ${pythonScript}`
+          error: `Script no existe en: ${workerScript}`
         };
       }
 
-      // Ejecutar el script Python
-      console.log("📝 Ejecutando script Python para generar EPUB...");
-      const { stdout, stderr } = await execAsync(`python3 "${pythonScript}"`);
+      // Pedir el EPUB al worker residente (no arranca python3 por llamada)
+      console.log("📝 Solicitando EPUB al render worker...");
+      const result = await getRenderWorker(projectRoot).render("epub", "libro", {
+        onEvent: logBuildEvent
+      });
 
-      // Verificar si hay errores críticos
-      if (stderr && !stderr.includes("WARNING") && !stderr.includes("UserWarning")) {
-        console.error("Error del script Python:", stderr);
+      if (!result.ok) {
+        console.error("Error del render worker:", result.error);
         return {
           success: false,
           message: "Error ejecutando script Python",
-          error: stderr
+          error: result.error
         };
       }
 
-      console.log("Salida del script:", stdout);
-
       // Verificar que el archivo EPUB se generó correctamente
       let epubStats;
       try {
@@ -173,9 +185,8 @@ class DocumentGenerator {
         };
       }
 
-      // Contar capítulos procesados desde la salida del script
-      const processedMatches = stdout.match(/✓ Procesado:/g);
-      const chaptersProcessed = processedMatches ? processedMatches.length : 0;
+      // Capítulos procesados según el resumen estructurado del worker
+      const chaptersProcessed = result.summary?.chapters ?? 0;
 
       console.log(`✅ EPUB generado exitosamente: ${this.epubPath}`);
       console.log(`   Tamaño: ${(epubStats.size / 1024).toFixed(2)} KB`);
@@ -186,7 +197,9 @@ class DocumentGenerator {
         epubPath: this.epubPath,
         fileSize: epubStats.size,
         generatedAt: new Date().toISOString(),
-        chaptersProcessed
+        chaptersProcessed,
+        warnings: result.summary?.warnings,
+        phases: result.summary?.phases
       };
 
     } catch (error) {
@@ -260,42 +273,33 @@ class DocumentGenerator {
         };
       }
 
-      // Ejecutar el script Python
-      console.log("📝 Ejecutando script Python para generar PDF del temario...");
-      const { stdout, stderr } = await execAsync(`python3 "${this.pdfGeneratorPath}"`);
+      // Pedir el PDF al worker residente
+      console.log("📝 Solicitando PDF del temario al render worker...");
+      const result = await getRenderWorker(projectRoot).render("pdf", "temario", {
+        onEvent: logBuildEvent
+      });
 
-      // Verificar si hay errores críticos
-      if (stderr && !stderr.includes("WARNING") && !stderr.includes("UserWarning")) {
-        console.error("Error del script Python:", stderr);
+      if (!result.ok) {
+        console.error("Error del render worker:", result.error);
         return {
           success: false,
           message: "Error ejecutando script generador de PDF",
-          error: stderr
+          error: result.error
         };
       }
 
-      console.log("Salida del script:", stdout);
-
-      // Verificar que el archivo PDF se generó correctamente
-      let pdfStats;
-      try {
-        pdfStats = await fs.stat(this.pdfPath);
-      } catch {
-        return {
-          success: false,
-          message: "Error: El archivo PDF no fue generado",
-          error: "Archivo no encontrado después de la ejecución del script"
-        };
-      }
+      // El worker responde con la ruta y el tamaño del PDF que escribió
+      const pdfPath = result.path ?? this.pdfPath;
+      const pdfSize = result.size ?? 0;
 
-      console.log(`✅ PDF generado exitosamente: ${this.pdfPath}`);
-      console.log(`   Tamaño: ${(pdfStats.size / 1024).toFixed(2)} KB`);
+      console.log(`✅ PDF generado exitosamente: ${pdfPath}`);
+      console.log(`   Tamaño: ${(pdfSize / 1024).toFixed(2)} KB`);
 
       return {
         success: true,
         message: "PDF del temario generado exitosamente",
-        pdfPath: this.pdfPath,
-        pdfFileSize: pdfStats.size,
+        pdfPath,
+        pdfFileSize: pdfSize,
         generatedAt: new Date().toISOString(),
         documentsGenerated: ["PDF"]
       };
@@ -463,6 +467,7 @@ Funciones:
     generateEpub, 
     generatePdf 
   });
+  getRenderWorker().stop();
 
   // Salida estructurada para usar con Task tool
   console.log("\n" + "=".repeat(60));
@@ -0,0 +1,205 @@
+/**
+ * Búsqueda de texto completo en los libros, con el índice estático que genera
+ * app/scripts/search_index.py al construirlos (public/search/<libro>.json).
+ *
+ * El índice y los textos de las secciones se descargan la primera vez que se
+ * busca en un libro y quedan en memoria. La normalización de la consulta debe
+ * ser idéntica a la de search_index.py: minúsculas, sin acentos salvo la ñ,
+ * sin palabras vacías y con los plurales regulares reducidos.
+ */
+
+type Postings = Record<string, number[]>;
+
+export interface BookSearchIndex {
+  version: string;
+  book: string;
+  url: string | null;
+  chapters: Array<{
+    slug: string;
+    title: string;
+    hash: string;
+    sections: Array<[string, string]>;
+  } | null>;
+  terms: Record<string, Postings>;
+}
+
+export type BookSearchTexts = Record<string, string[]>;
+
+export interface BookSearchResult {
+  chapterSlug: string;
+  chapterTitle: string;
+  section: number;
+  anchor: string;
+  heading: string;
+  href: string;
+  score: number;
+  offset: number;
+}
+
+const STOP_WORDS = new Set(
+  `a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante
+  e el ella ellos en entre era es esa ese eso esta estan estar estas este esto estos fue ha han
+  hasta hay la las le les lo los me mas mi mucho muchos muy nada ni no nos nosotros o otra otras
+  otro otros para pero poco por porque puede que quien quienes se ser si sin sobre son su sus
+  tambien tanto te ti todo todos tu tus un una uno unos y ya yo
+  an and are as at be by for from in is it of on or that the this to with`
+    .split(/\s+/)
+    .filter(Boolean)
+);
+
+export function foldWord(word: string): string {
+  return word
+    .toLowerCase()
+    .normalize("NFD")
+    .replace(/(?<!n)\u0303|[\u0300-\u0302\u0304-\u036f]/g, "")
+    .normalize("NFC");
+}
+
+function stem(token: string): string {
+  if (token.length > 4) {
+    if (token.endsWith("ones")) return token.slice(0, -2);
+    if (token.endsWith("s") && "aeiou".includes(token[token.length - 2])) {
+      return token.slice(0, -1);
+    }
+  }
+  return token;
+}
+
+export function tokenize(text: string): string[] {
+  const tokens: string[] = [];
+  for (const match of text.matchAll(/[\p{L}\p{N}]+/gu)) {
+    const token = foldWord(match[0]);
+    if (token.length < 2 || STOP_WORDS.has(token)) continue;
+    tokens.push(stem(token));
+  }
+  return tokens;
+}
+
+const indexCache = new Map<string, Promise<BookSearchIndex>>();
+const textsCache = new Map<string, Promise<BookSearchTexts>>();
+
+function fetchJson<T>(cache: Map<string, Promise<T>>, url: string): Promise<T> {
+  if (!cache.has(url)) {
+    const request = fetch(url).then((response) => {
+      if (!response.ok) throw new Error(`No se pudo cargar ${url}`);
+      return response.json() as Promise<T>;
+    });
+    // Un error no se queda en caché: el siguiente intento vuelve a pedirlo
+    request.catch(() => cache.delete(url));
+    cache.set(url, request);
+  }
+  return cache.get(url)!;
+}
+
+export function loadBookIndex(book: string) {
+  return fetchJson(indexCache, `/search/${book}.json`);
+}
+
+export function loadBookTexts(book: string) {
+  return fetchJson(textsCache, `/search/${book}.text.json`);
+}
+
+/** Postings de un término: { "capítulo:sección": [offsets] } */
+function termSections(postings: Postings | undefined) {
+  const sections = new Map<string, number[]>();
+  for (const [chapter, encoded] of Object.entries(postings ?? {})) {
+    let i = 0;
+    while (i < encoded.length) {
+      const [section, count] = [encoded[i], encoded[i + 1]];
+      const offsets: number[] = [];
+      let offset = 0;
+      for (let j = 0; j < count; j++) {
+        offset += encoded[i + 2 + j];
+        offsets.push(offset);
+      }
+      sections.set(`${chapter}:${section}`, offsets);
+      i += 2 + count;
+    }
+  }
+  return sections;
+}
+
+/**
+ * Secciones que contienen todos los términos de la consulta, las de más
+ * apariciones primero. El último término se busca como prefijo para que
+ * los resultados aparezcan mientras se escribe.
+ */
+export function searchBook(
+  index: BookSearchIndex,
+  query: string,
+  limit = 20
+): BookSearchResult[] {
+  const tokens = tokenize(query);
+  if (tokens.length === 0) return [];
+
+  type Match = { score: number; offset: number };
+  let matches: Map<string, Match> | null = null;
+  for (const [position, token] of tokens.entries()) {
+    const isLast = position === tokens.length - 1;
+    const terms = isLast
+      ? Object.keys(index.terms).filter((term) => term.startsWith(token))
+      : [token];
+
+    const found = new Map<string, Match>();
+    for (const term of terms) {
+      for (const [key, offsets] of termSections(index.terms[term])) {
+        const previous = found.get(key);
+        found.set(key, {
+          score: (previous?.score ?? 0) + offsets.length,
+          offset: Math.min(previous?.offset ?? Infinity, offsets[0]),
+        });
+      }
+    }
+
+    if (matches === null) {
+      matches = found;
+      continue;
+    }
+    const next = new Map<string, Match>();
+    for (const [key, match] of matches) {
+      const other = found.get(key);
+      if (other) next.set(key, { score: match.score + other.score, offset: match.offset });
+    }
+    matches = next;
+  }
+
+  const results: BookSearchResult[] = [];
+  for (const [key, { score, offset }] of matches ?? new Map<string, Match>()) {
+    const [chapterIndex, sectionIndex] = key.split(":").map(Number);
+    const chapter = index.chapters[chapterIndex];
+    if (!chapter) continue;
+    const [anchor, heading] = chapter.sections[sectionIndex] ?? ["", ""];
+    const base = `${index.url ?? ""}?chapter=${chapter.slug}`;
+    results.push({
+      chapterSlug: chapter.slug,
+      chapterTitle: chapter.title,
+      section: sectionIndex,
+      anchor,
+      heading: heading || chapter.title,
+      href: anchor ? `${base}#${anchor}` : base,
+      score,
+      offset,
+    });
+  }
+  return results.sort((a, b) => b.score - a.score).slice(0, limit);
+}
+
+function isLowSurrogate(code: number): boolean {
+  return code >= 0xdc00 && code <= 0xdfff;
+}
+
+/** Fragmento del texto de la sección alrededor de la primera coincidencia */
+export function resultSnippet(
+  texts: BookSearchTexts,
+  result: BookSearchResult,
+  radius = 80
+): string {
+  const text = texts[result.chapterSlug]?.[result.section] ?? "";
+  // offset viene en unidades UTF-16 (ver search_index.py); los bordes no
+  // deben partir un par sustituto (emoji)
+  let start = Math.max(0, result.offset - radius);
+  let end = Math.min(text.length, result.offset + radius);
+  if (isLowSurrogate(text.charCodeAt(start))) start--;
+  if (isLowSurrogate(text.charCodeAt(end))) end++;
+  return `${start > 0 ? "…" : ""}${text.slice(start, end)}${end < text.length ? "…" : ""}`;
+}
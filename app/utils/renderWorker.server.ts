@@ -0,0 +1,211 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
+import readline from "readline";
+import path from "path";
+
+/**
+ * Cliente del worker residente de Python (app/scripts/render_worker.py).
+ * Se arranca una sola vez y recibe trabajos por stdin como JSON lines, así
+ * cada descarga paga solo el tiempo de render y no el arranque de python3
+ * ni la importación de ebooklib/markdown/reportlab.
+ *
+ * Mientras construye, el worker reenvía eventos por fase y por capítulo
+ * (ver app/scripts/build_events.py); la respuesta trae un resumen con las
+ * fases, capítulos, avisos y errores, sin tener que interpretar texto.
+ */
+
+export type RenderFormat = "epub" | "pdf";
+
+export interface BuildEvent {
+  type: "run_start" | "phase_start" | "phase_end" | "chapter" | "artifact" | "warning" | "error" | "retry";
+  ts: number;
+  book?: string;
+  phase?: string;
+  chapter?: string;
+  title?: string;
+  seconds?: number;
+  bytes?: number;
+  cached?: boolean;
+  message?: string;
+  [key: string]: unknown;
+}
+
+export interface BuildSummary {
+  ok: boolean;
+  seconds: number;
+  phases: Record<string, number>;
+  chapters: number;
+  cached_chapters: number;
+  slowest_chapters: { book?: string; chapter: string; seconds: number }[];
+  artifacts: { book?: string; path: string; bytes: number; sha256: string }[];
+  warnings: string[];
+  errors: string[];
+}
+
+export interface RenderResult {
+  id: string;
+  ok: boolean;
+  format: RenderFormat;
+  book: string;
+  path?: string;
+  size?: number;
+  sha256?: string; // hash del artefacto, usable como ETag
+  data?: string; // base64, solo con inline
+  duration_ms?: number;
+  summary?: BuildSummary;
+  log?: string;
+  error?: string;
+}
+
+export interface RenderOptions {
+  inline?: boolean;
+  compression?: "fast" | "default" | "max"; // perfil de compresión del EPUB
+  edition?: string; // "3", "1-3", slug o edición del manifiesto (ver editions.py)
+  html?: string; // PDF de temario: extraer de este HTML en lugar del de public/
+  onEvent?: (event: BuildEvent) => void;
+}
+
+type Pending = {
+  resolve: (result: RenderResult) => void;
+  reject: (error: Error) => void;
+  onEvent?: (event: BuildEvent) => void;
+};
+
+// Un proceso del worker con las solicitudes que esperan su respuesta
+type WorkerProcess = {
+  child: ChildProcessWithoutNullStreams;
+  pending: Map<string, Pending>;
+};
+
+type WorkerMessage =
+  | { type: "ready"; pid: number }
+  | { type: "event"; id: string; event: BuildEvent }
+  | (RenderResult & { type?: undefined });
+
+export class RenderWorker {
+  private worker: WorkerProcess | null = null;
+  private nextId = 0;
+
+  constructor(private projectRoot: string = process.cwd()) {}
+
+  private start(): WorkerProcess {
+    if (this.worker) return this.worker;
+
+    const scriptPath = path.join(this.projectRoot, "app", "scripts", "render_worker.py");
+    const child = spawn("python3", [scriptPath], { cwd: this.projectRoot });
+    // Las solicitudes son de este proceso: si muere, solo se rechazan las suyas
+    const pending = new Map<string, Pending>();
+    const worker: WorkerProcess = { child, pending };
+
+    readline.createInterface({ input: child.stdout }).on("line", (line) => {
+      let message: WorkerMessage;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        console.error("Render worker: línea inválida:", line);
+        return;
+      }
+      if (message.type === "ready") return;
+
+      const request = pending.get(message.id);
+      if (!request) return;
+      if (message.type === "event") {
+        request.onEvent?.(message.event);
+        return;
+      }
+      pending.delete(message.id);
+      request.resolve(message);
+    });
+
+    // Los avisos y errores llegan como eventos; stderr es solo diagnóstico
+    child.stderr.on("data", (data) => {
+      console.warn("Render worker (stderr):", data.toString());
+    });
+
+    // exit, error del proceso (p. ej. sin python3) o EPIPE en stdin: un
+    // worker reemplazado con stop() no debe soltar al que lo sustituyó
+    const fail = (message: string) => {
+      if (this.worker === worker) this.worker = null;
+      for (const request of pending.values()) {
+        request.reject(new Error(message));
+      }
+      pending.clear();
+    };
+
+    child.on("exit", (code) => {
+      console.error(`Render worker terminó (código ${code})`);
+      fail("El render worker terminó antes de responder");
+    });
+
+    child.on("error", (error) => {
+      console.error("Render worker: error del proceso:", error);
+      fail(`El render worker falló: ${error.message}`);
+      child.kill();
+    });
+
+    child.stdin.on("error", (error) => {
+      console.error("Render worker: error al escribir en stdin:", error);
+      fail(`No se pudo enviar el trabajo al render worker: ${error.message}`);
+      child.kill();
+    });
+
+    this.worker = worker;
+    return worker;
+  }
+
+  render(
+    format: RenderFormat,
+    book: string,
+    options: RenderOptions = {}
+  ): Promise<RenderResult> {
+    const { child, pending } = this.start();
+    const id = String(++this.nextId);
+    const { onEvent, ...request } = options;
+
+    return new Promise((resolve, reject) => {
+      pending.set(id, { resolve, reject, onEvent });
+      child.stdin.write(JSON.stringify({ id, format, book, ...request }) + "\n");
+    });
+  }
+
+  /**
+   * Genera el EPUB en memoria y devuelve sus bytes, sin pasar por disco.
+   * Con edition se genera solo esa edición (un capítulo, un rango o la muestra).
+   */
+  async renderEpubBuffer(book: string, edition?: string): Promise<Buffer> {
+    const result = await this.render("epub", book, { inline: true, edition });
+    if (!result.ok || !result.data) {
+      throw new Error(result.error ?? "Render worker sin datos de salida");
+    }
+    return Buffer.from(result.data, "base64");
+  }
+
+  /**
+   * Genera el PDF de un temario ("temario", "workshop") en memoria y devuelve
+   * sus bytes. Con html se usa ese contenido en lugar del HTML de public/.
+   */
+  async renderPdfBuffer(document: string, html?: string): Promise<Buffer> {
+    const result = await this.render("pdf", document, { inline: true, html });
+    if (!result.ok || !result.data) {
+      throw new Error(result.error ?? "Render worker sin datos de salida");
+    }
+    return Buffer.from(result.data, "base64");
+  }
+
+  stop() {
+    // Las solicitudes en curso siguen esperando a este proceso hasta que salga
+    this.worker?.child.stdin.end();
+    this.worker = null;
+  }
+}
+
+declare global {
+  var __renderWorker: RenderWorker | undefined;
+}
+
+// Igual que con Prisma: en desarrollo reutilizamos el worker entre recargas
+export function getRenderWorker(projectRoot?: string): RenderWorker {
+  if (!global.__renderWorker) {
+    global.__renderWorker = new RenderWorker(projectRoot);
+  }
+  return global.__renderWorker;
+}
@@ -1,122 +1,38 @@
 #!/usr/bin/env python3
 
+import io
+from pathlib import Path
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, KeepTogether, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Spacer, KeepTogether, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from bs4 import BeautifulSoup
-import re
+from temario_extract import DEFAULT_CACHE_DIR, load_content
+import pdf_fonts
+from pdf_fonts import UnicodeParagraph as Paragraph
 
-def parse_html_temario():
-    """Lee y parsea el archivo HTML del temario"""
-    with open("public/temario-claude-code.html", "r", encoding="utf-8") as f:
-        html_content = f.read()
-    
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Extraer el contenido principal
-    content_data = {
-        'title': soup.find('h1', class_='title').get_text(strip=True) if soup.find('h1', class_='title') else "Temario Completo: Claude Code Power User",
-        'webinar': {},
-        'sessions': [],
-        'pricing': {},
-        'contact': {}
-    }
-    
-    # Extraer información del webinar
-    webinar_section = soup.find('section', class_='webinar-box')
-    if webinar_section:
-        content_data['webinar'] = {
-            'date': webinar_section.find('h4').get_text(strip=True) if webinar_section.find('h4') else "",
-            'details': [],
-            'topics': []
-        }
-        
-        # Extraer detalles del webinar
-        for p in webinar_section.find_all('p'):
-            text = p.get_text(strip=True)
-            if text:
-                content_data['webinar']['details'].append(text)
-        
-        # Extraer temas del webinar
-        ul = webinar_section.find('ul')
-        if ul:
-            for li in ul.find_all('li'):
-                content_data['webinar']['topics'].append(li.get_text(strip=True))
-    
-    # Extraer información de las sesiones
-    for session in soup.find_all('section', class_='session'):
-        session_data = {
-            'title': '',
-            'meta': '',
-            'topics': []
-        }
-        
-        # Título de la sesión
-        h4 = session.find('h4')
-        if h4:
-            session_data['title'] = h4.get_text(strip=True)
-        
-        # Metadata de la sesión
-        meta_div = session.find('div', class_='session-meta')
-        if meta_div:
-            session_data['meta'] = meta_div.get_text(strip=True)
-        
-        # Temas de la sesión
-        ul = session.find('ul')
-        if ul:
-            for li in ul.find_all('li'):
-                session_data['topics'].append(li.get_text(strip=True))
-        
-        # Para la sesión bonus, incluir el valor adicional
-        if 'bonus' in session.get('class', []):
-            bonus_p = session.find('p')
-            if bonus_p:
-                session_data['bonus_value'] = bonus_p.get_text(strip=True)
-        
-        content_data['sessions'].append(session_data)
-    
-    # Extraer información de precios
-    pricing_section = soup.find('section', class_='pricing')
-    if pricing_section:
-        price_options = pricing_section.find_all('div', class_='price-option')
-        content_data['pricing']['options'] = []
-        for option in price_options:
-            price_text = option.get_text(strip=True)
-            content_data['pricing']['options'].append(price_text)
-        
-        # Extraer lo que incluye
-        includes_h4 = pricing_section.find('h4', string=re.compile('Incluye'))
-        if includes_h4:
-            next_p = includes_h4.find_next_sibling('p')
-            if next_p:
-                includes_text = next_p.get_text()
-                content_data['pricing']['includes'] = [line.strip() for line in includes_text.split('\n') if line.strip()]
-    
-    # Extraer información de contacto
-    contact_section = soup.find('section', class_='contact-info')
-    if contact_section:
-        for p in contact_section.find_all('p'):
-            text = p.get_text(strip=True)
-            if 'Website:' in text:
-                content_data['contact']['website'] = text.replace('Website:', '').strip()
-            elif 'Email:' in text:
-                content_data['contact']['email'] = text.replace('Email:', '').strip()
-            elif 'Registro' in text:
-                content_data['contact']['registro'] = text
-    
-    return content_data
+ROOT_DIR = Path(__file__).resolve().parent
 
-def create_temario_pdf():
-    filename = "public/temario-claude-code.pdf"
-    
-    # Parsear el HTML
-    content_data = parse_html_temario()
+HTML_PATH = ROOT_DIR / "public" / "temario-claude-code.html"
+PDF_PATH = ROOT_DIR / "public" / "temario-claude-code.pdf"
+
+def parse_html_temario(html_path=HTML_PATH, backend=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Contenido del temario: de la caché si el HTML no cambió, si no se extrae (ver temario_extract.py)"""
+    return load_content("temario", html_path, cache_dir=cache_dir, backend=backend)
+
+def render_temario_pdf(content_data=None, html_path=HTML_PATH):
+    """
+    Bytes del PDF del temario, generado en memoria sin tocar disco.
+    content_data: el contenido ya extraído (ver temario_extract.py); si no se
+    pasa, se lee de html_path.
+    """
+    if content_data is None:
+        content_data = parse_html_temario(html_path)
+    buffer = io.BytesIO()
     
     # Create PDF document
-    doc = SimpleDocTemplate(filename, pagesize=letter,
+    doc = SimpleDocTemplate(buffer, pagesize=letter,
                            rightMargin=72, leftMargin=72,
                            topMargin=72, bottomMargin=18)
 
@@ -187,6 +103,9 @@ def create_temario_pdf():
         textColor=HexColor('#559B8B'),
         spaceAfter=8
     )
+    # TTF con respaldo para emojis en lugar de Helvetica (ver pdf_fonts.py)
+    pdf_fonts.apply_fonts([title_style, subtitle_style, section_style, session_title_style,
+                           webinar_style, normal_style, meta_style])
 
     # Title
     story.append(Paragraph(content_data['title'], title_style))
@@ -276,10 +195,18 @@ def create_temario_pdf():
         textColor=HexColor('#666666'),
         alignment=TA_CENTER
     )
+    pdf_fonts.apply_fonts([footer_style])
     story.append(Paragraph("© 2025 FixterGeek - Todos los derechos reservados", footer_style))
 
     doc.build(story)
-    print(f"PDF generado: {filename}")
+    return buffer.getvalue()
+
+def create_temario_pdf(output_path=PDF_PATH, html_path=HTML_PATH):
+    """Escribe el PDF en output_path (por defecto public/temario-claude-code.pdf) y devuelve la ruta"""
+    output_path = Path(output_path)
+    output_path.write_bytes(render_temario_pdf(html_path=html_path))
+    print(f"PDF generado: {output_path}")
+    return output_path
 
 if __name__ == "__main__":
     create_temario_pdf()
\ No newline at end of file
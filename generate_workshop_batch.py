@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDFs personalizados del temario del workshop para campañas de correo.
+
+Lee los destinatarios de un CSV o JSONL y genera un PDF por persona con su
+nombre, las sesiones que eligió y su precio. El temario se extrae una sola
+vez (ver temario_extract.py); cada proceso del pool arma los estilos y las
+secciones fijas al arrancar, y por destinatario solo crea los párrafos
+personales. Los workers escriben cada PDF directamente y devuelven solo su
+tamaño, y los destinatarios se leen a medida que se reparten (a lo sumo
+2 × jobs en vuelo): la memoria no crece con el tamaño de la lista.
+
+Campos de cada destinatario (columnas del CSV o claves del JSONL):
+    name       nombre para el saludo (obligatorio)
+    email      opcional; da nombre al archivo si no hay id
+    id         opcional; nombre del archivo
+    sessions   números de sesión desde 1: "1,3" en CSV o [1, 3] en JSONL
+               (vacío = todas)
+    price      precio ya formateado ("US$149"), o bien
+    amount + currency   se formatea con PRICE_FORMATS ("2490" + "MXN")
+
+Uso:
+    python3 generate_workshop_batch.py leads.csv --output-dir tmp/temarios
+    python3 generate_workshop_batch.py leads.jsonl --output-dir tmp/temarios --jobs 0
+
+En el directorio de salida queda además manifest.jsonl con el archivo,
+el tamaño y el destinatario de cada PDF. Un destinatario inválido (sin
+nombre, sesiones o monto que no son números) o cuyo PDF falla se reporta
+con su línea y se omite; el resto del lote se genera igual.
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import time
+import argparse
+import unicodedata
+from collections import deque
+from pathlib import Path
+
+import generate_workshop_pdf as workshop
+
+PROGRESS_EVERY = 100
+
+# moneda -> (plantilla, separador de miles, separador decimal)
+PRICE_FORMATS = {
+    "MXN": ("${amount} MXN", ",", "."),
+    "USD": ("US${amount}", ",", "."),
+    "COP": ("${amount} COP", ".", ","),
+    "EUR": ("{amount} €", ".", ","),
+}
+
+# Estado de cada proceso del pool, armado una vez en init_worker
+_sections = None
+
+
+def format_price(amount, currency):
+    """Precio con la plantilla y los separadores de la moneda"""
+    template, thousands, decimal = PRICE_FORMATS.get(currency.upper(), ("{amount} " + currency.upper(), ",", "."))
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        raise ValueError(f"monto inválido: {amount!r}") from None
+    text = f"{amount:,.0f}" if amount.is_integer() else f"{amount:,.2f}"
+    text = text.replace(",", "\0").replace(".", decimal).replace("\0", thousands)
+    return template.format(amount=text)
+
+
+def parse_sessions(value, session_count=None):
+    """Números de sesión (desde 1); con session_count, deben existir en el temario"""
+    if not value:
+        return []
+    numbers = value if isinstance(value, list) else [number for number in re.split(r'[\s,;]+', str(value).strip())
+                                                     if number]
+    try:
+        sessions = [int(number) for number in numbers]
+    except (TypeError, ValueError):
+        raise ValueError(f"sesiones inválidas: {value!r}") from None
+    if session_count is not None:
+        missing = [number for number in sessions if not 1 <= number <= session_count]
+        if missing:
+            raise ValueError(f"sesiones fuera de rango: {', '.join(map(str, missing))} "
+                             f"(el temario tiene {session_count})")
+    return sessions
+
+
+def normalize_recipient(row, index, line=None, session_count=None):
+    """
+    Destinatario listo para workshop_story, con su nombre de archivo. Con
+    session_count se rechazan las sesiones que el temario no tiene.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("se esperaba un objeto JSON")
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise ValueError("falta 'name'")
+    price = (row.get('price') or '').strip()
+    if not price and row.get('amount') not in (None, ''):
+        price = format_price(row['amount'], row.get('currency') or 'MXN')
+    return {
+        'index': index,
+        'name': name,
+        'email': (row.get('email') or '').strip(),
+        'sessions': parse_sessions(row.get('sessions'), session_count),
+        'price': price,
+        'file': f"{slugify(str(row.get('id') or row.get('email') or name))}-{index}.pdf",
+        'line': line or index,
+    }
+
+
+def slugify(text):
+    text = unicodedata.normalize("NFKD", text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or "destinatario"
+
+
+def report_error(errors, line, reason):
+    """Anota un destinatario omitido y lo avisa en stderr"""
+    print(f"⚠️  Línea {line}: {reason}; se omite", file=sys.stderr)
+    if errors is not None:
+        errors.append({"line": line, "error": str(reason)})
+
+
+def jsonl_rows(f):
+    """(línea, fila) de un JSONL; una línea que no es JSON válido da su error como fila"""
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except json.JSONDecodeError as e:
+            yield line, ValueError(f"JSON inválido ({e.msg})")
+
+
+def csv_rows(f):
+    reader = csv.DictReader(f)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_recipients(path, errors=None, session_count=None):
+    """
+    Destinatarios de un CSV o JSONL, uno a la vez. Cada fila se valida por
+    separado: las inválidas (también con sesiones que no están entre 1 y
+    session_count) se reportan con su línea, se agregan a errors y se omiten.
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = jsonl_rows(f) if path.suffix.lower() in (".jsonl", ".ndjson") else csv_rows(f)
+        for index, (line, row) in enumerate(rows, 1):
+            try:
+                if isinstance(row, ValueError):
+                    raise row
+                recipient = normalize_recipient(row, index, line, session_count)
+            except ValueError as e:
+                report_error(errors, line, e)
+                continue
+            yield recipient
+
+
+def init_worker(content_data):
+    """Estilos y secciones fijas del temario, una vez por proceso"""
+    global _sections
+    _sections = workshop.workshop_sections(content_data, workshop.workshop_styles())
+
+
+def render_recipient(recipient, output_dir):
+    """Genera y escribe el PDF de un destinatario; devuelve su línea del manifiesto"""
+    data = workshop.build_pdf(workshop.workshop_story(_sections, recipient))
+    path = Path(output_dir) / recipient['file']
+    path.write_bytes(data)
+    return {"file": recipient['file'], "bytes": len(data), "name": recipient['name'],
+            "email": recipient['email'], "sessions": recipient['sessions'], "price": recipient['price']}
+
+
+def render_batch(recipients, output_dir, content_data=None, jobs=1, errors=None):
+    """
+    Genera los PDFs de todos los destinatarios en output_dir. Devuelve el
+    número de PDFs generados y escribe output_dir/manifest.jsonl. Un PDF que
+    falla se reporta (y se agrega a errors) sin detener el lote; si el lote
+    se interrumpe, los PDFs en vuelo se terminan y quedan en el manifiesto.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if content_data is None:
+        content_data = workshop.parse_html_workshop()
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+
+    count = 0
+    started = time.perf_counter()
+    with open(output_dir / "manifest.jsonl", 'w', encoding='utf-8') as manifest:
+        def record(recipient, render):
+            nonlocal count
+            try:
+                entry = render()
+            except Exception as e:
+                report_error(errors, recipient['line'], f"no se pudo generar el PDF ({e})")
+                return
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+            count += 1
+            if count % PROGRESS_EVERY == 0:
+                print(f"📄 {count} PDFs ({count / (time.perf_counter() - started):.1f}/s)")
+
+        if jobs == 1:
+            init_worker(content_data)
+            for recipient in recipients:
+                record(recipient, lambda: render_recipient(recipient, output_dir))
+            return count
+
+        print(f"⚙️  Generando con {jobs} procesos")
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(content_data,)) as pool:
+            pending = deque()
+            try:
+                for recipient in recipients:
+                    pending.append((recipient, pool.submit(render_recipient, recipient, output_dir)))
+                    if len(pending) >= 2 * jobs:
+                        recipient, future = pending.popleft()
+                        record(recipient, future.result)
+            finally:
+                # También si la lectura se interrumpe: lo ya escrito queda en el manifiesto
+                while pending:
+                    recipient, future = pending.popleft()
+                    record(recipient, future.result)
+    return count
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="PDFs personalizados del temario del workshop")
+    parser.add_argument("recipients", help="CSV o JSONL con los destinatarios")
+    parser.add_argument("--output-dir", "-o", required=True, help="directorio de los PDFs")
+    parser.add_argument("--html", default=str(workshop.HTML_PATH), help="HTML del temario")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="procesos para generar los PDFs (0 = todos los núcleos)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    started = time.perf_counter()
+    errors = []
+    try:
+        content_data = workshop.parse_html_workshop(args.html)
+        recipients = read_recipients(args.recipients, errors, len(content_data['sessions']))
+        count = render_batch(recipients, args.output_dir, content_data, args.jobs, errors)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    seconds = time.perf_counter() - started
+    print(f"\n✅ {count} PDFs en {seconds:.1f}s ({count / seconds:.1f}/s) → {args.output_dir}")
+    if errors:
+        print(f"⚠️  {len(errors)} destinatarios omitidos: líneas {', '.join(str(e['line']) for e in errors)}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,154 +1,42 @@
 #!/usr/bin/env python3
 
+import io
+import copy
+from pathlib import Path
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, KeepTogether
+from reportlab.platypus import SimpleDocTemplate, Spacer, KeepTogether
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor
 from reportlab.lib.enums import TA_CENTER
-from bs4 import BeautifulSoup
-import re
+from temario_extract import DEFAULT_CACHE_DIR, load_content
+import pdf_fonts
+from pdf_fonts import UnicodeParagraph as Paragraph
 
-def parse_html_workshop():
-    """Lee y parsea el archivo HTML del temario del workshop"""
-    with open("public/temario-claude-workshop.html", "r", encoding="utf-8") as f:
-        html_content = f.read()
-    
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    content_data = {
-        'title': soup.find('h1', class_='title').get_text(strip=True) if soup.find('h1', class_='title') else "De Junior a Senior con Claude Code",
-        'subtitle': soup.find('div', class_='subtitle').get_text(strip=True) if soup.find('div', class_='subtitle') else "",
-        'badges': [],
-        'webinar': {},
-        'sessions': [],
-        'pricing': {},
-        'contact': {}
-    }
-    
-    # Extraer badges
-    for badge in soup.find_all('span', class_='badge'):
-        content_data['badges'].append(badge.get_text(strip=True))
-    
-    # Extraer información del webinar
-    webinar_section = soup.find('section', class_='webinar-box')
-    if webinar_section:
-        content_data['webinar'] = {
-            'date': webinar_section.find('h3').get_text(strip=True) if webinar_section.find('h3') else "",
-            'details': [],
-            'topics': []
-        }
-        
-        for p in webinar_section.find_all('p'):
-            text = p.get_text(strip=True)
-            if text and not text.startswith('🎯'):
-                content_data['webinar']['details'].append(text)
-        
-        ul = webinar_section.find('ul')
-        if ul:
-            for li in ul.find_all('li'):
-                content_data['webinar']['topics'].append(li.get_text(strip=True))
-    
-    # Extraer información de las sesiones
-    for session in soup.find_all('section', class_='session'):
-        session_data = {
-            'title': '',
-            'meta': '',
-            'topics': [],
-            'is_bonus': 'bonus' in session.get('class', [])
-        }
-        
-        h3 = session.find('h3')
-        if h3:
-            session_data['title'] = h3.get_text(strip=True)
-        
-        meta_div = session.find('div', class_='session-meta')
-        if meta_div:
-            session_data['meta'] = meta_div.get_text(strip=True)
-        
-        ul = session.find('ul')
-        if ul:
-            for li in ul.find_all('li'):
-                session_data['topics'].append(li.get_text(strip=True))
-        
-        # Para sesión bonus
-        if session_data['is_bonus']:
-            for p in session.find_all('p'):
-                if '⚡' in p.get_text():
-                    session_data['bonus_note'] = p.get_text(strip=True)
-        
-        content_data['sessions'].append(session_data)
-    
-    # Extraer información de precios
-    pricing_section = soup.find('section', class_='pricing')
-    if pricing_section:
-        content_data['pricing']['options'] = []
-        
-        for option in pricing_section.find_all('div', class_='price-option'):
-            price_div = option.find('div', class_='price')
-            if price_div:
-                price_text = price_div.get_text(strip=True)
-                description = []
-                for p in option.find_all('p'):
-                    description.append(p.get_text(strip=True))
-                content_data['pricing']['options'].append({
-                    'price': price_text,
-                    'description': ' '.join(description)
-                })
-        
-        # Extraer lo que incluye
-        includes_h4 = pricing_section.find('h4', string=re.compile('incluyen'))
-        if includes_h4:
-            next_ul = includes_h4.find_next_sibling('ul')
-            if next_ul:
-                content_data['pricing']['includes'] = []
-                for li in next_ul.find_all('li'):
-                    content_data['pricing']['includes'].append(li.get_text(strip=True))
-    
-    # Extraer información de contacto
-    contact_section = soup.find('section', class_='contact-info')
-    if contact_section:
-        for p in contact_section.find_all('p'):
-            text = p.get_text(strip=True)
-            if 'Website:' in text:
-                content_data['contact']['website'] = text.replace('Website:', '').strip()
-            elif 'Email:' in text:
-                content_data['contact']['email'] = text.replace('Email:', '').strip()
-            elif 'WhatsApp:' in text:
-                content_data['contact']['whatsapp'] = text.replace('WhatsApp:', '').strip()
-        
-        # Proceso de registro
-        ol = contact_section.find('ol')
-        if ol:
-            content_data['contact']['process'] = []
-            for li in ol.find_all('li'):
-                content_data['contact']['process'].append(li.get_text(strip=True))
-    
-    return content_data
+ROOT_DIR = Path(__file__).resolve().parent
 
-def create_workshop_pdf():
-    filename = "public/temario-claude-workshop.pdf"
-    
-    # Parsear el HTML
-    content_data = parse_html_workshop()
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(
-        filename, 
-        pagesize=letter,
-        rightMargin=72, 
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
+HTML_PATH = ROOT_DIR / "public" / "temario-claude-workshop.html"
+PDF_PATH = ROOT_DIR / "public" / "temario-claude-workshop.pdf"
 
-    story = []
-    styles = getSampleStyleSheet()
+_styles = None
+
+def parse_html_workshop(html_path=HTML_PATH, backend=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Contenido del temario: de la caché si el HTML no cambió, si no se extrae (ver temario_extract.py)"""
+    return load_content("workshop", html_path, cache_dir=cache_dir, backend=backend)
+
+def workshop_styles():
+    """Estilos del temario; se crean una sola vez por proceso"""
+    global _styles
+    if _styles is not None:
+        return _styles
+
+    base = getSampleStyleSheet()
 
     # Custom styles
     title_style = ParagraphStyle(
         'CustomTitle',
-        parent=styles['Heading1'],
+        parent=base['Heading1'],
         fontSize=24,
         spaceAfter=10,
         textColor=HexColor('#667eea'),
@@ -158,7 +46,7 @@ def create_workshop_pdf():
     
     subtitle_style = ParagraphStyle(
         'Subtitle',
-        parent=styles['Heading2'],
+        parent=base['Heading2'],
         fontSize=16,
         spaceAfter=20,
         textColor=HexColor('#83F3D3'),
@@ -167,7 +55,7 @@ def create_workshop_pdf():
     
     section_style = ParagraphStyle(
         'Section',
-        parent=styles['Heading2'],
+        parent=base['Heading2'],
         fontSize=16,
         spaceAfter=12,
         spaceBefore=15,
@@ -177,7 +65,7 @@ def create_workshop_pdf():
     
     session_title_style = ParagraphStyle(
         'SessionTitle',
-        parent=styles['Heading3'],
+        parent=base['Heading3'],
         fontSize=13,
         spaceAfter=8,
         textColor=HexColor('#2D3748'),
@@ -186,7 +74,7 @@ def create_workshop_pdf():
     
     webinar_style = ParagraphStyle(
         'Webinar',
-        parent=styles['Normal'],
+        parent=base['Normal'],
         fontSize=10,
         spaceAfter=10,
         textColor=HexColor('#2D3748'),
@@ -201,7 +89,7 @@ def create_workshop_pdf():
     
     normal_style = ParagraphStyle(
         'CustomNormal',
-        parent=styles['Normal'],
+        parent=base['Normal'],
         fontSize=10,
         leading=12,
         textColor=HexColor('#4A5568')
@@ -209,7 +97,7 @@ def create_workshop_pdf():
     
     meta_style = ParagraphStyle(
         'Meta',
-        parent=styles['Normal'],
+        parent=base['Normal'],
         fontSize=9,
         textColor=HexColor('#559B8B'),
         spaceAfter=6,
@@ -224,7 +112,7 @@ def create_workshop_pdf():
     
     price_style = ParagraphStyle(
         'Price',
-        parent=styles['Normal'],
+        parent=base['Normal'],
         fontSize=12,
         textColor=HexColor('#667eea'),
         fontName='Helvetica-Bold',
@@ -234,36 +122,89 @@ def create_workshop_pdf():
     # Header with FixterGeek branding
     header_style = ParagraphStyle(
         'Header',
-        parent=styles['Normal'],
+        parent=base['Normal'],
         fontSize=12,
         textColor=HexColor('#667eea'),
         alignment=TA_CENTER,
         spaceAfter=20
     )
     
-    story.append(Paragraph("<b>FixterGeek</b> | fixtergeek.com", header_style))
-    story.append(Spacer(1, 10))
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=base['Normal'],
+        fontSize=8,
+        textColor=HexColor('#94A3B8'),
+        alignment=TA_CENTER
+    )
+
+    _styles = {
+        'title': title_style,
+        'subtitle': subtitle_style,
+        'section': section_style,
+        'session_title': session_title_style,
+        'webinar': webinar_style,
+        'normal': normal_style,
+        'meta': meta_style,
+        'bonus': bonus_style,
+        'price': price_style,
+        'header': header_style,
+        'footer': footer_style,
+    }
+    # TTF con respaldo para emojis en lugar de Helvetica (ver pdf_fonts.py)
+    pdf_fonts.apply_fonts(_styles.values())
+    return _styles
+
+def session_block(session, styles):
+    """Flowable de una sesión (título, meta, temas y nota bonus)"""
+    session_content = []
+    
+    if session['is_bonus']:
+        session_content.append(Paragraph(f"<b>{session['title']}</b>", styles['bonus']))
+    else:
+        session_content.append(Paragraph(f"<b>{session['title']}</b>", styles['session_title']))
+    
+    session_content.append(Paragraph(session['meta'], styles['meta']))
+    
+    topics_text = ""
+    for topic in session['topics']:
+        topics_text += f"• {topic}<br/>"
+    session_content.append(Paragraph(topics_text, styles['normal']))
+    
+    if 'bonus_note' in session:
+        session_content.append(Spacer(1, 6))
+        session_content.append(Paragraph(f"<b>{session['bonus_note']}</b>", styles['meta']))
+    
+    return KeepTogether(session_content)
+
+def workshop_sections(content_data, styles=None):
+    """
+    Flowables que no dependen del destinatario, agrupados por sección.
+    Se arman una vez y se reutilizan en cada PDF (ver workshop_story).
+    """
+    styles = styles or workshop_styles()
+    sections = {}
+    
+    cover = sections['cover'] = []
+    cover.append(Paragraph("<b>FixterGeek</b> | fixtergeek.com", styles['header']))
+    cover.append(Spacer(1, 10))
     
     # Title and subtitle
-    story.append(Paragraph(content_data['title'], title_style))
+    cover.append(Paragraph(content_data['title'], styles['title']))
     if content_data['subtitle']:
-        # Limpiar subtitle de emojis
-        clean_subtitle = content_data['subtitle'].replace('🚀', '').strip()
-        story.append(Paragraph(clean_subtitle, subtitle_style))
-    story.append(Spacer(1, 12))
+        cover.append(Paragraph(content_data['subtitle'], styles['subtitle']))
+    cover.append(Spacer(1, 12))
     
     # Badges
     if content_data['badges']:
         badges_text = " • ".join(content_data['badges'])
-        story.append(Paragraph(badges_text, meta_style))
-        story.append(Spacer(1, 15))
+        cover.append(Paragraph(badges_text, styles['meta']))
+        cover.append(Spacer(1, 15))
     
     # Webinar section
-    story.append(Paragraph("Webinar Gratuito de Introducción", section_style))
+    webinar = sections['webinar'] = []
+    webinar.append(Paragraph("Webinar Gratuito de Introducción", styles['section']))
     
-    # Limpiar fecha de emojis
-    clean_date = content_data['webinar']['date'].replace('📅', '').strip()
-    webinar_content = f"<b>{clean_date}</b><br/><br/>"
+    webinar_content = f"<b>{content_data['webinar']['date']}</b><br/><br/>"
     
     for detail in content_data['webinar']['details']:
         if ':' in detail:
@@ -275,79 +216,46 @@ def create_workshop_pdf():
     if content_data['webinar']['topics']:
         webinar_content += "<br/><b>Lo que descubrirás:</b><br/>"
         for topic in content_data['webinar']['topics']:
-            # Limpiar el texto de emojis y caracteres especiales
-            clean_topic = topic
-            for emoji in ['✨', '🔮', '🤖', '💻', '🎁', '🔥']:
-                clean_topic = clean_topic.replace(emoji, '')
-            clean_topic = clean_topic.strip()
+            clean_topic = topic.strip()
             if clean_topic.startswith('•'):
                 clean_topic = clean_topic[1:].strip()
             webinar_content += f"• {clean_topic}<br/>"
     
-    story.append(Paragraph(webinar_content, webinar_style))
-    story.append(Spacer(1, 15))
+    webinar.append(Paragraph(webinar_content, styles['webinar']))
+    webinar.append(Spacer(1, 15))
     
     # Taller Modular
-    story.append(Paragraph("Taller Modular Especializado", section_style))
-    story.append(Paragraph(
+    webinar.append(Paragraph("Taller Modular Especializado", styles['section']))
+    sections['intro'] = Paragraph(
         "Elige las sesiones que necesites o toma el paquete completo con descuento y sesión bonus.", 
-        normal_style
-    ))
-    story.append(Spacer(1, 12))
+        styles['normal']
+    )
     
     # Sessions
-    for session in content_data['sessions']:
-        session_content = []
-        
-        # Limpiar título de emojis problemáticos
-        clean_title = session['title'].replace('🎁', '').strip()
-        
-        if session['is_bonus']:
-            session_content.append(Paragraph(f"<b>{clean_title}</b>", bonus_style))
-        else:
-            session_content.append(Paragraph(f"<b>{clean_title}</b>", session_title_style))
-        
-        # Limpiar meta de emojis
-        clean_meta = session['meta'].replace('📅', '').strip()
-        session_content.append(Paragraph(clean_meta, meta_style))
-        
-        topics_text = ""
-        for topic in session['topics']:
-            topics_text += f"• {topic}<br/>"
-        session_content.append(Paragraph(topics_text, normal_style))
-        
-        if 'bonus_note' in session:
-            session_content.append(Spacer(1, 6))
-            # Limpiar nota de emojis
-            clean_note = session['bonus_note'].replace('⚡', '').strip()
-            session_content.append(Paragraph(f"<b>{clean_note}</b>", meta_style))
-        
-        story.append(KeepTogether(session_content))
-        story.append(Spacer(1, 12))
+    sections['sessions'] = [session_block(session, styles) for session in content_data['sessions']]
     
     # Pricing
-    story.append(Spacer(1, 15))
-    story.append(Paragraph("Inversión y Opciones de Pago", section_style))
+    sections['pricing'] = [Spacer(1, 15), Paragraph("Inversión y Opciones de Pago", styles['section'])]
     
+    options = sections['options'] = []
     for option in content_data['pricing']['options']:
-        # Limpiar precio de emojis
-        clean_price = option['price'].replace('🎉', '').strip()
-        story.append(Paragraph(clean_price, price_style))
-        story.append(Paragraph(option['description'], normal_style))
-        story.append(Spacer(1, 8))
+        options.append(Paragraph(option['price'], styles['price']))
+        options.append(Paragraph(option['description'], styles['normal']))
+        options.append(Spacer(1, 8))
     
+    closing = sections['closing'] = []
     if 'includes' in content_data['pricing']:
-        story.append(Spacer(1, 8))
-        story.append(Paragraph("<b>Todos los paquetes incluyen:</b>", session_title_style))
+        closing.append(Spacer(1, 8))
+        closing.append(Paragraph("<b>Todos los paquetes incluyen:</b>", styles['session_title']))
         includes_text = ""
         for item in content_data['pricing']['includes']:
             includes_text += f"• {item}<br/>"
-        story.append(Paragraph(includes_text, normal_style))
+        closing.append(Paragraph(includes_text, styles['normal']))
     
-    story.append(Spacer(1, 15))
+    closing.append(Spacer(1, 15))
     
     # Contact
-    story.append(Paragraph("Información y Registro", section_style))
+    closing.append(Paragraph("Información y Registro", styles['section']))
     
     contact_content = []
     if 'email' in content_data['contact']:
@@ -357,31 +265,108 @@ def create_workshop_pdf():
     if 'whatsapp' in content_data['contact']:
         contact_content.append(f"<b>WhatsApp:</b> {content_data['contact']['whatsapp']}")
     
-    story.append(Paragraph("<br/>".join(contact_content), normal_style))
+    closing.append(Paragraph("<br/>".join(contact_content), styles['normal']))
     
     if 'process' in content_data['contact']:
-        story.append(Spacer(1, 12))
-        story.append(Paragraph("<b>Proceso de registro:</b>", session_title_style))
+        closing.append(Spacer(1, 12))
+        closing.append(Paragraph("<b>Proceso de registro:</b>", styles['session_title']))
         process_text = ""
         for i, step in enumerate(content_data['contact']['process'], 1):
             process_text += f"{i}. {step}<br/>"
-        story.append(Paragraph(process_text, normal_style))
+        closing.append(Paragraph(process_text, styles['normal']))
     
     # Footer
-    story.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=HexColor('#94A3B8'),
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph("© 2025 FixterGeek - Todos los derechos reservados", footer_style))
-    story.append(Paragraph("fixtergeek.com", footer_style))
+    closing.append(Spacer(1, 30))
+    closing.append(Paragraph("© 2025 FixterGeek - Todos los derechos reservados", styles['footer']))
+    closing.append(Paragraph("fixtergeek.com", styles['footer']))
+    
+    return sections
+
+def fresh(flowable):
+    """
+    Copia de un flowable para un build: reportlab le anota estado durante el
+    build (_postponed, tamaños), así que las secciones compartidas no se usan
+    directamente. La copia conserva el texto ya parseado de cada Paragraph.
+    """
+    clone = copy.copy(flowable)
+    if isinstance(flowable, KeepTogether):
+        clone._content = [fresh(item) for item in flowable._content]
+    return clone
 
-    # Build PDF
+def workshop_story(sections, recipient=None, styles=None):
+    """
+    Story del PDF a partir de las secciones ya armadas. Con recipient
+    ({"name", "sessions", "price"}) solo se crean los párrafos personales:
+    el saludo, la introducción y el precio; las sesiones elegidas (números
+    desde 1 en el orden del temario) se toman de las ya armadas.
+    """
+    styles = styles or workshop_styles()
+    recipient = recipient or {}
+    story = list(sections['cover'])
+    
+    if recipient.get('name'):
+        story.append(Paragraph(f"Temario preparado para <b>{escape(recipient['name'])}</b>", styles['header']))
+    
+    story.extend(sections['webinar'])
+    
+    sessions = sections['sessions']
+    chosen = [number for number in recipient.get('sessions') or [] if 1 <= number <= len(sessions)]
+    if chosen:
+        story.append(Paragraph(
+            "Estas son las sesiones que elegiste. Puedes sumar las demás o tomar el paquete completo "
+            "con descuento y sesión bonus.",
+            styles['normal']
+        ))
+        sessions = [sessions[number - 1] for number in chosen]
+    else:
+        story.append(sections['intro'])
+    story.append(Spacer(1, 12))
+    
+    for session in sessions:
+        story.append(session)
+        story.append(Spacer(1, 12))
+    
+    story.extend(sections['pricing'])
+    if recipient.get('price'):
+        story.append(Paragraph(f"Tu inversión: {escape(recipient['price'])}", styles['price']))
+        story.append(Spacer(1, 8))
+    else:
+        story.extend(sections['options'])
+    story.extend(sections['closing'])
+    return [fresh(flowable) for flowable in story]
+
+def build_pdf(story):
+    """Bytes del PDF con el formato de página del temario"""
+    buffer = io.BytesIO()
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(
+        buffer, 
+        pagesize=letter,
+        rightMargin=72, 
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
     doc.build(story)
-    print(f"PDF generado: {filename}")
+    return buffer.getvalue()
+
+def render_workshop_pdf(content_data=None, html_path=HTML_PATH, recipient=None):
+    """
+    Bytes del PDF del temario del workshop, generado en memoria sin tocar disco.
+    content_data: el contenido ya extraído (ver temario_extract.py); si no se
+    pasa, se lee de html_path. recipient personaliza el PDF (ver workshop_story).
+    """
+    if content_data is None:
+        content_data = parse_html_workshop(html_path)
+    return build_pdf(workshop_story(workshop_sections(content_data), recipient))
+
+def create_workshop_pdf(output_path=PDF_PATH, html_path=HTML_PATH):
+    """Escribe el PDF en output_path (por defecto public/temario-claude-workshop.pdf) y devuelve la ruta"""
+    output_path = Path(output_path)
+    output_path.write_bytes(render_workshop_pdf(html_path=html_path))
+    print(f"PDF generado: {output_path}")
+    return output_path
 
 if __name__ == "__main__":
     create_workshop_pdf()
\ No newline at end of file
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fuentes TrueType para los PDFs (temarios y edición PDF de los libros).
+Vive en la raíz junto a los generadores de temarios; app/scripts/pdf_edition.py
+lo importa con la raíz en sys.path (la ponen book_builder, render_worker y
+benchmark al arrancar).
+
+Las fuentes base de reportlab (Helvetica, Courier) solo cubren Windows-1252:
+los emojis y muchos símbolos salen como cuadros. Aquí se registran una
+familia sans y una monoespaciada TTF y, si hay una instalada, una fuente de
+emojis de contorno (Noto Emoji, OpenMoji, Symbola...). reportlab incrusta de
+cada TTF solo un subconjunto con los glifos que el documento usa (las
+fuentes aparecen como AAAAAA+DejaVuSans), nunca la fuente completa.
+
+Aun así el subconjunto tiene un costo fijo: cada cara usada (normal,
+negrita...) suma unos 18 KB comprimidos, de los que ~4 KB son la tabla
+name (con la licencia) y ~1.5 KB el hinting, que reportlab copia tal cual.
+El temario del workshop, con sans normal y negrita, pasa de ~6 KB con
+Helvetica a ~47 KB. Es el precio de dibujar acentos, símbolos y emojis.
+
+fallback_markup() recorre el texto una sola vez: los tramos que la fuente
+del estilo no tiene pasan a la primera fuente de respaldo que sí los tenga
+(la de emojis y luego la sans), y lo que ninguna cubre se descarta. Las
+fuentes se buscan una vez por proceso y cada familia se carga la primera
+vez que un estilo la usa; la de emojis, solo si algún texto la necesita.
+
+Las fuentes se buscan en $PDF_FONTS_DIR (varias rutas separadas por
+os.pathsep), public/fonts del repo y los directorios del sistema. Si no hay
+ninguna TTF se quedan las fuentes base y se descarta lo que no cubren.
+"""
+
+import os
+import re
+import string
+from pathlib import Path
+
+from reportlab.lib.fonts import ps2tt, tt2ps
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph
+
+ROOT_DIR = Path(__file__).resolve().parent
+
+FONT_DIRS = [ROOT_DIR / "public" / "fonts", Path("/usr/share/fonts"), Path("/usr/local/share/fonts"),
+             Path.home() / ".local" / "share" / "fonts", Path.home() / ".fonts",
+             Path("/Library/Fonts"), Path.home() / "Library" / "Fonts",
+             Path("/System/Library/Fonts/Supplemental"), Path("C:/Windows/Fonts")]
+
+# Familia -> archivos (normal, negrita, cursiva, negrita cursiva), en orden de preferencia
+SANS_FAMILIES = {
+    "DejaVuSans": ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf", "DejaVuSans-Oblique.ttf",
+                   "DejaVuSans-BoldOblique.ttf"),
+    "NotoSans": ("NotoSans-Regular.ttf", "NotoSans-Bold.ttf", "NotoSans-Italic.ttf", "NotoSans-BoldItalic.ttf"),
+    "LiberationSans": ("LiberationSans-Regular.ttf", "LiberationSans-Bold.ttf", "LiberationSans-Italic.ttf",
+                       "LiberationSans-BoldItalic.ttf"),
+}
+MONO_FAMILIES = {
+    "DejaVuSansMono": ("DejaVuSansMono.ttf", "DejaVuSansMono-Bold.ttf", "DejaVuSansMono-Oblique.ttf",
+                       "DejaVuSansMono-BoldOblique.ttf"),
+    "NotoSansMono": ("NotoSansMono-Regular.ttf", "NotoSansMono-Bold.ttf", None, None),
+    "LiberationMono": ("LiberationMono-Regular.ttf", "LiberationMono-Bold.ttf", "LiberationMono-Italic.ttf",
+                       "LiberationMono-BoldItalic.ttf"),
+}
+VARIANT_SUFFIXES = ("", "-Bold", "-Oblique", "-BoldOblique")
+
+# Solo fuentes de contorno: reportlab no dibuja las de mapas de bits a color
+# (Noto Color Emoji, Apple Color Emoji)
+EMOJI_FILES = ["NotoEmoji-Regular.ttf", "OpenMoji-black-glyf.ttf", "Symbola.ttf", "seguiemj.ttf"]
+EMOJI_FONT = "Emoji"
+
+# Fuente base -> (familia, negrita, cursiva)
+BASE_FONTS = {
+    "Helvetica": ("sans", 0, 0), "Helvetica-Bold": ("sans", 1, 0),
+    "Helvetica-Oblique": ("sans", 0, 1), "Helvetica-BoldOblique": ("sans", 1, 1),
+    "Courier": ("mono", 0, 0), "Courier-Bold": ("mono", 1, 0),
+    "Courier-Oblique": ("mono", 0, 1), "Courier-BoldOblique": ("mono", 1, 1),
+}
+
+# Los espacios no se dibujan con glifo: nunca obligan a cambiar de fuente
+WHITESPACE = frozenset(string.whitespace + "\u00a0")
+BASE_CHARSET = frozenset(bytes(range(32, 256)).decode("cp1252", "ignore")) | WHITESPACE
+
+TAG = re.compile(r"(<[^>]*>|&#?\w+;)")
+FONT_ATTRIBUTE = re.compile(r"""\b(?:face|name)\s*=\s*["']([^"']+)["']""")
+
+# Estado del proceso: fuentes elegidas, familias y caracteres de cada una
+_selection = None
+_families = {}
+_emoji = None
+_charsets = {}
+_fallbacks = {}
+
+
+def installed_fonts():
+    """Nombre de archivo -> ruta de las TTF instaladas (gana la primera encontrada)"""
+    directories = [Path(path) for path in os.environ.get("PDF_FONTS_DIR", "").split(os.pathsep) if path]
+    files = {}
+    for directory in directories + FONT_DIRS:
+        for root, dirs, names in os.walk(directory):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(".ttf"):
+                    files.setdefault(name, Path(root) / name)
+    return files
+
+
+def select_fonts():
+    """
+    Archivos de las fuentes que se van a usar, sin cargarlas:
+    {"sans": (familia, {nombre de fuente: ruta}) o None, "mono": ..., "emoji": ruta o None}
+    """
+    global _selection
+    if _selection is not None:
+        return _selection
+
+    files = installed_fonts()
+
+    def family(candidates):
+        for name, variants in candidates.items():
+            if variants[0] in files:
+                return name, {f"{name}{suffix}": files[variant]
+                              for variant, suffix in zip(variants, VARIANT_SUFFIXES) if variant in files}
+        return None
+
+    _selection = {
+        "sans": family(SANS_FAMILIES),
+        "mono": family(MONO_FAMILIES),
+        "emoji": next((files[name] for name in EMOJI_FILES if name in files), None),
+    }
+    return _selection
+
+
+def font_files():
+    """Nombre de fuente -> archivo, de todas las TTF que usan los PDFs (para huellas de caché)"""
+    selection = select_fonts()
+    files = {}
+    for key in ("sans", "mono"):
+        if selection[key]:
+            files.update(selection[key][1])
+    if selection["emoji"]:
+        files[EMOJI_FONT] = selection["emoji"]
+    return files
+
+
+def register_family(key):
+    """
+    Registra en reportlab la familia "sans" o "mono" elegida, una sola vez
+    por proceso, y devuelve su nombre. Sin TTF la familia es la base
+    (helvetica, courier).
+    """
+    if key in _families:
+        return _families[key]
+
+    selection = select_fonts()
+    if not selection[key]:
+        _families[key] = "helvetica" if key == "sans" else "courier"
+        return _families[key]
+
+    family, files = selection[key]
+    for name, path in files.items():
+        pdfmetrics.registerFont(TTFont(name, str(path)))
+    # Sin cursiva se usa la normal; sin negrita cursiva, la negrita
+    normal = family
+    bold = f"{family}-Bold" if f"{family}-Bold" in files else normal
+    italic = f"{family}-Oblique" if f"{family}-Oblique" in files else normal
+    bold_italic = f"{family}-BoldOblique" if f"{family}-BoldOblique" in files else bold
+    pdfmetrics.registerFontFamily(family, normal=normal, bold=bold, italic=italic, boldItalic=bold_italic)
+    _families[key] = family
+    return family
+
+
+def emoji_font():
+    """La fuente de emojis, registrada la primera vez que se pide; None si no hay"""
+    global _emoji
+    if _emoji is None:
+        path = select_fonts()["emoji"]
+        if path:
+            pdfmetrics.registerFont(TTFont(EMOJI_FONT, str(path)))
+        _emoji = EMOJI_FONT if path else ""
+    return _emoji or None
+
+
+def font_name(name):
+    """La fuente registrada que reemplaza a una fuente base; cualquier otra queda igual"""
+    if name not in BASE_FONTS:
+        return name
+    family, bold, italic = BASE_FONTS[name]
+    return tt2ps(register_family(family), bold, italic)
+
+
+def apply_fonts(styles):
+    """Cambia en los estilos las fuentes base por las registradas"""
+    for style in styles:
+        style.fontName = font_name(style.fontName)
+        style.bulletFontName = font_name(style.bulletFontName)
+
+
+def charset(font):
+    """Caracteres que la fuente puede dibujar"""
+    if font not in _charsets:
+        ttf = pdfmetrics.getFont(font)
+        _charsets[font] = (frozenset(map(chr, ttf.face.charToGlyph)) | WHITESPACE
+                           if isinstance(ttf, TTFont) else BASE_CHARSET)
+    return _charsets[font]
+
+
+def fallbacks(font):
+    """
+    [(fuente, caracteres)] de respaldo para lo que font no tiene. Solo se
+    llama cuando un texto tiene caracteres fuera de font, así que la fuente
+    de emojis no se carga para documentos que no la necesitan.
+    """
+    if font not in _fallbacks:
+        sans = register_family("sans")
+        names = [emoji_font(), font_name("Helvetica") if sans != "helvetica" else None]
+        _fallbacks[font] = [(name, charset(name)) for name in names if name and name != font]
+    return _fallbacks[font]
+
+
+def covered(text, font):
+    """True si font dibuja todo text"""
+    return text.isascii() or charset(font).issuperset(text)
+
+
+def font_runs(text, font):
+    """
+    Tramos (texto, fuente) de text: lo que font no tiene va a la primera
+    fuente de respaldo que lo tenga y lo que ninguna tiene se descarta.
+    """
+    if covered(text, font):
+        if text:
+            yield text, font
+        return
+
+    chars = charset(font)
+    backups = fallbacks(font)
+    run, current = [], font
+    for char in text:
+        if char in WHITESPACE:
+            target = current
+        elif char in chars:
+            target = font
+        else:
+            target = next((name for name, backup in backups if char in backup), None)
+            if target is None:
+                continue
+        if target != current and run:
+            yield "".join(run), current
+            run = []
+        current = target
+        run.append(char)
+    if run:
+        yield "".join(run), current
+
+
+def markup_font(font):
+    """(familia, negrita, cursiva) de una fuente, como la resuelve Paragraph"""
+    try:
+        return ps2tt(font)
+    except ValueError:
+        return font, 0, 0
+
+
+def fallback_markup(markup, font):
+    """
+    Markup de Paragraph con las fuentes de respaldo aplicadas. Sigue las
+    etiquetas <b>, <i> y <font face> para saber qué fuente dibuja cada tramo;
+    las etiquetas y entidades pasan sin cambios.
+    """
+    if markup.isascii():
+        return markup
+
+    state = markup_font(font)
+    stack, parts = [], []
+    for index, piece in enumerate(TAG.split(markup)):
+        if index % 2:
+            parts.append(piece)
+            if piece.startswith("</"):
+                if stack:
+                    state = stack.pop()
+            elif piece.startswith("<") and not piece.endswith("/>"):
+                stack.append(state)
+                family, bold, italic = state
+                tag = piece[1:-1].split(None, 1)[0].lower() if len(piece) > 2 else ""
+                if tag in ("b", "strong"):
+                    bold = 1
+                elif tag in ("i", "em"):
+                    italic = 1
+                elif tag == "font" and FONT_ATTRIBUTE.search(piece):
+                    family = markup_font(FONT_ATTRIBUTE.search(piece).group(1))[0]
+                state = (family, bold, italic)
+            continue
+        if not piece:
+            continue
+        try:
+            current = tt2ps(*state)
+        except ValueError:
+            current = font
+        for run, run_font in font_runs(piece, current):
+            parts.append(run if run_font == current else f'<font face="{run_font}">{run}</font>')
+    return "".join(parts)
+
+
+class UnicodeParagraph(Paragraph):
+    """Paragraph cuyo texto pasa por fallback_markup con la fuente del estilo"""
+
+    def __init__(self, text, style=None, *args, **kwargs):
+        # Al partirse entre páginas, Paragraph crea las mitades sin texto (None)
+        if isinstance(text, str) and style is not None:
+            text = fallback_markup(text, style.fontName)
+        super().__init__(text, style, *args, **kwargs)
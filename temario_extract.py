@@ -0,0 +1,656 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extracción declarativa de los temarios HTML (public/temario-*.html) para los
+generadores de PDF.
+
+Cada documento se describe con un esquema: qué campos tiene y de qué
+elementos sale cada uno (título, webinar, sesiones, precios, contacto). El
+HTML se recorre una sola vez como flujo de eventos (inicio, texto, fin), sin
+construir un árbol, y cada evento avanza a la vez todos los selectores del
+esquema; no hay una búsqueda por campo ni se repite ninguna.
+
+El parser es intercambiable: "lxml" (libxml2, en C) si está instalado y, si
+no, "html.parser" de la biblioteca estándar. html.parser solo reporta las
+etiquetas escritas; _StdlibParser agrega los cierres implícitos de HTML
+(<li>, <p>, <dt>/<dd>, filas y celdas de tablas, <option>) para que los dos
+produzcan el mismo resultado.
+
+Selectores (un subconjunto pequeño de CSS):
+    h3                 primer h3 dentro del ámbito
+    div.session-meta   elemento con esa clase (entre otras)
+    ul:first li        los li del primer ul, también los de listas anidadas
+                       (como find_all de BeautifulSoup), en orden del documento
+    h4:contains(Incluye) ~ p
+                       el primer p hermano que sigue al h4 cuyo texto
+                       contiene "Incluye" (sin espacios en el texto)
+
+El texto de un elemento se obtiene como get_text(strip=True) de
+BeautifulSoup: cada nodo de texto recortado y sin separador. Con raw=True
+se conserva tal cual.
+
+El contenido extraído se guarda como JSON compacto en .cache/temario/, con
+una llave que combina el hash del HTML y EXTRACTOR_VERSION: mientras el HTML
+no cambie, los PDF (y cualquier otro consumidor) lo leen sin volver a
+parsear. La extracción también es un comando:
+
+    python3 temario_extract.py workshop            # JSON en stdout
+    python3 temario_extract.py workshop --output public/temario-claude-workshop.json
+    python3 temario_extract.py temario --html otro.html --no-cache
+    python3 temario_extract.py --list               # temarios disponibles
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import tempfile
+import importlib.util
+from html.parser import HTMLParser
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+PUBLIC_DIR = ROOT_DIR / "public"
+DEFAULT_CACHE_DIR = ROOT_DIR / ".cache" / "temario"
+
+# Incrementar si cambia algún esquema o la forma de extraer el texto
+EXTRACTOR_VERSION = "2"
+
+VOID_TAGS = frozenset("area base br col embed hr img input link meta param source track wbr".split())
+
+# Cierres implícitos de HTML, para que html.parser dé los mismos eventos que
+# lxml: etiqueta que abre -> (abiertas que cierra, ámbitos donde deja de buscar)
+IMPLIED_END_TAGS = {
+    "li": ({"li"}, {"ul", "ol"}),
+    "dt": ({"dt", "dd"}, {"dl"}),
+    "dd": ({"dt", "dd"}, {"dl"}),
+    "tr": ({"tr"}, {"table", "thead", "tbody", "tfoot"}),
+    "td": ({"td", "th"}, {"tr", "table"}),
+    "th": ({"td", "th"}, {"tr", "table"}),
+    "thead": ({"thead", "tbody", "tfoot"}, {"table"}),
+    "tbody": ({"thead", "tbody", "tfoot"}, {"table"}),
+    "tfoot": ({"thead", "tbody", "tfoot"}, {"table"}),
+    "option": ({"option"}, {"select", "datalist"}),
+}
+# Bloques que cierran un <p> abierto, y los ámbitos que lo protegen
+CLOSES_P_TAGS = frozenset("address article aside blockquote dd details dialog div dl dt fieldset figcaption "
+                          "figure footer form h1 h2 h3 h4 h5 h6 header hr li main nav ol p pre section table "
+                          "ul".split())
+P_SCOPE_TAGS = frozenset("button caption html table td th template".split())
+
+STEP_RE = re.compile(r'^(?P<tag>[a-z0-9]*)(?:\.(?P<cls>[\w-]+))?(?P<first>:first)?'
+                     r'(?::contains\((?P<contains>[^)]*)\))?$')
+
+
+# ---------------------------------------------------------------------------
+# Esquemas
+# ---------------------------------------------------------------------------
+
+def parse_selector(selector):
+    """Lista de pasos: {"tag", "cls", "first", "contains", "sibling"}"""
+    steps = []
+    sibling = False
+    for token in selector.split():
+        if token == "~":
+            sibling = True
+            continue
+        match = STEP_RE.match(token)
+        if not match:
+            raise ValueError(f"Selector no soportado: {selector}")
+        steps.append({"tag": match.group("tag") or None, "cls": match.group("cls"),
+                      "first": bool(match.group("first")), "contains": match.group("contains"),
+                      "sibling": sibling})
+        sibling = False
+    if not steps or steps[0]["sibling"] or steps[-1]["contains"] is not None:
+        raise ValueError(f"Selector no soportado: {selector}")
+    return steps
+
+
+def text(selector, default="", raw=False):
+    """Texto del primer elemento que coincide"""
+    return {"kind": "text", "steps": parse_selector(selector), "default": default, "raw": raw}
+
+
+def texts(selector, keep=None, optional=False):
+    """
+    Textos de todos los elementos que coinciden. keep filtra los textos;
+    con optional el campo no aparece si nada coincide.
+    """
+    return {"kind": "texts", "steps": parse_selector(selector), "keep": keep, "optional": optional}
+
+
+def has_class(name):
+    """Si el elemento del ámbito (el del grupo) tiene la clase"""
+    return {"kind": "class", "name": name}
+
+
+def group(selector, fields, many=False, default=None, finish=None):
+    """
+    Campos extraídos dentro de un elemento. many: todos los elementos que
+    coinciden (lista); si no, el primero (default si no hay). finish
+    transforma el dict de cada elemento; si devuelve None se descarta.
+    """
+    return {"kind": "group", "steps": parse_selector(selector), "fields": fields,
+            "many": many, "default": default, "finish": finish}
+
+
+# ---------------------------------------------------------------------------
+# Recorrido
+# ---------------------------------------------------------------------------
+
+def _matches(step, tag, classes):
+    return (step["tag"] is None or step["tag"] == tag) and (step["cls"] is None or step["cls"] in classes)
+
+
+class _Matcher:
+    """Avance de un selector de un campo dentro de su ámbito"""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        self.steps = spec.get("steps", [])
+        self.stack = []        # profundidad del elemento de cada paso cumplido
+        self.exhausted = set()  # pasos :first o :contains que ya no vuelven a coincidir
+        self.armed = None      # paso :contains cumplido que espera a su hermano "~"
+        self.satisfied = False
+        self.values = []
+        self.done = False
+
+    def start(self, tag, classes, depth):
+        """Un elemento abre; devuelve el paso con el que coincide o None"""
+        level = len(self.stack)
+        if level >= len(self.steps) and self.steps and self.spec["kind"] == "texts":
+            # Dentro de un elemento ya capturado: sus descendientes que cumplen
+            # el último paso también cuentan, como en find_all
+            level = len(self.steps) - 1
+            if self.steps[level]["sibling"] or not _matches(self.steps[level], tag, classes):
+                return None
+            self.stack.append(depth)
+            return level
+        if self.done or level >= len(self.steps) or level in self.exhausted:
+            return None
+        step = self.steps[level]
+        if step["sibling"] and (self.armed != level - 1 or depth != self.stack[-1]):
+            return None
+        if not _matches(step, tag, classes):
+            return None
+        self.stack.append(depth)
+        return level
+
+    def end(self, depth):
+        """Un elemento cierra: retrocede los pasos que abrió"""
+        if self.armed is not None:
+            if depth < self.stack[self.armed]:
+                # Se cerró el padre del ancla: ya no hay hermanos por venir
+                del self.stack[self.armed:]
+                self.armed = None
+                return
+            if len(self.stack) == self.armed + 1:
+                return
+        if not self.stack or self.stack[-1] != depth:
+            return
+        # Los descendientes capturados del último paso apilan más de un nivel
+        level = min(len(self.stack), len(self.steps)) - 1
+        step = self.steps[level]
+        if step["contains"] is not None and self.satisfied:
+            # El ancla se queda en la pila hasta que aparezca su hermano
+            self.satisfied = False
+            self.armed = level
+            self.exhausted.add(level)
+            return
+        self.stack.pop()
+        if step["first"]:
+            self.exhausted.add(level)
+        if step["sibling"]:
+            # Solo el primer hermano que coincide, como find_next_sibling
+            self.stack.pop()
+            self.armed = None
+
+
+class _Scope:
+    """Un ámbito abierto: la raíz o el elemento de un grupo"""
+
+    def __init__(self, fields, depth=0, classes=(), owner=None):
+        self.depth = depth
+        self.classes = classes
+        self.owner = owner
+        self.matchers = [_Matcher(name, spec) for name, spec in fields.items()]
+
+
+class Extractor:
+    """
+    Destino de eventos (la interfaz target de lxml) que llena un esquema.
+    close() devuelve el dict extraído.
+    """
+
+    def __init__(self, schema):
+        self.depth = 0
+        self.scopes = [_Scope(schema)]
+        # [matcher, profundidad, partes, raw, paso :contains o None, posición en values]
+        self.captures = []
+        self.pending = []
+
+    def start(self, tag, attrib):
+        self._flush()
+        self.depth += 1
+        classes = (attrib.get("class") or "").split()
+        for scope in list(self.scopes):
+            for matcher in scope.matchers:
+                if matcher.spec["kind"] == "class":
+                    continue
+                level = matcher.start(tag, classes, self.depth)
+                if level is None:
+                    continue
+                if matcher.steps[level]["contains"] is not None:
+                    self.captures.append([matcher, self.depth, [], False, level, None])
+                elif level == len(matcher.steps) - 1:
+                    self._matched(matcher, classes)
+
+    def end(self, tag):
+        self._flush()
+        depth = self.depth
+        for capture in [capture for capture in self.captures if capture[1] == depth]:
+            self.captures.remove(capture)
+            self._captured(capture)
+        while len(self.scopes) > 1 and self.scopes[-1].depth == depth:
+            self._close_scope(self.scopes.pop())
+        for scope in self.scopes:
+            for matcher in scope.matchers:
+                matcher.end(depth)
+        self.depth -= 1
+
+    def data(self, content):
+        # lxml puede entregar un mismo nodo de texto en varios pedazos
+        self.pending.append(content)
+
+    def close(self):
+        self._flush()
+        return self._values(self.scopes[0])
+
+    def _flush(self):
+        if not self.pending:
+            return
+        node = "".join(self.pending)
+        self.pending = []
+        stripped = node.strip()
+        for capture in self.captures:
+            if capture[3]:
+                capture[2].append(node)
+            elif stripped:
+                capture[2].append(stripped)
+
+    def _matched(self, matcher, classes):
+        spec = matcher.spec
+        if spec["kind"] == "group":
+            matcher.done = not spec["many"]
+            self.scopes.append(_Scope(spec["fields"], self.depth, classes, owner=matcher))
+            return
+        matcher.done = spec["kind"] == "text"
+        # El lugar se reserva al abrir: un li anidado cierra antes que el suyo
+        matcher.values.append(None)
+        self.captures.append([matcher, self.depth, [], spec.get("raw", False), None, len(matcher.values) - 1])
+
+    def _captured(self, capture):
+        matcher, _, parts, _, level, slot = capture
+        value = "".join(parts)
+        if level is None:
+            matcher.values[slot] = value
+        elif matcher.steps[level]["contains"] in value:
+            matcher.satisfied = True
+
+    def _close_scope(self, scope):
+        value = self._values(scope)
+        finish = scope.owner.spec["finish"]
+        if finish:
+            value = finish(value)
+        if value is not None:
+            scope.owner.values.append(value)
+
+    def _values(self, scope):
+        result = {}
+        for matcher in scope.matchers:
+            spec = matcher.spec
+            kind = spec["kind"]
+            if kind == "class":
+                result[matcher.name] = spec["name"] in scope.classes
+            elif kind == "texts":
+                values = matcher.values
+                if spec["keep"]:
+                    values = [value for value in values if spec["keep"](value)]
+                if values or not spec["optional"]:
+                    result[matcher.name] = values
+            elif kind == "group" and spec["many"]:
+                result[matcher.name] = matcher.values
+            else:
+                result[matcher.name] = matcher.values[0] if matcher.values else spec["default"]
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+def feed_lxml(html_content, target):
+    from lxml import etree
+
+    parser = etree.HTMLParser(target=target, encoding='utf-8')
+    parser.feed(html_content.encode('utf-8'))
+    return parser.close()
+
+
+class _StdlibParser(HTMLParser):
+    """html.parser con eventos balanceados, como los de lxml"""
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+        self.open_tags = []
+
+    def handle_starttag(self, tag, attrs):
+        self.close_implied(tag)
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+        if tag in VOID_TAGS:
+            self.target.end(tag)
+        else:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.close_implied(tag)
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+        self.target.end(tag)
+
+    def close_implied(self, tag):
+        """Cierra lo que HTML cierra sin etiqueta de fin al abrir tag (<li> tras <li>, <p> antes de un bloque)"""
+        if tag in CLOSES_P_TAGS:
+            self.close_open({"p"}, P_SCOPE_TAGS)
+        if tag in IMPLIED_END_TAGS:
+            self.close_open(*IMPLIED_END_TAGS[tag])
+
+    def close_open(self, tags, scope):
+        """Cierra el elemento abierto más interno de tags, con lo que tenga dentro, si no hay un scope antes"""
+        for index in range(len(self.open_tags) - 1, -1, -1):
+            name = self.open_tags[index]
+            if name in tags:
+                while len(self.open_tags) > index:
+                    self.target.end(self.open_tags.pop())
+                return
+            if name in scope:
+                return
+
+    def handle_endtag(self, tag):
+        if tag not in self.open_tags:
+            return
+        # Cierra también los elementos que quedaron abiertos dentro
+        while self.open_tags:
+            closed = self.open_tags.pop()
+            self.target.end(closed)
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.target.end(self.open_tags.pop())
+
+
+def feed_stdlib(html_content, target):
+    parser = _StdlibParser(target)
+    parser.feed(html_content)
+    parser.close()
+    return target.close()
+
+
+BACKENDS = {"lxml": feed_lxml, "html.parser": feed_stdlib}
+
+
+def default_backend():
+    return "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+def extract(html_content, schema, backend=None):
+    """Recorre el HTML una vez y devuelve el dict que describe el esquema"""
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Parser desconocido: {backend} (disponibles: {', '.join(BACKENDS)})")
+    return BACKENDS[backend](html_content, Extractor(schema))
+
+
+# ---------------------------------------------------------------------------
+# Temarios
+# ---------------------------------------------------------------------------
+
+def _workshop_session(session):
+    paragraphs = session.pop("paragraphs")
+    if session["is_bonus"]:
+        notes = [paragraph for paragraph in paragraphs if '⚡' in paragraph]
+        if notes:
+            session["bonus_note"] = notes[-1]
+    return session
+
+
+def _workshop_price(option):
+    if option["price"] is None:
+        return None
+    return {"price": option["price"], "description": " ".join(option["paragraphs"])}
+
+
+CONTACT_LABELS = {"Website:": "website", "Email:": "email", "WhatsApp:": "whatsapp"}
+
+
+def _workshop_contact(contact):
+    result = {}
+    for paragraph in contact.pop("paragraphs"):
+        for label, key in CONTACT_LABELS.items():
+            if label in paragraph:
+                result[key] = paragraph.replace(label, '').strip()
+                break
+    result.update(contact)
+    return result
+
+
+WORKSHOP_SCHEMA = {
+    "title": text("h1.title", default="De Junior a Senior con Claude Code"),
+    "subtitle": text("div.subtitle"),
+    "badges": texts("span.badge"),
+    "webinar": group("section.webinar-box", {
+        "date": text("h3"),
+        "details": texts("p", keep=lambda detail: detail and not detail.startswith('🎯')),
+        "topics": texts("ul:first li"),
+    }, default={}),
+    "sessions": group("section.session", {
+        "title": text("h3"),
+        "meta": text("div.session-meta"),
+        "topics": texts("ul:first li"),
+        "is_bonus": has_class("bonus"),
+        "paragraphs": texts("p"),
+    }, many=True, finish=_workshop_session),
+    "pricing": group("section.pricing", {
+        "options": group("div.price-option", {
+            "price": text("div.price", default=None),
+            "paragraphs": texts("p"),
+        }, many=True, finish=_workshop_price),
+        "includes": texts("h4:contains(incluyen) ~ ul li", optional=True),
+    }, default={}),
+    "contact": group("section.contact-info", {
+        "paragraphs": texts("p"),
+        "process": texts("ol:first li", optional=True),
+    }, default={}, finish=_workshop_contact),
+}
+
+
+def _temario_session(session):
+    first_paragraph = session.pop("first_paragraph")
+    if session.pop("is_bonus") and first_paragraph is not None:
+        session["bonus_value"] = first_paragraph
+    return session
+
+
+def _temario_pricing(pricing):
+    includes = pricing.pop("includes")
+    if includes is not None:
+        pricing["includes"] = [line.strip() for line in includes.split('\n') if line.strip()]
+    return pricing
+
+
+def _temario_contact(contact):
+    result = {}
+    for paragraph in contact["paragraphs"]:
+        if 'Website:' in paragraph:
+            result["website"] = paragraph.replace('Website:', '').strip()
+        elif 'Email:' in paragraph:
+            result["email"] = paragraph.replace('Email:', '').strip()
+        elif 'Registro' in paragraph:
+            result["registro"] = paragraph
+    return result
+
+
+TEMARIO_SCHEMA = {
+    "title": text("h1.title", default="Temario Completo: Claude Code Power User"),
+    "webinar": group("section.webinar-box", {
+        "date": text("h4"),
+        "details": texts("p", keep=bool),
+        "topics": texts("ul:first li"),
+    }, default={}),
+    "sessions": group("section.session", {
+        "title": text("h4"),
+        "meta": text("div.session-meta"),
+        "topics": texts("ul:first li"),
+        "is_bonus": has_class("bonus"),
+        "first_paragraph": text("p", default=None),
+    }, many=True, finish=_temario_session),
+    "pricing": group("section.pricing", {
+        "options": texts("div.price-option"),
+        "includes": text("h4:contains(Incluye) ~ p", default=None, raw=True),
+    }, default={}, finish=_temario_pricing),
+    "contact": group("section.contact-info", {
+        "paragraphs": texts("p"),
+    }, default={}, finish=_temario_contact),
+}
+
+# id -> (HTML en public/, esquema)
+DOCUMENTS = {
+    "temario": ("temario-claude-code.html", TEMARIO_SCHEMA),
+    "workshop": ("temario-claude-workshop.html", WORKSHOP_SCHEMA),
+}
+
+
+def extract_document(document, html_content, backend=None):
+    """content_data de uno de los temarios de DOCUMENTS"""
+    if document not in DOCUMENTS:
+        raise ValueError(f"Temario desconocido: {document} (disponibles: {', '.join(DOCUMENTS)})")
+    return extract(html_content, DOCUMENTS[document][1], backend)
+
+
+# ---------------------------------------------------------------------------
+# Caché
+# ---------------------------------------------------------------------------
+
+def content_key(document, html_bytes):
+    digest = hashlib.sha256(f"{EXTRACTOR_VERSION}\n{document}\n".encode('utf-8'))
+    digest.update(html_bytes)
+    return digest.hexdigest()[:24]
+
+
+def cached_content(cache_dir, document, key):
+    try:
+        with open(Path(cache_dir) / f"{document}-{key}.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def store_content(cache_dir, document, key, content_data):
+    """Guarda el contenido y borra las entradas anteriores del mismo temario"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"{document}-{key}.json"
+
+    # Escribir a un temporal y renombrar: nunca se lee una entrada a medias
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(dumps(content_data))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    for old in cache_dir.glob(f"{document}-*.json"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def dumps(content_data, indent=None):
+    separators = None if indent else (",", ":")
+    return json.dumps(content_data, ensure_ascii=False, indent=indent, separators=separators)
+
+
+def load_content(document, html_path=None, cache_dir=DEFAULT_CACHE_DIR, backend=None):
+    """
+    content_data de un temario, desde la caché si el HTML no cambió.
+    html_path: por defecto el HTML del temario en public/. cache_dir=None
+    extrae siempre sin leer ni escribir la caché.
+    """
+    if document not in DOCUMENTS:
+        raise ValueError(f"Temario desconocido: {document} (disponibles: {', '.join(DOCUMENTS)})")
+    html_path = Path(html_path) if html_path else PUBLIC_DIR / DOCUMENTS[document][0]
+    with open(html_path, 'rb') as f:
+        html_bytes = f.read()
+
+    if cache_dir is None:
+        return extract_document(document, html_bytes.decode('utf-8'), backend)
+
+    key = content_key(document, html_bytes)
+    content_data = cached_content(cache_dir, document, key)
+    if content_data is None:
+        content_data = extract_document(document, html_bytes.decode('utf-8'), backend)
+        store_content(cache_dir, document, key, content_data)
+    return content_data
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Extrae el contenido de un temario HTML como JSON")
+    parser.add_argument("document", nargs="?", help=f"temario a extraer ({', '.join(DOCUMENTS)})")
+    parser.add_argument("--html", help="HTML de origen (por defecto el del temario en public/)")
+    parser.add_argument("--output", "-o", help="escribir el JSON en esta ruta en lugar de stdout")
+    parser.add_argument("--no-cache", action="store_true", help="extraer sin leer ni escribir la caché")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="directorio de la caché")
+    parser.add_argument("--backend", choices=list(BACKENDS), help="parser HTML (por defecto lxml si está)")
+    parser.add_argument("--pretty", action="store_true", help="JSON indentado")
+    parser.add_argument("--list", action="store_true", help="mostrar los temarios disponibles")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.list or not args.document:
+        for document, (html_name, _) in DOCUMENTS.items():
+            print(f"{document:<10} public/{html_name}")
+        return 0
+
+    try:
+        content_data = load_content(args.document, args.html,
+                                    cache_dir=None if args.no_cache else args.cache_dir,
+                                    backend=args.backend)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    text_output = dumps(content_data, indent=2 if args.pretty else None) + "\n"
+    if args.output:
+        Path(args.output).write_text(text_output, encoding='utf-8')
+        print(f"📋 {args.document}: {len(content_data['sessions'])} sesiones → {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(text_output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())